@@ -2,4 +2,14 @@ from .functions import (
     parse_file_to_data_dict, bucketize
     , get_metadata_from_data_dict, get_metadata_from_file
     , process_data_dict_by_metadata
-)
\ No newline at end of file
+    , ColumnSummary, get_summaries_from_data_dict, get_summaries_from_file
+    , merge_summaries, get_metadata_from_summaries
+)
+from .batch import get_metadata_from_files, get_metadata_from_files_async
+from .cache import MetadataCache
+from .columnar import StoredColumn, save_columnar, load_columnar
+from .sampling import sample_file_to_data_dict, get_metadata_from_sample
+from .sketches import HyperLogLog, KLLSketch, MisraGries
+from .stats import StageStats
+from .streaming import iter_data_dict_chunks, process_file_by_metadata
+from .transformer import MetadataTransformer
@@ -0,0 +1,65 @@
+import glob
+import itertools
+import os
+from .functions import get_metadata_from_file
+from .parallel import imap_unordered_in_processes, worker_pool
+
+def _get_file_paths(paths_or_glob):
+    # A directory stands for the files in it and any other string for a glob pattern, such as 'data/**/*.csv'
+    if isinstance(paths_or_glob, (str, os.PathLike)):
+        pattern = os.fspath(paths_or_glob)
+        if os.path.isdir(pattern):
+            return sorted(entry.path for entry in os.scandir(pattern) if entry.is_file())
+        return sorted(glob.glob(pattern, recursive=True))
+    return list(paths_or_glob)
+
+def _get_metadata_or_error(options, file_path):
+    # Returns the metadata of file_path and None, or None and the error that profiling it raised
+    try:
+        return get_metadata_from_file(file_path, **options), None
+    except Exception as error:
+        return None, error
+
+def get_metadata_from_files(paths_or_glob, workers=None, max_pending=None, **options):
+    """
+    Yields (file path, metadata, error) for every file of paths_or_glob, a list of file paths, a directory or a glob
+    pattern, in the order the files finish. options are passed to get_metadata_from_file. Files are profiled in
+    workers processes, os.cpu_count() by default, with at most max_pending of them handed to the pool at a time.
+    When profiling a file raises an exception, such as ValueError for a line with a different number of columns,
+    metadata is None and error is the exception, and the other files are profiled all the same.
+    """
+    file_paths = _get_file_paths(paths_or_glob)
+    if workers == 1:
+        for file_path in file_paths:
+            yield (file_path,) + _get_metadata_or_error(options, file_path)
+        return
+    for file_path, (metadata, error) in imap_unordered_in_processes(_get_metadata_or_error, file_paths, options, workers, max_pending):
+        yield file_path, metadata, error
+
+async def get_metadata_from_files_async(paths_or_glob, workers=None, max_pending=None, **options):
+    """
+    Asynchronous generator of what get_metadata_from_files yields, which waits for worker processes without
+    blocking the event loop:
+
+        async for file_path, metadata, error in get_metadata_from_files_async('data/*.csv'):
+            ...
+    """
+    # Imported here so that importing metamon stays fast for processes that never use asyncio
+    import asyncio
+    file_paths = iter(_get_file_paths(paths_or_glob))
+    max_pending = max_pending or 2 * (workers or os.cpu_count() or 1)
+    # Waiting for running files when the caller stops early would block the event loop, so the pool does not wait
+    with worker_pool(_get_metadata_or_error, options, workers, wait=False) as submit:
+        pending = {asyncio.wrap_future(submit(file_path)): file_path for file_path in itertools.islice(file_paths, max_pending)}
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    file_path = pending.pop(future)
+                    for next_file_path in itertools.islice(file_paths, 1):
+                        pending[asyncio.wrap_future(submit(next_file_path))] = next_file_path
+                    metadata, error = future.result()
+                    yield file_path, metadata, error
+        finally:
+            for future in pending:
+                future.cancel()
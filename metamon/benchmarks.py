@@ -0,0 +1,202 @@
+"""
+Benchmarks of the public functions on synthetic datasets.
+
+    python -m metamon.benchmarks --save-baseline baseline.json
+    python -m metamon.benchmarks --baseline baseline.json
+
+Every dataset is generated from a fixed seed, so that results are comparable between runs. Throughput is reported
+in rows/s from the fastest of several runs and peak memory from one more run under tracemalloc.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import time
+import tracemalloc
+from tempfile import mkdtemp
+from .functions import (
+    parse_file_to_data_dict, bucketize
+    , get_metadata_from_data_dict, get_metadata_from_file
+    , process_data_dict_by_metadata
+)
+
+# Number of rows and columns of each dataset at scale 1
+DATASET_SHAPES = {
+    'wide': (2000, 500)
+    , 'tall': (200000, 5)
+    , 'high_cardinality': (100000, 3)
+    , 'mostly_null': (100000, 5)
+    , 'quoted': (50000, 5)
+    , 'mixed_type': (50000, 5)
+}
+
+def _generate_value(dataset, column_number, row_number, rand):
+    column_kind = column_number % 5
+    if dataset == 'high_cardinality':
+        return 'id{}'.format(rand.getrandbits(48)) if column_kind % 2 else str(rand.getrandbits(32))
+    if dataset == 'mostly_null' and rand.random() < 0.95:
+        return ''
+    if dataset == 'mixed_type' and rand.random() < 0.1:
+        return rand.choice(['text', 'NA', 'true', '1.5e3', '-0'])
+    if column_kind == 0:
+        return rand.choice(['t', 'f'])
+    elif column_kind == 1:
+        return rand.choice(['red', 'green', 'blue', 'yellow'])
+    elif column_kind == 2:
+        return str(rand.randint(-1000, 1000))
+    elif column_kind == 3:
+        return repr(round(rand.gauss(0, 100), 3))
+    return 'text {} {}'.format(row_number, rand.randint(0, 10 ** 6))
+
+def generate_data_dict(dataset, num_rows=None, num_columns=None, seed=0):
+    """
+    Returns a data dict of strings, like parse_file_to_data_dict does, for one of DATASET_SHAPES.
+    Values of the quoted dataset are wrapped in double quotes like they are in its file.
+    """
+    if dataset not in DATASET_SHAPES:
+        raise ValueError('The given dataset is not supported: dataset - {}, supported datasets - {}'.format(dataset, sorted(DATASET_SHAPES)))
+    default_num_rows, default_num_columns = DATASET_SHAPES[dataset]
+    num_rows = default_num_rows if num_rows is None else num_rows
+    num_columns = default_num_columns if num_columns is None else num_columns
+    rand = random.Random(seed)
+    data_dict = dict()
+    for column_number in range(num_columns):
+        values = [_generate_value(dataset, column_number, row_number, rand) for row_number in range(num_rows)]
+        data_dict['var{}'.format(column_number)] = values
+    if dataset == 'quoted':
+        data_dict = {'"{}"'.format(key): ['"{}"'.format(value) for value in values] for key, values in data_dict.items()}
+    return data_dict
+
+def write_data_dict_to_file(data_dict, file_path, separator=','):
+    with open(file_path, 'w') as file:
+        file.write(separator.join(data_dict.keys()) + '\n')
+        for row in zip(*data_dict.values()):
+            file.write(separator.join(row) + '\n')
+
+def measure(function, num_rows, repeat=3):
+    """
+    Calls function repeat times and once more under tracemalloc.
+    Returns seconds of the fastest call, rows/s and peak memory in bytes.
+    """
+    seconds = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        seconds = min(seconds, time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        function()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        'seconds': seconds
+        , 'rows_per_second': num_rows / seconds if seconds else float('inf')
+        , 'peak_memory': peak_memory
+    }
+
+def _benchmark_dataset(dataset, data_dict, file_path, repeat):
+    num_rows = len(next(iter(data_dict.values())))
+    parsed_data_dict = parse_file_to_data_dict(file_path)
+    metadata = get_metadata_from_data_dict(parsed_data_dict)
+    results = {
+        'parse_file_to_data_dict': measure(lambda: parse_file_to_data_dict(file_path), num_rows, repeat)
+        , 'get_metadata_from_data_dict': measure(lambda: get_metadata_from_data_dict(parsed_data_dict), num_rows, repeat)
+        , 'get_metadata_from_file': measure(lambda: get_metadata_from_file(file_path), num_rows, repeat)
+        , 'process_data_dict_by_metadata': measure(lambda: process_data_dict_by_metadata(parsed_data_dict, metadata), num_rows, repeat)
+    }
+    numeric_columns = [
+        ([float(value) for value in parsed_data_dict[key] if value], metadata[key]['buckets'])
+        for key in parsed_data_dict if metadata[key]['meaning_type'] == 'numeric'
+    ]
+    if numeric_columns:
+        results['bucketize'] = measure(
+            lambda: [bucketize(numbers, buckets) for numbers, buckets in numeric_columns], num_rows, repeat
+        )
+    return {'{}/{}'.format(function_name, dataset): result for function_name, result in results.items()}
+
+def run_benchmarks(datasets=None, scale=1.0, repeat=3, seed=0):
+    """
+    Returns {'<function>/<dataset>': {'seconds': ..., 'rows_per_second': ..., 'peak_memory': ...}}.
+    scale multiplies the number of rows of every dataset.
+    """
+    results = dict()
+    temp_dir = mkdtemp()
+    try:
+        for dataset in datasets or sorted(DATASET_SHAPES):
+            num_rows = max(1, int(DATASET_SHAPES[dataset][0] * scale))
+            data_dict = generate_data_dict(dataset, num_rows, seed=seed)
+            file_path = os.path.join(temp_dir, '{}.csv'.format(dataset))
+            write_data_dict_to_file(data_dict, file_path)
+            results.update(_benchmark_dataset(dataset, data_dict, file_path, repeat))
+    finally:
+        shutil.rmtree(temp_dir)
+    return results
+
+def save_baseline(results, file_path):
+    with open(file_path, 'w') as file:
+        json.dump(results, file, indent=2, sort_keys=True)
+
+def load_baseline(file_path):
+    with open(file_path, 'r') as file:
+        return json.load(file)
+
+def compare_to_baseline(results, baseline, tolerance=0.2):
+    """
+    Returns a list of (benchmark, measure, baseline value, value) for every benchmark whose rows/s dropped
+    or peak memory grew by more than tolerance compared to baseline.
+    """
+    regressions = list()
+    for benchmark, result in sorted(results.items()):
+        if benchmark not in baseline:
+            continue
+        baseline_result = baseline[benchmark]
+        if result['rows_per_second'] < baseline_result['rows_per_second'] * (1 - tolerance):
+            regressions.append((benchmark, 'rows_per_second', baseline_result['rows_per_second'], result['rows_per_second']))
+        if result['peak_memory'] > baseline_result['peak_memory'] * (1 + tolerance):
+            regressions.append((benchmark, 'peak_memory', baseline_result['peak_memory'], result['peak_memory']))
+    return regressions
+
+def format_results(results, baseline=None):
+    lines = ['{:<50} {:>14} {:>12} {:>10}'.format('benchmark', 'rows/s', 'peak MiB', 'vs base')]
+    for benchmark, result in sorted(results.items()):
+        if baseline and benchmark in baseline:
+            change = '{:+.0%}'.format(result['rows_per_second'] / baseline[benchmark]['rows_per_second'] - 1)
+        else:
+            change = ''
+        lines.append('{:<50} {:>14,.0f} {:>12.1f} {:>10}'.format(
+            benchmark, result['rows_per_second'], result['peak_memory'] / 2 ** 20, change
+        ))
+    return '\n'.join(lines)
+
+def add_arguments(parser):
+    parser.add_argument('--dataset', action='append', choices=sorted(DATASET_SHAPES), help='dataset to run, can be repeated; all by default')
+    parser.add_argument('--scale', type=float, default=1.0, help='multiplies the number of rows of every dataset')
+    parser.add_argument('--repeat', type=int, default=3, help='number of timed runs, the fastest is reported')
+    parser.add_argument('--baseline', help='JSON file of saved results to compare against')
+    parser.add_argument('--save-baseline', help='JSON file to save the results to')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='relative drop of rows/s or growth of peak memory reported as a regression')
+
+def run(arguments, output=sys.stdout):
+    # Returns 1 when a regression compared to the baseline is found, 0 otherwise
+    results = run_benchmarks(arguments.dataset, arguments.scale, arguments.repeat)
+    baseline = load_baseline(arguments.baseline) if arguments.baseline else None
+    output.write(format_results(results, baseline) + '\n')
+    if arguments.save_baseline:
+        save_baseline(results, arguments.save_baseline)
+    if baseline:
+        regressions = compare_to_baseline(results, baseline, arguments.tolerance)
+        for benchmark, measure_name, baseline_value, value in regressions:
+            output.write('REGRESSION {} {}: {:,.0f} -> {:,.0f}\n'.format(benchmark, measure_name, baseline_value, value))
+        return 1 if regressions else 0
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m metamon.benchmarks', description='Benchmarks metamon on synthetic datasets.')
+    add_arguments(parser)
+    return run(parser.parse_args(argv))
+
+if __name__ == '__main__':
+    sys.exit(main())
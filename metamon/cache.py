@@ -0,0 +1,154 @@
+import collections
+import copy
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+
+FINGERPRINTS = ('mtime', 'hash')
+
+def _get_default_directory():
+    return os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'metamon')
+
+def _hash_file_content(file_path):
+    content_hash = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            content_hash.update(block)
+    return content_hash.hexdigest()
+
+def _get_size_and_mtime(stat):
+    return (stat.st_size, stat.st_mtime_ns)
+
+class MetadataCache(object):
+    """
+    Cache of metadata of files, kept in directory and in memory.
+
+    Entries are keyed by the absolute path of a file, its size, its modification time (or the hash of its content
+    with fingerprint='hash') and the options the metadata was computed with, so that a changed file or different
+    options are profiled again. The least recently used entries are removed once the entries in directory take more
+    than max_size bytes, and at most max_memo_entries entries are also kept in memory.
+    """
+
+    def __init__(self, directory=None, max_size=100 * 2 ** 20, fingerprint='mtime', max_memo_entries=128):
+        if fingerprint not in FINGERPRINTS:
+            raise ValueError('The given fingerprint is not supported: fingerprint - {}, supported fingerprints - {}'.format(fingerprint, FINGERPRINTS))
+        self.directory = directory if directory is not None else _get_default_directory()
+        self.max_size = max_size
+        self.fingerprint = fingerprint
+        self.max_memo_entries = max_memo_entries
+        self._memo = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # Caches sent to worker processes start without the entries kept in memory
+        state = self.__dict__.copy()
+        del state['_memo'], state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._memo = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_file_fingerprint(self, file_path, stat=None):
+        file_path = os.path.abspath(file_path)
+        stat = os.stat(file_path) if stat is None else stat
+        if self.fingerprint == 'hash':
+            return (file_path, stat.st_size, _hash_file_content(file_path))
+        return (file_path, stat.st_size, stat.st_mtime_ns)
+
+    def get_key(self, file_path, options):
+        return self._get_key(self._get_file_fingerprint(file_path), options)
+
+    def _get_key(self, file_fingerprint, options):
+        return hashlib.blake2b(repr((file_fingerprint, sorted(options.items()))).encode('utf-8'), digest_size=16).hexdigest()
+
+    def _get_entry_path(self, key):
+        return os.path.join(self.directory, '{}.pickle'.format(key))
+
+    def _remember(self, key, metadata):
+        with self._lock:
+            self._memo[key] = metadata
+            self._memo.move_to_end(key)
+            while len(self._memo) > self.max_memo_entries:
+                self._memo.popitem(last=False)
+
+    def get(self, key):
+        # Returns the cached metadata or None
+        with self._lock:
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                return copy.deepcopy(self._memo[key])
+        entry_path = self._get_entry_path(key)
+        try:
+            with open(entry_path, 'rb') as file:
+                metadata = pickle.load(file)
+            # The modification time of an entry is when it was last used
+            os.utime(entry_path)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        self._remember(key, metadata)
+        return copy.deepcopy(metadata)
+
+    def put(self, key, metadata):
+        self._remember(key, copy.deepcopy(metadata))
+        os.makedirs(self.directory, exist_ok=True)
+        # Written to a temporary file first so that other processes never read a partial entry
+        file_descriptor, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(file_descriptor, 'wb') as file:
+                pickle.dump(metadata, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self._get_entry_path(key))
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        self._evict()
+
+    def _evict(self):
+        entries = list()
+        for entry_name in os.listdir(self.directory):
+            if entry_name.endswith('.pickle'):
+                try:
+                    stat = os.stat(os.path.join(self.directory, entry_name))
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, entry_name))
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, entry_name in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(os.path.join(self.directory, entry_name))
+            except OSError:
+                pass
+            total_size -= size
+
+    def get_or_compute(self, file_path, options, compute_metadata):
+        # Returns the cached metadata of file_path or compute_metadata(), which is cached unless the file changed meanwhile
+        try:
+            stat = os.stat(file_path)
+            key = self._get_key(self._get_file_fingerprint(file_path, stat), options)
+        except FileNotFoundError:
+            raise ValueError('The given file path does not exist: file_path - {}'.format(file_path))
+        metadata = self.get(key)
+        if metadata is not None:
+            return metadata
+        metadata = compute_metadata()
+        # A file changed meanwhile has another size or modification time, so its content is not hashed again
+        try:
+            changed = _get_size_and_mtime(os.stat(file_path)) != _get_size_and_mtime(stat)
+        except OSError:
+            changed = True
+        if not changed:
+            self.put(key, metadata)
+        return metadata
+
+    def clear(self):
+        with self._lock:
+            self._memo.clear()
+        if os.path.isdir(self.directory):
+            for entry_name in os.listdir(self.directory):
+                if entry_name.endswith('.pickle'):
+                    os.remove(os.path.join(self.directory, entry_name))
@@ -0,0 +1,126 @@
+"""
+Command line interface of metamon.
+
+    metamon profile data.csv > metadata.json
+    cat data.csv | metamon apply metadata.json > processed.csv
+    metamon bench --scale 0.1
+
+FILE is read from stdin when it is - or omitted, and results are written to stdout, so that every subcommand can sit
+in a shell pipeline.
+"""
+import argparse
+import json
+import os
+import sys
+from . import benchmarks
+from .functions import (
+    QUANTILE_ENGINES, UNIQUE_VALUES_ENGINES
+    , parse_file_to_data_dict, get_metadata_from_file, process_data_dict_by_metadata
+    , ColumnSummary, get_metadata_from_summaries
+)
+from .sampling import SAMPLING_METHODS, get_metadata_from_sample
+from .streaming import iter_data_dict_chunks, process_file_by_metadata, _write_data_dict
+
+_STDIN = '-'
+_DEFAULT_CHUNK_SIZE = 10000
+
+def _add_input_arguments(parser):
+    parser.add_argument('file', nargs='?', default=_STDIN, help='CSV file to read, stdin when - or omitted')
+    parser.add_argument('--separator', default=',', help='separator of values, , by default')
+    parser.add_argument('--chunk-size', type=int, help='number of rows read and processed at a time')
+    parser.add_argument('--workers', type=int, help='number of processes; only used when FILE is a path')
+
+def _profile_lines(lines, arguments):
+    # Lines that can only be read once are summarized chunk by chunk instead of being parsed at once
+    column_summaries = dict()
+    for data_dict in iter_data_dict_chunks(lines, arguments.separator, arguments.chunk_size or _DEFAULT_CHUNK_SIZE):
+        for key, values in data_dict.items():
+            if key not in column_summaries:
+                column_summaries[key] = ColumnSummary(arguments.quantile_engine, unique_values_engine=arguments.unique_values_engine)
+            column_summaries[key].update(values)
+    return get_metadata_from_summaries(column_summaries, arguments.buckets, arguments.max_unique_values)
+
+def profile(arguments, input, output):
+    if arguments.file == _STDIN:
+        metadata = _profile_lines(input, arguments)
+    elif arguments.sample_size:
+        metadata = get_metadata_from_sample(
+            arguments.file, arguments.sample_size, arguments.separator, arguments.buckets, arguments.max_unique_values
+            , arguments.sampling_method, confirm=arguments.confirm, chunk_size=arguments.chunk_size or _DEFAULT_CHUNK_SIZE
+        )
+    else:
+        metadata = get_metadata_from_file(
+            arguments.file, arguments.separator, arguments.buckets, arguments.max_unique_values, arguments.chunk_size
+            , quantile_engine=arguments.quantile_engine, workers=arguments.workers
+            , unique_values_engine=arguments.unique_values_engine
+        )
+    json.dump(metadata, output, indent=2)
+    output.write('\n')
+    return 0
+
+def apply(arguments, input, output):
+    with open(arguments.metadata, 'r') as file:
+        metadata = json.load(file)
+    output_separator = arguments.output_separator if arguments.output_separator is not None else arguments.separator
+    if arguments.workers and arguments.workers > 1 and arguments.file != _STDIN:
+        # Worker processes need all rows of the file at once, so the file is processed as a whole
+        data_dict = process_data_dict_by_metadata(
+            parse_file_to_data_dict(arguments.file, arguments.separator, workers=arguments.workers), metadata
+            , workers=arguments.workers, chunk_size=arguments.chunk_size
+        )
+        output.write(output_separator.join(data_dict.keys()) + '\n')
+        _write_data_dict(output, data_dict, output_separator)
+    else:
+        source = input if arguments.file == _STDIN else arguments.file
+        process_file_by_metadata(
+            source, metadata, output, arguments.separator, arguments.chunk_size or _DEFAULT_CHUNK_SIZE, output_separator
+        )
+    return 0
+
+def bench(arguments, input, output):
+    return benchmarks.run(arguments, output)
+
+def get_parser():
+    parser = argparse.ArgumentParser(prog='metamon', description='Produces metadata of CSV files and processes them by it.')
+    subparsers = parser.add_subparsers(dest='command', metavar='command')
+    subparsers.required = True
+
+    profile_parser = subparsers.add_parser('profile', help='write metadata of a CSV file as JSON')
+    _add_input_arguments(profile_parser)
+    profile_parser.add_argument('--buckets', type=int, default=10, help='number of buckets of numeric variables')
+    profile_parser.add_argument('--max-unique-values', type=int, default=10, help='maximum number of unique values of categorical variables')
+    profile_parser.add_argument('--quantile-engine', choices=QUANTILE_ENGINES, default='exact')
+    profile_parser.add_argument('--unique-values-engine', choices=UNIQUE_VALUES_ENGINES, default='exact')
+    profile_parser.add_argument('--sample-size', type=int, help='infer metadata from this many sampled rows; only used when FILE is a path')
+    profile_parser.add_argument('--sampling-method', choices=SAMPLING_METHODS, default='reservoir')
+    profile_parser.add_argument('--confirm', action='store_true', help='check the meaning type of sampled metadata over all rows')
+    profile_parser.set_defaults(function=profile)
+
+    apply_parser = subparsers.add_parser('apply', help='write a CSV file processed by metadata')
+    apply_parser.add_argument('metadata', help='JSON file written by metamon profile')
+    _add_input_arguments(apply_parser)
+    apply_parser.add_argument('--output-separator', help='separator of written values, --separator by default')
+    apply_parser.set_defaults(function=apply)
+
+    bench_parser = subparsers.add_parser('bench', help='benchmark metamon on synthetic datasets')
+    benchmarks.add_arguments(bench_parser)
+    bench_parser.set_defaults(function=bench)
+    return parser
+
+def main(argv=None, input=None, output=None):
+    parser = get_parser()
+    arguments = parser.parse_args(argv)
+    input = sys.stdin if input is None else input
+    output = sys.stdout if output is None else output
+    try:
+        return arguments.function(arguments, input, output)
+    except BrokenPipeError:
+        # The reader of stdout, such as head, exited; stdout is pointed at devnull so that flushing it at exit does not fail again
+        if output is sys.stdout:
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    except (ValueError, OSError) as error:
+        parser.exit(1, '{}: error: {}\n'.format(parser.prog, error))
+
+if __name__ == '__main__':
+    sys.exit(main())
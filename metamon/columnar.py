@@ -0,0 +1,291 @@
+import json
+import math
+import os
+from array import array
+from collections import Counter
+from collections.abc import Sequence
+
+_MANIFEST_FILE_NAME = 'columns.json'
+_FORMAT_VERSION = 1
+_INT64_MIN, _INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+def _is_canonical_integer(value):
+    # Only integers that are written the way str writes them can be stored as numbers and read back unchanged
+    try:
+        number = int(value)
+    except ValueError:
+        return False
+    return _INT64_MIN <= number <= _INT64_MAX and str(number) == value
+
+def _is_canonical_float(value):
+    try:
+        number = float(value)
+    except ValueError:
+        return False
+    # -0.0 is kept as a string because it counts as the same number as 0.0, and nan and inf because they are
+    # strings rather than numbers to get_metadata_from_data_dict
+    return repr(number) == value and math.isfinite(number) and not (number == 0 and value.startswith('-'))
+
+def _get_column_kind(vocabulary):
+    non_empty_values = [value for value in vocabulary if value != '']
+    if not non_empty_values:
+        return 'string'
+    if all(map(_is_canonical_integer, non_empty_values)):
+        return 'integer'
+    if all(map(_is_canonical_float, non_empty_values)):
+        return 'float'
+    return 'string'
+
+def _encode_column(values):
+    # Dictionary encodes values in order of first occurrence
+    vocabulary = dict()
+    codes = list()
+    for value in values:
+        if type(value) is not str:
+            raise ValueError('Only data dicts of strings, like parse_file_to_data_dict returns, can be saved: value - {!r}, type - {}'.format(value, type(value)))
+        code = vocabulary.get(value)
+        if code is None:
+            code = vocabulary[value] = len(vocabulary)
+        codes.append(code)
+    return list(vocabulary), codes
+
+def _save_column(values, path, column_number):
+    import numpy as np
+    vocabulary, codes = _encode_column(values)
+    kind = _get_column_kind(vocabulary)
+    codes = np.array(codes, dtype=np.int64)
+    arrays = dict()
+    if kind == 'string':
+        encoded_vocabulary = [value.encode('utf-8', 'surrogatepass') for value in vocabulary]
+        offsets = np.zeros(len(encoded_vocabulary) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded_vocabulary], out=offsets[1:])
+        arrays['codes'] = codes.astype(np.int32) if len(vocabulary) <= np.iinfo(np.int32).max else codes
+        arrays['offsets'] = offsets
+        arrays['data'] = np.frombuffer(b''.join(encoded_vocabulary), dtype=np.uint8)
+    else:
+        number_type, dtype = (int, np.int64) if kind == 'integer' else (float, np.float64)
+        numbers = np.array([number_type(value) if value != '' else 0 for value in vocabulary], dtype=dtype)
+        arrays['values'] = numbers[codes]
+        if '' in vocabulary:
+            arrays['mask'] = codes == vocabulary.index('')
+    file_names = dict()
+    for array_name, array in arrays.items():
+        file_names[array_name] = '{}.{}.npy'.format(column_number, array_name)
+        np.save(os.path.join(path, file_names[array_name]), array, allow_pickle=False)
+    return {'kind': kind, 'length': len(values), 'files': file_names}
+
+def save_columnar(data_dict, path):
+    """
+    Saves a data dict of strings to the directory path in a binary columnar format that load_columnar reads back.
+    Columns of integers or floats that read back the same are saved as numbers, other columns as the distinct
+    strings in UTF-8 and the position of each value among them.
+    """
+    os.makedirs(path, exist_ok=True)
+    columns = list()
+    for column_number, (variable_name, values) in enumerate(data_dict.items()):
+        column = _save_column(values, path, column_number)
+        column['name'] = variable_name
+        columns.append(column)
+    with open(os.path.join(path, _MANIFEST_FILE_NAME), 'w') as file:
+        json.dump({'version': _FORMAT_VERSION, 'columns': columns}, file)
+
+def load_columnar(path):
+    """
+    Returns a data dict of StoredColumn read from a directory written by save_columnar.
+    The arrays are memory-mapped, so nothing is read until values are used.
+    """
+    import numpy as np
+    with open(os.path.join(path, _MANIFEST_FILE_NAME), 'r') as file:
+        manifest = json.load(file)
+    if manifest.get('version') != _FORMAT_VERSION:
+        raise ValueError('The given columnar format version is not supported: version - {}, supported version - {}'.format(manifest.get('version'), _FORMAT_VERSION))
+    data_dict = dict()
+    for column in manifest['columns']:
+        arrays = {
+            array_name: np.load(os.path.join(path, file_name), mmap_mode='r', allow_pickle=False)
+            for array_name, file_name in column['files'].items()
+        }
+        data_dict[column['name']] = StoredColumn(column['kind'], column['length'], **arrays)
+    return data_dict
+
+# Share of distinct values above which a column of strings is kept as a list instead of being dictionary encoded
+_MAX_DISTINCT_SHARE = 0.5
+
+def _get_canonical_numbers(values, number_type):
+    # Returns values as numbers when every value is a number written the way str writes it for integers and repr for
+    # floats, None otherwise. Only distinct values are converted and written back, which is what takes time.
+    distinct_values = list(dict.fromkeys(values))
+    try:
+        numbers = list(map(number_type, distinct_values))
+    except ValueError:
+        return None
+    if list(map(str if number_type is int else repr, numbers)) != distinct_values:
+        return None
+    if number_type is int and (min(numbers) < _INT64_MIN or max(numbers) > _INT64_MAX):
+        return None
+    if number_type is float and ('-0.0' in distinct_values or not all(map(math.isfinite, numbers))):
+        return None
+    if len(distinct_values) == len(values):
+        return numbers
+    return list(map(dict(zip(distinct_values, numbers)).__getitem__, values))
+
+_NUMBER_KINDS = (('integer', int, 'q'), ('float', float, 'd'))
+
+class _ColumnBuilder(object):
+    # Builds a StoredColumn from chunks of strings as they are parsed. Numbers go to an array('q') or array('d')
+    # with the positions of empty strings, other strings are dictionary encoded, and a column falls back to the next
+    # of these forms, and last to a list of strings, as soon as a value does not fit.
+    def __init__(self):
+        self.kind = None
+        self.length = 0
+        self.numbers = None
+        self.empty_positions = array('q')
+        self.vocabulary = None
+        self.codes = None
+        self.strings = None
+
+    def append(self, values):
+        if self.kind in (None, 'integer', 'float') and not self._append_numbers(values):
+            self._to_strings()
+        if self.kind == 'string':
+            vocabulary = self.vocabulary
+            self.codes.extend([vocabulary.setdefault(value, len(vocabulary)) for value in values])
+            if len(vocabulary) > _MAX_DISTINCT_SHARE * len(self.codes):
+                self.kind, self.strings, self.vocabulary, self.codes = 'list', self._decode(), None, None
+        elif self.kind == 'list':
+            self.strings.extend(values)
+        self.length += len(values)
+
+    def _append_numbers(self, values):
+        # Returns False when the non-empty values are not numbers of the kind of the column
+        non_empty_values = [value for value in values if value != ''] if '' in values else values
+        numbers = list()
+        if non_empty_values:
+            for kind, number_type, typecode in _NUMBER_KINDS:
+                if self.kind in (None, kind):
+                    numbers = _get_canonical_numbers(non_empty_values, number_type)
+                    if numbers is not None:
+                        break
+            else:
+                return False
+            if self.kind is None:
+                self.kind, self.numbers = kind, array(typecode, bytes(8 * self.length))
+        if len(non_empty_values) < len(values):
+            # Empty strings are stored as 0 and their positions are kept
+            self.empty_positions.extend([position for position, value in enumerate(values, self.length) if value == ''])
+            numbers = iter(numbers)
+            numbers = [next(numbers) if value != '' else 0 for value in values]
+        if self.numbers is not None:
+            self.numbers.extend(numbers)
+        return True
+
+    def _decode(self):
+        strings = list(self.vocabulary)
+        return [strings[code] for code in self.codes]
+
+    def _to_strings(self):
+        # Writes the numbers so far back as the strings they were parsed from
+        strings = list(map(str if self.kind == 'integer' else repr, self.numbers)) if self.numbers is not None else [''] * self.length
+        for position in self.empty_positions:
+            strings[position] = ''
+        self.kind, self.numbers, self.empty_positions = 'string', None, array('q')
+        self.vocabulary, self.codes = dict(), array('i')
+        self.codes.extend([self.vocabulary.setdefault(value, len(self.vocabulary)) for value in strings])
+
+    def build(self):
+        import numpy as np
+        if self.kind is None:
+            self._to_strings()
+        if self.kind == 'list':
+            return self.strings
+        if self.kind == 'string':
+            encoded_vocabulary = [value.encode('utf-8', 'surrogatepass') for value in self.vocabulary]
+            offsets = np.zeros(len(encoded_vocabulary) + 1, dtype=np.int64)
+            np.cumsum([len(value) for value in encoded_vocabulary], out=offsets[1:])
+            column = StoredColumn(
+                'string', self.length, codes=np.frombuffer(self.codes, dtype='i{}'.format(self.codes.itemsize))
+                , offsets=offsets, data=np.frombuffer(b''.join(encoded_vocabulary), dtype=np.uint8)
+            )
+            # The strings are at hand, so they are not decoded again
+            column._vocabulary = list(self.vocabulary)
+            return column
+        mask = None
+        if self.empty_positions:
+            mask = np.zeros(self.length, dtype=bool)
+            mask[np.frombuffer(self.empty_positions, dtype=np.int64)] = True
+        values = np.frombuffer(self.numbers, dtype=np.int64 if self.kind == 'integer' else np.float64)
+        return StoredColumn(self.kind, self.length, values=values, mask=mask)
+
+class StoredColumn(Sequence):
+    """
+    Column of a data dict loaded by load_columnar. It reads like the list of strings it was saved from,
+    and value_counts counts the values without creating a string per value.
+    """
+
+    def __init__(self, kind, length, values=None, mask=None, codes=None, offsets=None, data=None):
+        self.kind = kind
+        self.length = length
+        self.values = values
+        self.mask = mask
+        self.codes = codes
+        self.offsets = offsets
+        self.data = data
+        self._vocabulary = None
+
+    def __len__(self):
+        return self.length
+
+    def _get_vocabulary(self):
+        if self._vocabulary is None:
+            data = self.data.tobytes()
+            offsets = self.offsets.tolist()
+            self._vocabulary = [data[start:end].decode('utf-8', 'surrogatepass') for start, end in zip(offsets[:-1], offsets[1:])]
+        return self._vocabulary
+
+    def _to_strings(self, start, stop):
+        if self.kind == 'string':
+            vocabulary = self._get_vocabulary()
+            return [vocabulary[code] for code in self.codes[start:stop].tolist()]
+        strings = list(map(str if self.kind == 'integer' else repr, self.values[start:stop].tolist()))
+        if self.mask is not None:
+            for position in self.mask[start:stop].nonzero()[0].tolist():
+                strings[position] = ''
+        return strings
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.length)
+            if step == 1:
+                return self._to_strings(start, stop)
+            return self.to_list()[index]
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError('StoredColumn index out of range')
+        return self._to_strings(index, index + 1)[0]
+
+    def __iter__(self):
+        return iter(self._to_strings(0, self.length))
+
+    def to_list(self):
+        return self._to_strings(0, self.length)
+
+    def value_counts(self):
+        # Counter of the values in order of first occurrence, like Counter(list(self)) but without a string per value
+        import numpy as np
+        if self.kind == 'string':
+            counts = np.bincount(self.codes, minlength=len(self.offsets) - 1).tolist()
+            return Counter(dict(zip(self._get_vocabulary(), counts)))
+        if self.mask is not None:
+            present_positions = np.flatnonzero(~self.mask)
+            numbers = self.values[present_positions]
+        else:
+            present_positions = None
+            numbers = self.values
+        unique_numbers, first_indices, counts = np.unique(numbers, return_index=True, return_counts=True)
+        if present_positions is not None:
+            first_indices = present_positions[first_indices]
+        value_counts = list(zip(first_indices.tolist(), map(str if self.kind == 'integer' else repr, unique_numbers.tolist()), counts.tolist()))
+        if self.mask is not None and len(numbers) < self.length:
+            value_counts.append((int(np.argmax(self.mask)), '', self.length - len(numbers)))
+        return Counter({value: count for _, value, count in sorted(value_counts)})
@@ -0,0 +1,97 @@
+import bz2
+import gzip
+import io
+import locale
+import lzma
+import queue
+import threading
+
+# Magic bytes that compressed files start with, the name of their compression and how to open them for reading bytes
+_COMPRESSIONS = (
+    (b'\x1f\x8b', 'gzip', gzip.open)
+    , (b'BZh', 'bz2', bz2.open)
+    , (b'\xfd7zXZ\x00', 'xz', lzma.open)
+)
+_BLOCK_SIZE = 1 << 20
+# Number of decompressed blocks the background thread can get ahead of the reader
+_MAX_BUFFERED_BLOCKS = 8
+
+def get_compression(file_path):
+    # Returns 'gzip', 'bz2' or 'xz' from the first bytes of file_path, or None when it is not compressed
+    with open(file_path, 'rb') as file:
+        start = file.read(max(len(magic) for magic, _, _ in _COMPRESSIONS))
+    for magic, compression, _ in _COMPRESSIONS:
+        if start.startswith(magic):
+            return compression
+    return None
+
+class _DecompressingReader(io.RawIOBase):
+    # Reads the blocks a background thread decompresses into a bounded queue, so that decompressing the next blocks
+    # overlaps with parsing the current one. zlib, bz2 and lzma release the GIL while they decompress.
+    def __init__(self, compressed_file):
+        self._blocks = queue.Queue(_MAX_BUFFERED_BLOCKS)
+        self._closing = threading.Event()
+        self._block = memoryview(b'')
+        self._position = 0
+        self._at_end = False
+        self._thread = threading.Thread(target=self._decompress, args=(compressed_file,), daemon=True)
+        self._thread.start()
+
+    def _decompress(self, compressed_file):
+        try:
+            with compressed_file:
+                while not self._closing.is_set():
+                    block = compressed_file.read(_BLOCK_SIZE)
+                    self._put(block)
+                    if not block:
+                        return
+        except Exception as error:
+            self._put(error)
+
+    def _put(self, item):
+        # Gives up once the reader is closed, so that the thread does not wait forever on a full queue
+        while not self._closing.is_set():
+            try:
+                self._blocks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while self._position >= len(self._block):
+            if self._at_end:
+                return 0
+            item = self._blocks.get()
+            if isinstance(item, Exception):
+                self._at_end = True
+                raise item
+            if not item:
+                self._at_end = True
+                return 0
+            self._block, self._position = memoryview(item), 0
+        size = min(len(buffer), len(self._block) - self._position)
+        buffer[:size] = self._block[self._position:self._position + size]
+        self._position += size
+        return size
+
+    def close(self):
+        if not self.closed:
+            self._closing.set()
+            self._thread.join()
+        super().close()
+
+def open_text_file(file_path):
+    """
+    Opens file_path for reading text like open(file_path, 'r') does. Files compressed with gzip, bz2 or xz are
+    recognized from their first bytes, whatever their name, and decompressed by a background thread
+    at most _MAX_BUFFERED_BLOCKS blocks ahead of the reader.
+    """
+    compression = get_compression(file_path)
+    for _, name, open_compressed_file in _COMPRESSIONS:
+        if compression == name:
+            reader = io.BufferedReader(_DecompressingReader(open_compressed_file(file_path, 'rb')), _BLOCK_SIZE)
+            return io.TextIOWrapper(reader, encoding=locale.getpreferredencoding(False))
+    return open(file_path, 'r')
@@ -1,135 +1,762 @@
+import bisect
+import io
 import math
-import statistics
+from collections import Counter
 from decimal import Decimal
 from fractions import Fraction
-import numpy as np
-from scipy import stats
+from .columnar import StoredColumn, _ColumnBuilder
+from .compression import get_compression, open_text_file
+from .parallel import SHARES_MEMORY_WITH_WORKERS, map_in_processes
+from .sketches import HyperLogLog, KLLSketch, MisraGries
+from .stats import _NO_STATS, StageStats
+
+QUANTILE_ENGINES = ('exact', 'sketch')
+UNIQUE_VALUES_ENGINES = ('exact', 'sketch')
+
+class _DoubleQuoteWrappingBroken(Exception):
+    pass
+
+def _all_values_wrapped_in_double_quotes(values):
+    for value in values:
+        if not (value.startswith('"') and value.endswith('"')):
+            return False
+    return True
+
+def _check_number_of_columns(line_number, number_of_columns_in_this_line, number_of_columns_in_header_line):
+    if number_of_columns_in_this_line != number_of_columns_in_header_line:
+        raise ValueError(
+            'The number of columns in this line is different from the number of columsn in the header line: line number - {}, number of columns in this line - {}, number of columns in the header line - {}'.format(
+                line_number, number_of_columns_in_this_line, number_of_columns_in_header_line
+            )
+        )
+
+def _unwrap_double_quotes(data_dict):
+    unwrapped_data_dict = dict()
+    for variable_name, values in data_dict.items():
+        values[:] = [value[1:-1] for value in values]
+        unwrapped_data_dict[variable_name[1:-1]] = values
+    return unwrapped_data_dict
+
+def parse_file_to_data_dict(file_path, separator=',', workers=None, stats=None, compact=False):
+    # With stats, a StageStats, the parse stage of the file is recorded.
+    # With compact=True, each column is stored as it is read in a StoredColumn of numbers or of dictionary encoded
+    # strings when its values allow, and in a list of strings otherwise. Columns read the same in less memory and
+    # the file is parsed in this process.
+    with (_NO_STATS if stats is None else stats).stage('parse', file_path) as stage:
+        if compact:
+            data_dict = _parse_file_to_compact_data_dict(file_path, separator)
+        else:
+            data_dict = _parse_file_to_data_dict(file_path, separator, workers)
+        stage.rows = len(next(iter(data_dict.values()), ()))
+    return data_dict
+
+_COMPACT_CHUNK_SIZE = 10000
+
+def _build_compact_data_dict(file_path, separator, unwrap_double_quotes):
+    column_builders = dict()
+    for data_dict in _iter_data_dict_chunks(file_path, separator, _COMPACT_CHUNK_SIZE, unwrap_double_quotes):
+        for key, values in data_dict.items():
+            if key not in column_builders:
+                column_builders[key] = _ColumnBuilder()
+            column_builders[key].append(values)
+    return {key: column_builder.build() for key, column_builder in column_builders.items()}
+
+def _parse_file_to_compact_data_dict(file_path, separator):
+    try:
+        return _build_compact_data_dict(file_path, separator, True)
+    except _DoubleQuoteWrappingBroken:
+        return _build_compact_data_dict(file_path, separator, False)
+
+def _parse_file_to_data_dict(file_path, separator, workers):
+    try:
+        # Compressed files cannot be split into byte ranges, so they are parsed in this process
+        compressed = get_compression(file_path) is not None
+    except FileNotFoundError:
+        raise ValueError('The given file path does not exist: file_path - {}'.format(file_path))
+    if workers is not None and workers > 1 and not compressed:
+        return _parse_file_to_data_dict_in_byte_ranges(file_path, separator, workers)
 
-def parse_file_to_data_dict(file_path, separator=','):
     data_dict = dict()
     column_number_to_variable_name_mapping = dict()
     try:
+        # Values are only unwrapped when every value in the file is wrapped in double quotes.
+        # Instead of reading the file twice, keep the raw values and unwrap them once at the end.
         wrapped_in_double_quotes = True
-        with open(file_path, 'r') as file:
-            for line in file.readlines():
-                for value in line.strip().split(separator):
-                    if not (value.startswith('"') and value.endswith('"')):
-                        wrapped_in_double_quotes = False
-                        break
-
-        with open(file_path, 'r') as file:
-            for line_number, line in enumerate(file.readlines()):
+        with open_text_file(file_path) as file:
+            for line_number, line in enumerate(file):
                 split_line = line.strip().split(separator)
+                if wrapped_in_double_quotes and not _all_values_wrapped_in_double_quotes(split_line):
+                    wrapped_in_double_quotes = False
                 if line_number == 0:
                     number_of_columns_in_header_line = len(split_line)
                     for column_number, variable_name in enumerate(split_line):
-                        if wrapped_in_double_quotes:
-                            variable_name = variable_name[1:-1]
                         column_number_to_variable_name_mapping[column_number] = variable_name
                         data_dict[variable_name] = list()
+                    columns = [data_dict[column_number_to_variable_name_mapping[column_number]] for column_number in range(number_of_columns_in_header_line)]
                 else:
-                    number_of_columns_in_this_line = len(split_line)
-                    if number_of_columns_in_this_line != number_of_columns_in_header_line:
-                        raise ValueError(
-                            'The number of columns in this line is different from the number of columsn in the header line: line number - {}, number of columns in this line - {}, number of columns in the header line - {}'.format(
-                                line_number, number_of_columns_in_this_line, number_of_columns_in_header_line
-                            )
-                        )
-                    for column_number, value in enumerate(split_line):
-                        if wrapped_in_double_quotes:
-                            value = value[1:-1]
-                        data_dict[column_number_to_variable_name_mapping[column_number]].append(value)
+                    _check_number_of_columns(line_number, len(split_line), number_of_columns_in_header_line)
+                    for column, value in zip(columns, split_line):
+                        column.append(value)
     except FileNotFoundError:
         raise ValueError('The given file path does not exist: file_path - {}'.format(file_path))
+
+    if wrapped_in_double_quotes and data_dict:
+        data_dict = _unwrap_double_quotes(data_dict)
     return data_dict
 
-def bucketize(numbers, buckets, variable_name='x'):
+_MIN_BYTE_RANGE_SIZE = 1 << 20
+
+def _get_line_aligned_byte_ranges(file, start, end, number_of_ranges):
+    boundaries = [start]
+    for range_number in range(1, number_of_ranges):
+        file.seek(max(start + (end - start) * range_number // number_of_ranges, boundaries[-1]))
+        file.readline()
+        boundary = min(file.tell(), end)
+        if boundary > boundaries[-1]:
+            boundaries.append(boundary)
+    if end > boundaries[-1]:
+        boundaries.append(end)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+def _parse_byte_range(file_path_separator_and_number_of_columns, byte_range):
+    # Returns the columns, the number of lines and whether every value is wrapped in double quotes.
+    # Values cannot contain the separator, so each column is joined with it into one string,
+    # which is much cheaper to send back to the parent process than a list of strings.
+    # Instead of raising, the position of the first line with a wrong number of columns is returned
+    # so that the error can be reported with its line number in the whole file.
+    file_path, separator, number_of_columns_in_header_line = file_path_separator_and_number_of_columns
+    start, end = byte_range
+    with open(file_path, 'rb') as file:
+        file.seek(start)
+        text = io.TextIOWrapper(io.BytesIO(file.read(end - start)))
+    columns = [list() for _ in range(number_of_columns_in_header_line)]
+    wrapped_in_double_quotes = True
+    number_of_lines = 0
+    for line_index, line in enumerate(text):
+        split_line = line.strip().split(separator)
+        if len(split_line) != number_of_columns_in_header_line:
+            return None, number_of_lines, wrapped_in_double_quotes, (line_index, len(split_line))
+        if wrapped_in_double_quotes and not _all_values_wrapped_in_double_quotes(split_line):
+            wrapped_in_double_quotes = False
+        for column, value in zip(columns, split_line):
+            column.append(value)
+        number_of_lines += 1
+    return [separator.join(column) for column in columns], number_of_lines, wrapped_in_double_quotes, None
+
+def _parse_file_to_data_dict_in_byte_ranges(file_path, separator, workers):
+    # Splits the lines after the header into byte ranges that start at a line, parses them in worker processes
+    # and joins the columns of the ranges in order
+    try:
+        with open(file_path, 'rb') as file:
+            header_line = io.TextIOWrapper(io.BytesIO(file.readline())).readline()
+            header_end = file.tell()
+            file_size = file.seek(0, io.SEEK_END)
+            if not header_line:
+                return dict()
+            number_of_ranges = max(1, min(workers * 4, (file_size - header_end) // _MIN_BYTE_RANGE_SIZE))
+            byte_ranges = _get_line_aligned_byte_ranges(file, header_end, file_size, number_of_ranges)
+    except FileNotFoundError:
+        raise ValueError('The given file path does not exist: file_path - {}'.format(file_path))
+
+    split_header_line = header_line.strip().split(separator)
+    number_of_columns_in_header_line = len(split_header_line)
+    wrapped_in_double_quotes = _all_values_wrapped_in_double_quotes(split_header_line)
+    data_dict = dict()
+    for variable_name in split_header_line:
+        data_dict[variable_name] = list()
+    columns = [data_dict[variable_name] for variable_name in split_header_line]
+
+    parsed_byte_ranges = map_in_processes(
+        _parse_byte_range, byte_ranges, (file_path, separator, number_of_columns_in_header_line), workers=workers
+    )
+    line_number = 1
+    for range_columns, number_of_lines, range_wrapped_in_double_quotes, error in parsed_byte_ranges:
+        if error is not None:
+            line_index, number_of_columns_in_this_line = error
+            _check_number_of_columns(line_number + line_index, number_of_columns_in_this_line, number_of_columns_in_header_line)
+        line_number += number_of_lines
+        wrapped_in_double_quotes = wrapped_in_double_quotes and range_wrapped_in_double_quotes
+        if number_of_lines:
+            for column, joined_range_column in zip(columns, range_columns):
+                column.extend(joined_range_column.split(separator))
+
+    if wrapped_in_double_quotes:
+        data_dict = _unwrap_double_quotes(data_dict)
+    return data_dict
+
+def _build_data_dict_chunk(variable_names, columns, wrapped_in_double_quotes):
+    if wrapped_in_double_quotes:
+        return {variable_name[1:-1]: [value[1:-1] for value in column] for variable_name, column in zip(variable_names, columns)}
+    return dict(zip(variable_names, columns))
+
+def _iter_data_dict_chunks_from_lines(lines, separator=',', chunk_size=10000, unwrap_double_quotes=True):
+    # Yields data dicts of at most chunk_size rows each. Whether values are wrapped in double quotes
+    # is only known after all lines have been read, so chunks are unwrapped optimistically
+    # and _DoubleQuoteWrappingBroken is raised if a later line turns out not to be wrapped.
+    wrapped_in_double_quotes = unwrap_double_quotes
+    unwrapped_chunk_yielded = False
+    chunk_yielded = False
+    variable_names = None
+    for line_number, line in enumerate(lines):
+        split_line = line.strip().split(separator)
+        if wrapped_in_double_quotes and not _all_values_wrapped_in_double_quotes(split_line):
+            if unwrapped_chunk_yielded:
+                raise _DoubleQuoteWrappingBroken()
+            wrapped_in_double_quotes = False
+        if line_number == 0:
+            variable_names = split_line
+            number_of_columns_in_header_line = len(split_line)
+            columns = [list() for _ in variable_names]
+            number_of_rows_in_chunk = 0
+        else:
+            _check_number_of_columns(line_number, len(split_line), number_of_columns_in_header_line)
+            for column, value in zip(columns, split_line):
+                column.append(value)
+            number_of_rows_in_chunk += 1
+            if number_of_rows_in_chunk >= chunk_size:
+                yield _build_data_dict_chunk(variable_names, columns, wrapped_in_double_quotes)
+                chunk_yielded = True
+                unwrapped_chunk_yielded = unwrapped_chunk_yielded or wrapped_in_double_quotes
+                columns = [list() for _ in variable_names]
+                number_of_rows_in_chunk = 0
+
+    if variable_names is not None and (number_of_rows_in_chunk or not chunk_yielded):
+        yield _build_data_dict_chunk(variable_names, columns, wrapped_in_double_quotes)
+
+def _iter_data_dict_chunks(file_path, separator=',', chunk_size=10000, unwrap_double_quotes=True):
+    try:
+        with open_text_file(file_path) as file:
+            yield from _iter_data_dict_chunks_from_lines(file, separator, chunk_size, unwrap_double_quotes)
+    except FileNotFoundError:
+        raise ValueError('The given file path does not exist: file_path - {}'.format(file_path))
+
+def _get_bucket_labels(buckets, variable_name='x'):
+    # Label of each bucket index returned by _get_bucket_indices, given sorted buckets
+    if not buckets:
+        return ['-inf<{}<inf'.format(variable_name)]
+    return (
+        ['{}<{}'.format(variable_name, buckets[0])]
+        + ['{}<={}<{}'.format(left_boundary, variable_name, right_boundary) for left_boundary, right_boundary in zip(buckets[:-1], buckets[1:])]
+        + ['{}<={}'.format(buckets[-1], variable_name)]
+    )
+
+def _get_bucket_indices(numbers, buckets):
+    # 0 for numbers below the first boundary, len(buckets) for numbers at or above the last boundary
+    # and i for numbers in [buckets[i-1], buckets[i]), found by binary search
+    import numpy as np
+    numbers = np.asarray(numbers)
+    if numbers.dtype.kind not in 'biuf':
+        numbers = numbers.astype(float)
     if not buckets:
-        return ['-inf<{}<inf'.format(variable_name)] * len(numbers)
-
-    bucketized_numbers = list()
-    buckets.sort()
-    left_boundary = buckets[0]
-    right_boundary = buckets[-1]
-    for number in numbers:
-        if number < left_boundary:
-            bucketized_numbers.append('{}<{}'.format(variable_name, left_boundary))
-        elif number >= right_boundary:
-            bucketized_numbers.append('{}<={}'.format(right_boundary, variable_name))
+        return np.zeros(len(numbers), dtype=np.intp)
+    return np.searchsorted(np.asarray(buckets, dtype=float), numbers, side='right')
+
+def bucketize(numbers, buckets, variable_name='x', return_indices=False):
+    if not len(numbers) and not return_indices:
+        return []
+
+    buckets = sorted(buckets)
+    bucket_indices = _get_bucket_indices(numbers, buckets)
+    if return_indices:
+        return bucket_indices
+    bucket_labels = _get_bucket_labels(buckets, variable_name)
+    return [bucket_labels[bucket_index] for bucket_index in bucket_indices.tolist()]
+
+_STORAGE_TYPES = {
+    type(None): 'null'
+    , bool: 'boolean'
+    , str: 'string'
+    , int: 'number'
+    , float: 'number'
+    , Decimal: 'number'
+    , Fraction: 'number'
+}
+
+def _get_storage_types_from_value_types(value_types):
+    return sorted(set(_STORAGE_TYPES[value_type] for value_type in value_types if value_type in _STORAGE_TYPES))
+
+_NUMBER_TYPES = frozenset([int, float, Decimal, Fraction])
+_BOOLEAN_STRINGS = frozenset(['t', 'f', 'true', 'false', '0', '1'])
+
+def _convert_strings_to_numbers(strings):
+    # Converts strings with int() where int() accepts them and with float() otherwise, like trying int(string) and
+    # then float(string) one by one, but a whole column at once and without raising an exception per float.
+    # Returns the numbers and None, or None and the index of the first string that is not a number.
+    try:
+        return list(map(int, strings)), None
+    except ValueError:
+        pass
+    try:
+        numbers = list(map(float, strings))
+    except ValueError:
+        for index, string in enumerate(strings):
+            try:
+                float(string)
+            except ValueError:
+                return None, index
+    # Of the strings float() accepts, int() accepts those of whole numbers written without a point or an exponent
+    for index, (string, number) in enumerate(zip(strings, numbers)):
+        if number.is_integer() and '.' not in string and 'e' not in string and 'E' not in string:
+            numbers[index] = int(string)
+    return numbers, None
+
+def _convert_to_numbers(values):
+    # Returns the numbers of values, with None kept as None, and None, or None and the index of the first value
+    # that is not a number. Strings are converted all at once by _convert_strings_to_numbers.
+    string_indices = [index for index, value in enumerate(values) if type(value) is str]
+    string_numbers, first_non_number_index = _convert_strings_to_numbers([values[index] for index in string_indices])
+    if first_non_number_index is not None:
+        first_non_number_index = string_indices[first_non_number_index]
+    elif len(string_indices) == len(values):
+        return string_numbers, None
+    else:
+        first_non_number_index = len(values)
+        numbers = list(values)
+        for index, number in zip(string_indices, string_numbers):
+            numbers[index] = number
+
+    for index in range(first_non_number_index):
+        value = values[index]
+        value_type = type(value)
+        if value_type is str or value is None or value_type in _NUMBER_TYPES:
+            continue
+        elif value_type is bool:
+            number = int(value)
         else:
-            for boundary_index, boundary in enumerate(buckets):
-                if number < buckets[boundary_index+1]:
-                    bucketized_numbers.append('{}<={}<{}'.format(boundary, variable_name, buckets[boundary_index+1]))
-                    break
-    return bucketized_numbers
-
-def _get_storage_types(values):
-    storage_types = set()
-    for value in values:
-        value_type  = type(value)
-        if value is None:
-            storage_types.add('null')
-        elif value_type in [bool]:
-            storage_types.add('boolean')
-        elif value_type in [str]:
-            storage_types.add('string')
-        elif value_type in [int, float, Decimal, Fraction]:
-            storage_types.add('number')
-    return sorted(list(storage_types))
+            try:
+                number = int(value)
+            except ValueError:
+                try:
+                    number = float(value)
+                except ValueError:
+                    return None, index
+        if first_non_number_index == len(values):
+            numbers[index] = number
+    if first_non_number_index < len(values):
+        return None, first_non_number_index
+    return numbers, None
 
 def _all_values_booleans(values):
-    all_values_boolean = True
     for value in values:
         value_type = type(value)
-        if value is None:
-            pass
-        elif value_type in [bool]:
-            pass
-        elif value_type in [str]:
-            if value.lower() in ['t', 'f', 'true', 'false', '0', '1']:
-                pass
+        if value is None or value_type is bool:
+            continue
+        elif value_type is str:
+            if value.lower() not in _BOOLEAN_STRINGS:
+                return False
+        elif value_type in _NUMBER_TYPES:
+            if not (value == 0 or value == 1):
+                return False
+        else:
+            return False
+    return True
+
+def _classify_value_counts(value_counts, check_booleans=True, check_numbers=True, stats=_NO_STATS, variable_name=None):
+    # Classifies the distinct values only, and each check stops as soon as a value does not pass it.
+    # Returns whether all values are booleans, whether all values are numbers and how often each number occurs.
+    all_values_booleans = False
+    if check_booleans:
+        with stats.stage('booleans', variable_name, len(value_counts)):
+            all_values_booleans = _all_values_booleans(value_counts)
+    all_values_numbers = check_numbers
+    number_counts = Counter()
+    if check_numbers:
+        with stats.stage('numbers', variable_name, len(value_counts)):
+            numbers, _ = _convert_to_numbers(list(value_counts))
+            if numbers is None:
+                all_values_numbers = False
             else:
-                all_values_boolean = False
-                break
-        elif value_type in [int, float, Decimal, Fraction]:
-            if value in [0, 1, 0.0, 1.0, Decimal(0), Decimal(1), Fraction(0), Fraction(1)]:
-                pass
+                for number, count in zip(numbers, value_counts.values()):
+                    if number is not None:
+                        number_counts[number] += count
+    return all_values_booleans, all_values_numbers, number_counts
+
+def _get_bucket_probabilities(num_buckets):
+    # Same as numpy.arange(0.0, 1.0+1.0/num_buckets, 1.0/num_buckets), including its number of values
+    step = 1.0/num_buckets
+    return [i*step for i in range(int(math.ceil((1.0+step)/step)))]
+
+class _SortedNumberCounts(object):
+    # Exact order statistics, sorting only the distinct numbers and only once
+    def __init__(self, number_counts):
+        self.sorted_numbers = sorted(number_counts)
+        self.cumulative_counts = list()
+        self.num_values = 0
+        for number in self.sorted_numbers:
+            self.num_values += number_counts[number]
+            self.cumulative_counts.append(self.num_values)
+
+    def get_order_statistic(self, index):
+        return self.sorted_numbers[bisect.bisect_right(self.cumulative_counts, index)]
+
+def _check_quantile_engine(quantile_engine):
+    if quantile_engine not in QUANTILE_ENGINES:
+        raise ValueError('The given quantile engine is not supported: quantile_engine - {}, supported quantile engines - {}'.format(quantile_engine, QUANTILE_ENGINES))
+
+def _get_order_statistics(number_counts, quantile_engine='exact', quantile_error=0.01):
+    _check_quantile_engine(quantile_engine)
+    if quantile_engine == 'exact':
+        return _SortedNumberCounts(number_counts)
+    sketch = KLLSketch(quantile_error)
+    for number, count in number_counts.items():
+        sketch.update([number] * count)
+    return sketch
+
+def _get_quantiles(order_statistics, probabilities):
+    # Same interpolation as scipy.stats.mstats.mquantiles with its default alphap=0.4 and betap=0.4,
+    # computed value by value so that neither scipy nor numpy has to be imported
+    num_values = order_statistics.num_values
+    if num_values == 1:
+        return [order_statistics.get_order_statistic(0)] * len(probabilities)
+    alphap, betap = 0.4, 0.4
+    quantiles = list()
+    for probability in probabilities:
+        m = alphap + probability*(1.-alphap-betap)
+        aleph = (num_values*probability + m)
+        k = int(math.floor(min(max(aleph, 1), num_values-1)))
+        gamma = min(max(aleph-k, 0), 1)
+        lower_value = float(order_statistics.get_order_statistic(k-1))
+        upper_value = float(order_statistics.get_order_statistic(k))
+        quantiles.append((1.-gamma)*lower_value + gamma*upper_value)
+    return quantiles
+
+def _round_bucket(bucket):
+    # Same as numpy.round(bucket, 2), which scales, rounds half to even and scales back
+    if type(bucket) is not float:
+        return round(bucket, 2)
+    scaled_bucket = bucket * 100
+    if not math.isfinite(scaled_bucket):
+        return scaled_bucket / 100
+    return math.copysign(round(scaled_bucket) / 100, bucket)
+
+def _get_median(order_statistics):
+    # Same as statistics.median
+    num_values = order_statistics.num_values
+    upper_median = order_statistics.get_order_statistic(num_values//2)
+    if num_values % 2 == 1:
+        return upper_median
+    return (order_statistics.get_order_statistic(num_values//2-1) + upper_median) / 2
+
+def _get_numeric_metadata(order_statistics, num_buckets, nullable):
+    return {
+        'meaning_type': 'numeric'
+        , 'buckets': [_round_bucket(bucket) for bucket in _get_quantiles(order_statistics, _get_bucket_probabilities(num_buckets))]
+        , 'min': order_statistics.get_order_statistic(0)
+        , 'median': _get_median(order_statistics)
+        , 'max': order_statistics.get_order_statistic(order_statistics.num_values-1)
+        , 'nullable': nullable
+    }
+
+def _is_categorical(num_unique_values, num_values):
+    return num_unique_values <= 10 * max(math.log10(num_values), 1)
+
+def _get_non_numeric_metadata(meaning_type, value_types, unique_values, num_unique_values, nullable, max_num_unique_values):
+    if num_unique_values > max_num_unique_values:
+        unique_values = unique_values[:max_num_unique_values] + ['TRUNCATED']
+    return {
+        'meaning_type': meaning_type
+        , 'storage_types': _get_storage_types_from_value_types(value_types)
+        , 'unique_values': unique_values
+        , 'number_of_unique_values': num_unique_values
+        , 'nullable': nullable
+    }
+
+def _get_metadata_from_value_counts(value_counts, value_types, num_values, num_buckets=10, max_num_unique_values=10, quantile_engine='exact', quantile_error=0.01, number_sketch=None, order_unique_values_by_frequency=False, stats=_NO_STATS, variable_name=None):
+    if not num_values:
+        return {'meaning_type': 'empty'}
+
+    if order_unique_values_by_frequency:
+        unique_values = [value for value, _ in value_counts.most_common()]
+    else:
+        unique_values = list(value_counts)
+    nullable = True if '' in value_counts or None in value_counts else False
+    num_unique_values = len(unique_values)
+
+    categorical = _is_categorical(num_unique_values, num_values)
+    # Whether values are numbers only matters when they are neither binary nor categorical
+    all_values_booleans, all_values_numbers, number_counts = _classify_value_counts(value_counts, check_numbers=not categorical, stats=stats, variable_name=variable_name)
+    if all_values_booleans:
+        meaning_type = 'binary'
+    elif categorical:
+        meaning_type = 'categorical'
+    elif all_values_numbers:
+        with stats.stage('quantiles', variable_name, len(number_counts)):
+            if number_sketch is not None:
+                order_statistics = number_sketch
+            else:
+                order_statistics = _get_order_statistics(number_counts, quantile_engine, quantile_error)
+            return _get_numeric_metadata(order_statistics, num_buckets, nullable)
+    else:
+        meaning_type = 'textual'
+    return _get_non_numeric_metadata(meaning_type, value_types, unique_values, num_unique_values, nullable, max_num_unique_values)
+
+def _check_unique_values_engine(unique_values_engine):
+    if unique_values_engine not in UNIQUE_VALUES_ENGINES:
+        raise ValueError('The given unique values engine is not supported: unique_values_engine - {}, supported unique values engines - {}'.format(unique_values_engine, UNIQUE_VALUES_ENGINES))
+
+class ColumnSummary(object):
+    """
+    Running summary of the values of a column. Summaries of shards of the same column can be merged
+    and finalize returns the same metadata as get_metadata_from_data_dict would for all the values.
+
+    With unique_values_engine='sketch', unique_values are the most frequent values and once more than
+    heavy_hitters_capacity distinct values have been seen, the distinct values are no longer kept: their number
+    is estimated by a HyperLogLog with about unique_values_error relative error and the most frequent ones
+    are tracked by a MisraGries summary, so that memory stays fixed. From then on, numbers also go to a KLLSketch
+    with quantile_error even with quantile_engine='exact', so buckets and median are no longer exact, while min and
+    max still are.
+    """
+
+    def __init__(self, quantile_engine='exact', quantile_error=0.01, unique_values_engine='exact', unique_values_error=0.01, heavy_hitters_capacity=1000):
+        _check_quantile_engine(quantile_engine)
+        _check_unique_values_engine(unique_values_engine)
+        self.quantile_engine = quantile_engine
+        self.quantile_error = quantile_error
+        self.unique_values_engine = unique_values_engine
+        self.heavy_hitters_capacity = heavy_hitters_capacity
+        self.num_values = 0
+        self.value_counts = Counter()
+        self.value_types = set()
+        # With the sketch engine, numbers are fed into a sketch for as long as every value is a number
+        self.number_sketch = KLLSketch(quantile_error) if quantile_engine == 'sketch' else None
+        self.distinct_values = HyperLogLog(unique_values_error) if unique_values_engine == 'sketch' else None
+        self.heavy_hitters = None
+
+    def _start_sketching_unique_values(self):
+        # Replaces the distinct values by the heavy hitters and what the metadata needs to know about all values
+        value_counts = self.value_counts
+        self.value_counts = None
+        self.heavy_hitters = MisraGries(self.heavy_hitters_capacity)
+        self.nullable = False
+        self.all_values_booleans = True
+        self.all_values_numbers = True
+        # The distinct numbers are not kept either, so with the exact engine they go to a sketch from now on
+        self.sketched_numbers = KLLSketch(self.quantile_error) if self.quantile_engine == 'exact' else None
+        self._update_sketched_unique_values(value_counts)
+
+    def _update_sketched_unique_values(self, value_counts):
+        self.heavy_hitters.update(value_counts)
+        self.nullable = self.nullable or '' in value_counts or None in value_counts
+        self.all_values_booleans, self.all_values_numbers, number_counts = _classify_value_counts(
+            value_counts, self.all_values_booleans, self.all_values_numbers
+        )
+        if self.sketched_numbers is not None:
+            if self.all_values_numbers:
+                for number, count in number_counts.items():
+                    self.sketched_numbers.update([number] * count)
             else:
-                all_values_boolean = False
-                break
+                self.sketched_numbers = None
+
+    def _update_value_counts(self, value_counts):
+        if self.value_counts is None:
+            self._update_sketched_unique_values(value_counts)
         else:
-            all_values_boolean = False
-            break
-    return all_values_boolean
+            self.value_counts.update(value_counts)
+            if self.unique_values_engine == 'sketch' and len(self.value_counts) > self.heavy_hitters_capacity:
+                self._start_sketching_unique_values()
 
-def _all_values_numbers(values):
-    all_values_numbers = True
-    values_as_numbers = list()
-    for value in values:
-        value_type = type(value)
-        if value is None:
-            pass
-        elif value_type in [bool, int, float, Decimal, Fraction]:
-            if value_type == bool:
-                values_as_numbers.append(int(value))
+    def update(self, values):
+        value_counts = Counter(values)
+        self.num_values += len(values)
+        self.value_types.update(map(type, values))
+        if self.number_sketch is not None:
+            _, all_values_numbers, number_counts = _classify_value_counts(value_counts, check_booleans=False)
+            if all_values_numbers:
+                for number, count in number_counts.items():
+                    self.number_sketch.update([number] * count)
+            else:
+                self.number_sketch = None
+        if self.distinct_values is not None:
+            self.distinct_values.update(value_counts)
+        self._update_value_counts(value_counts)
+        return self
+
+    def merge(self, other):
+        if other.quantile_engine != self.quantile_engine:
+            raise ValueError('Only summaries with the same quantile engine can be merged: quantile engine - {}, quantile engine of the other summary - {}'.format(self.quantile_engine, other.quantile_engine))
+        if other.unique_values_engine != self.unique_values_engine:
+            raise ValueError('Only summaries with the same unique values engine can be merged: unique values engine - {}, unique values engine of the other summary - {}'.format(self.unique_values_engine, other.unique_values_engine))
+        self.num_values += other.num_values
+        self.value_types.update(other.value_types)
+        if self.number_sketch is not None:
+            if other.number_sketch is not None:
+                self.number_sketch.merge(other.number_sketch)
             else:
-                values_as_numbers.append(value)
+                self.number_sketch = None
+        if self.distinct_values is not None:
+            self.distinct_values.merge(other.distinct_values)
+        if other.value_counts is not None:
+            self._update_value_counts(other.value_counts)
         else:
-            try:
-                value_as_number = int(value)
-            except ValueError:
-                try:
-                    value_as_number = float(value)
-                except ValueError:
-                    all_values_numbers = False
-                    break
+            if self.value_counts is not None:
+                self._start_sketching_unique_values()
+            self.heavy_hitters.merge(other.heavy_hitters)
+            self.nullable = self.nullable or other.nullable
+            self.all_values_booleans = self.all_values_booleans and other.all_values_booleans
+            self.all_values_numbers = self.all_values_numbers and other.all_values_numbers
+            if self.sketched_numbers is not None:
+                if other.sketched_numbers is not None:
+                    self.sketched_numbers.merge(other.sketched_numbers)
                 else:
-                    values_as_numbers.append(value_as_number)
-            else:
-                values_as_numbers.append(value_as_number)
-    return all_values_numbers, values_as_numbers
+                    self.sketched_numbers = None
+        return self
+
+    def finalize(self, num_buckets=10, max_num_unique_values=10):
+        if self.value_counts is not None:
+            return _get_metadata_from_value_counts(
+                self.value_counts, self.value_types, self.num_values, num_buckets, max_num_unique_values
+                , self.quantile_engine, self.quantile_error, self.number_sketch
+                , order_unique_values_by_frequency=self.unique_values_engine == 'sketch'
+            )
+
+        # More distinct values than the heavy hitters capacity have been seen
+        num_unique_values = max(int(round(self.distinct_values.estimate())), self.heavy_hitters_capacity + 1)
+        unique_values = [value for value, _ in self.heavy_hitters.most_common(max_num_unique_values)]
+        if self.all_values_booleans:
+            meaning_type = 'binary'
+        elif _is_categorical(num_unique_values, self.num_values):
+            meaning_type = 'categorical'
+        elif self.all_values_numbers:
+            order_statistics = self.number_sketch if self.number_sketch is not None else self.sketched_numbers
+            return _get_numeric_metadata(order_statistics, num_buckets, self.nullable)
+        else:
+            meaning_type = 'textual'
+        return _get_non_numeric_metadata(meaning_type, self.value_types, unique_values, num_unique_values, self.nullable, max_num_unique_values)
+
+_SUMMARY_CHUNK_SIZE = 100000
+
+_NUMERIC_DTYPE_KINDS = frozenset(['b', 'i', 'u', 'f'])
+
+def _get_numeric_array(values):
+    # Returns values as a 1-d NumPy array when they are a NumPy array or pandas Series of booleans or numbers
+    if isinstance(values, list) or getattr(getattr(values, 'dtype', None), 'kind', None) not in _NUMERIC_DTYPE_KINDS:
+        return None
+    import numpy as np
+    array = values.to_numpy() if hasattr(values, 'to_numpy') else np.asarray(values)
+    if array.ndim != 1 or array.dtype.kind not in _NUMERIC_DTYPE_KINDS:
+        return None
+    return array
+
+class _SortedUniqueNumbers(object):
+    # Exact order statistics of an array from its sorted distinct numbers and how often each occurs
+    def __init__(self, unique_numbers, counts):
+        self.unique_numbers = unique_numbers
+        self.cumulative_counts = counts.cumsum()
+        self.num_values = int(self.cumulative_counts[-1])
+
+    def get_order_statistic(self, index):
+        return self.unique_numbers[int(self.cumulative_counts.searchsorted(index, side='right'))].item()
+
+_ARRAY_VALUE_TYPES = {'b': bool, 'i': int, 'u': int, 'f': float}
+
+def _get_metadata_from_array(array, num_buckets=10, max_num_unique_values=10, quantile_engine='exact', quantile_error=0.01, unique_values_engine='exact', stored_kind=None):
+    # Same metadata as for array.tolist() with NaN as None, read from the dtype and np.unique instead of value by value.
+    # stored_kind is the kind of a StoredColumn whose array holds numbers that were strings.
+    import numpy as np
+    num_values = len(array)
+    if not num_values:
+        return {'meaning_type': 'empty'}
+
+    # Numbers that were strings have no missing values, as an empty string takes a mask instead
+    null_mask = np.isnan(array) if array.dtype.kind == 'f' and stored_kind is None else None
+    num_nulls = int(np.count_nonzero(null_mask)) if null_mask is not None else 0
+    numbers = array[~null_mask] if num_nulls else array
+    unique_numbers, first_indices, counts = np.unique(numbers, return_index=True, return_counts=True)
+    nullable = num_nulls > 0
+    num_unique_values = len(unique_numbers) + (1 if nullable else 0)
+
+    if stored_kind is not None:
+        # Of strings of numbers, only '0' and '1' are booleans
+        all_values_booleans = stored_kind == 'integer' and bool(np.isin(unique_numbers, [0, 1]).all())
+    else:
+        all_values_booleans = array.dtype.kind == 'b' or bool(np.isin(unique_numbers, [0, 1]).all())
+    if all_values_booleans:
+        meaning_type = 'binary'
+    elif _is_categorical(num_unique_values, num_values):
+        meaning_type = 'categorical'
+    else:
+        if quantile_engine == 'exact':
+            order_statistics = _SortedUniqueNumbers(unique_numbers, counts)
+        else:
+            # Numbers are fed to the sketch in order of first occurrence, like they are for lists
+            order = first_indices.argsort()
+            number_counts = Counter(dict(zip(unique_numbers[order].tolist(), counts[order].tolist())))
+            order_statistics = _get_order_statistics(number_counts, quantile_engine, quantile_error)
+        return _get_numeric_metadata(order_statistics, num_buckets, nullable)
+
+    if num_nulls:
+        first_indices = np.flatnonzero(~null_mask)[first_indices]
+    order = first_indices.argsort()
+    unique_values = unique_numbers[order].tolist()
+    if stored_kind is not None:
+        unique_values = list(map(str if stored_kind == 'integer' else repr, unique_values))
+        value_types = {str}
+    else:
+        # An array of NaN only holds no numbers, like a list of None
+        value_types = {_ARRAY_VALUE_TYPES[array.dtype.kind]} if len(unique_numbers) else set()
+    unique_counts = counts[order].tolist()
+    if nullable:
+        # None takes the place of the first NaN among the values in order of first occurrence
+        null_position = int(np.count_nonzero(first_indices < null_mask.argmax()))
+        unique_values.insert(null_position, None)
+        unique_counts.insert(null_position, num_nulls)
+        value_types.add(type(None))
+    if unique_values_engine == 'sketch':
+        unique_values = [value for value, _ in Counter(dict(zip(unique_values, unique_counts))).most_common()]
+    return _get_non_numeric_metadata(meaning_type, value_types, unique_values, num_unique_values, nullable, max_num_unique_values)
+
+def _has_only_finite_numbers(column):
+    # Columnar files saved before nan and inf were kept as strings can hold them as floats, which only the value by
+    # value path reads like the strings they were
+    import numpy as np
+    return column.kind == 'integer' or bool(np.isfinite(column.values).all())
+
+def _get_column_metadata(values, num_buckets=10, max_num_unique_values=10, quantile_engine='exact', quantile_error=0.01, unique_values_engine='exact', unique_values_error=0.01, heavy_hitters_capacity=1000, stats=_NO_STATS, variable_name=None):
+    numeric_array = _get_numeric_array(values)
+    if numeric_array is not None:
+        with stats.stage('array', variable_name, len(numeric_array)):
+            return _get_metadata_from_array(numeric_array, num_buckets, max_num_unique_values, quantile_engine, quantile_error, unique_values_engine)
+    if isinstance(values, StoredColumn) and values.kind != 'string' and values.mask is None and _has_only_finite_numbers(values):
+        with stats.stage('array', variable_name, len(values)):
+            return _get_metadata_from_array(values.values, num_buckets, max_num_unique_values, quantile_engine, quantile_error, unique_values_engine, values.kind)
+
+    if unique_values_engine == 'sketch':
+        # Counting distinct values a chunk at a time keeps memory fixed for high cardinality columns
+        with stats.stage('summary', variable_name, len(values)):
+            column_summary = ColumnSummary(quantile_engine, quantile_error, unique_values_engine, unique_values_error, heavy_hitters_capacity)
+            for start in range(0, len(values), _SUMMARY_CHUNK_SIZE):
+                column_summary.update(values[start:start+_SUMMARY_CHUNK_SIZE])
+            return column_summary.finalize(num_buckets, max_num_unique_values)
+
+    if isinstance(values, StoredColumn):
+        # Counted from the stored arrays, without a string per value
+        with stats.stage('unique_values', variable_name, len(values)):
+            value_counts, value_types = values.value_counts(), {str} if len(values) else set()
+    else:
+        # One pass to count the distinct values and one to collect the value types, after which
+        # every check only looks at the distinct values
+        with stats.stage('unique_values', variable_name, len(values)):
+            value_counts = Counter(values)
+        with stats.stage('storage_types', variable_name, len(values)):
+            value_types = set(map(type, values))
+    return _get_metadata_from_value_counts(
+        value_counts, value_types, len(values), num_buckets, max_num_unique_values, quantile_engine, quantile_error
+        , stats=stats, variable_name=variable_name
+    )
 
-def get_metadata_from_data_dict(data_dict, num_buckets=10, max_num_unique_values=10):
+def _get_column_metadata_in_worker(shared_object, key_or_values):
+    # Workers that share memory look their column up in data_dict; others are sent the values of the column.
+    # With stats_options, the records of the stages are returned along with the metadata.
+    data_dict, options, stats_options = shared_object
+    values = data_dict[key_or_values] if data_dict is not None else key_or_values
+    if stats_options is None:
+        return _get_column_metadata(values, **options)
+    stats = StageStats(**stats_options)
+    with stats.stage('metadata', rows=len(values)):
+        column_metadata = _get_column_metadata(values, stats=stats, **options)
+    return column_metadata, stats.records
+
+def get_metadata_from_data_dict(data_dict, num_buckets=10, max_num_unique_values=10, quantile_engine='exact', quantile_error=0.01, workers=None, unique_values_engine='exact', unique_values_error=0.01, heavy_hitters_capacity=1000, stats=None):
     """
     if all values can be expressed as 0 or 1
         return binary
@@ -145,121 +772,160 @@ def get_metadata_from_data_dict(data_dict, num_buckets=10, max_num_unique_values
     information to return across all types: meaning_type, storage_types, nullable
     information to return when binary, categorical and textual: unique_values
     information to return when numeric: buckets, min, median and max
+
+    quantile_engine is 'exact' to sort the numbers once, or 'sketch' to read buckets, min, median and max
+    from a KLLSketch whose order statistics are off by about quantile_error * number of rows positions
+
+    with workers > 1, columns are profiled in that many processes, which read data_dict without it being pickled
+    where processes can be forked and are sent one column at a time otherwise
+
+    unique_values_engine is 'exact' to keep every distinct value, or 'sketch' to keep at most heavy_hitters_capacity
+    of them: unique_values are then the most frequent values and, past that many distinct values,
+    number_of_unique_values is estimated with about unique_values_error relative error
+
+    columns that are NumPy arrays or pandas Series of booleans or numbers are profiled from their dtype and np.unique,
+    with NaN counted as None
+
+    with stats, a StageStats, the stages of every column are recorded
     """
 
-    metadata = dict()
-    for key in data_dict.keys():
-        values = data_dict[key]
-        if not values:
-            metadata[key] = {'meaning_type': 'empty'}
+    _check_quantile_engine(quantile_engine)
+    _check_unique_values_engine(unique_values_engine)
+    options = {
+        'num_buckets': num_buckets
+        , 'max_num_unique_values': max_num_unique_values
+        , 'quantile_engine': quantile_engine
+        , 'quantile_error': quantile_error
+        , 'unique_values_engine': unique_values_engine
+        , 'unique_values_error': unique_values_error
+        , 'heavy_hitters_capacity': heavy_hitters_capacity
+    }
+    keys = list(data_dict.keys())
+    if workers is not None and workers > 1 and len(keys) > 1:
+        stats_options = None if stats is None else {'trace_memory': stats.trace_memory}
+        if SHARES_MEMORY_WITH_WORKERS:
+            items, shared_object = keys, (data_dict, options, stats_options)
         else:
-            unique_values = list(set(values))
-            nullable = True if '' in unique_values or None in unique_values else False
-            num_values = len(values)
-            num_unique_values = len(unique_values)
-            if num_unique_values > max_num_unique_values:
-                unique_values = unique_values[:max_num_unique_values] + ['TRUNCATED']
-            storage_types = _get_storage_types(values)
-
-            if _all_values_booleans(values):
-                metadata[key] = {
-                    'meaning_type': 'binary'
-                    , 'storage_types': storage_types
-                    , 'unique_values': unique_values
-                    , 'number_of_unique_values': num_unique_values
-                    , 'nullable': nullable
-                }
-            else:
-                if num_unique_values <= 10 * max(math.log10(num_values), 1):
-                    metadata[key] = {
-                        'meaning_type': 'categorical'
-                        , 'storage_types': storage_types
-                        , 'unique_values': unique_values
-                        , 'number_of_unique_values': num_unique_values
-                        , 'nullable': nullable
-                    }
-                else:
-                    all_values_numbers, values_as_numbers = _all_values_numbers(values)
-                    if all_values_numbers:
-                        metadata[key] = {
-                            'meaning_type': 'numeric'
-                            , 'buckets': np.round(stats.mstats.mquantiles(values_as_numbers, np.arange(0.0, 1.0+1.0/num_buckets, 1.0/num_buckets)), 2).tolist()
-                            , 'min': min(values_as_numbers)
-                            , 'median': statistics.median(values_as_numbers)
-                            , 'max': max(values_as_numbers)
-                            , 'nullable': nullable
-                        }
-                    else:
-                        metadata[key] = {
-                            'meaning_type': 'textual'
-                            , 'storage_types': storage_types
-                            , 'unique_values': unique_values
-                            , 'number_of_unique_values': num_unique_values
-                            , 'nullable': nullable
-                        }
+            items, shared_object = [data_dict[key] for key in keys], (None, options, stats_options)
+        column_metadata = map_in_processes(
+            _get_column_metadata_in_worker, items, shared_object
+            , workers=workers, chunksize=max(1, len(keys) // (workers * 4))
+        )
+        if stats is None:
+            return dict(zip(keys, column_metadata))
+        metadata = dict()
+        for key, (metadata[key], records) in zip(keys, column_metadata):
+            for record in records:
+                stats.add(dict(record, name=key))
+        return metadata
+
+    if stats is None:
+        return {key: _get_column_metadata(data_dict[key], **options) for key in keys}
+    metadata = dict()
+    for key in keys:
+        with stats.stage('metadata', key, len(data_dict[key])):
+            metadata[key] = _get_column_metadata(data_dict[key], stats=stats, variable_name=key, **options)
     return metadata
-            
-def get_metadata_from_file(file_path, separator=',', num_buckets=10):
-    return get_metadata_from_data_dict(parse_file_to_data_dict(file_path, separator), num_buckets)
-
-def process_data_dict_by_metadata(data_dict, metadata):
-    processed_data_dict = dict()
-    for key in data_dict.keys():
-        processed_data_dict[key] = list()
-        if metadata[key]['meaning_type'] in ['categorical', 'textual']:
-            for value in data_dict[key]:
-                if isinstance(value, str):
-                    processed_data_dict[key].append('\"{}\"'.format(value))
-                else:
-                    processed_data_dict[key].append(value)
-        elif metadata[key]['meaning_type'] == 'binary':
-            for value in data_dict[key]:
-                if isinstance(value, bool):
-                    processed_data_dict[key].append(value)
-                elif type(value) in [int, float, Decimal, Fraction]:
-                    if value == 0:
-                        processed_data_dict[key].append(False)
-                    else:
-                        processed_data_dict[key].append(True)
-                else:
-                    try:
-                        lowered_value = value.lower()
-                    except AttributeError:
-                        if value:
-                            processed_data_dict[key].append(True)
-                        else:
-                            processed_data_dict[key].append(False)
-                    else:
-                        if lowered_value in ['f', 'false', '0']:
-                            processed_data_dict[key].append(False)
-                        else:
-                            processed_data_dict[key].append(True)
-        elif metadata[key]['meaning_type'] == 'numeric':
-            for value in data_dict[key]:
-                if not value:
-                    processed_data_dict[key].append(value)
-                else:
-                    if not type(value) in [int, float, Decimal, Fraction]:
-                            try:
-                                number = int(value)
-                            except ValueError:
-                                try:
-                                    number = float(value)
-                                except ValueError:
-                                    raise ValueError('Metadata says a variable is a number but some values of it are not numbers: variable name - {}, value - {}'.format(key, value))
-                    else:
-                        number = value
-
-                    if metadata[key]['buckets']:
-                        if number < metadata[key]['buckets'][0]:
-                            processed_data_dict[key].append('{}<{}'.format(key, metadata[key]['buckets'][0]))
-                        elif number >= metadata[key]['buckets'][-1]:
-                            processed_data_dict[key].append('{}<={}'.format(metadata[key]['buckets'][-1], key))
-                        else:
-                            for boundary_index, boundary in enumerate(metadata[key]['buckets']):
-                                if number >= boundary and number < metadata[key]['buckets'][boundary_index+1]:
-                                    processed_data_dict[key].append('{}<={}<{}'.format(boundary, key, metadata[key]['buckets'][boundary_index+1]))
-                                    break
-                    else:
-                        processed_data_dict[key].append('-inf<{}<inf'.format(key))
-        return processed_data_dict
\ No newline at end of file
+
+def get_summaries_from_data_dict(data_dict, quantile_engine='exact', quantile_error=0.01, unique_values_engine='exact', unique_values_error=0.01, heavy_hitters_capacity=1000):
+    return {
+        key: ColumnSummary(quantile_engine, quantile_error, unique_values_engine, unique_values_error, heavy_hitters_capacity).update(values)
+        for key, values in data_dict.items()
+    }
+
+def _summarize_file_in_chunks(file_path, separator, chunk_size, unwrap_double_quotes, summary_options):
+    column_summaries = dict()
+    for data_dict in _iter_data_dict_chunks(file_path, separator, chunk_size, unwrap_double_quotes):
+        for key, values in data_dict.items():
+            if key not in column_summaries:
+                column_summaries[key] = ColumnSummary(**summary_options)
+            column_summaries[key].update(values)
+    return column_summaries
+
+def get_summaries_from_file(file_path, separator=',', chunk_size=10000, quantile_engine='exact', quantile_error=0.01, unique_values_engine='exact', unique_values_error=0.01, heavy_hitters_capacity=1000):
+    # Reads chunk_size rows at a time and only keeps per-column summaries in memory
+    summary_options = {
+        'quantile_engine': quantile_engine
+        , 'quantile_error': quantile_error
+        , 'unique_values_engine': unique_values_engine
+        , 'unique_values_error': unique_values_error
+        , 'heavy_hitters_capacity': heavy_hitters_capacity
+    }
+    try:
+        return _summarize_file_in_chunks(file_path, separator, chunk_size, True, summary_options)
+    except _DoubleQuoteWrappingBroken:
+        return _summarize_file_in_chunks(file_path, separator, chunk_size, False, summary_options)
+
+def merge_summaries(summaries, other_summaries):
+    # Merges other_summaries into summaries, column by column
+    for key, column_summary in other_summaries.items():
+        if key in summaries:
+            summaries[key].merge(column_summary)
+        else:
+            summaries[key] = column_summary
+    return summaries
+
+def get_metadata_from_summaries(summaries, num_buckets=10, max_num_unique_values=10):
+    return {key: column_summary.finalize(num_buckets, max_num_unique_values) for key, column_summary in summaries.items()}
+
+def get_metadata_from_file(file_path, separator=',', num_buckets=10, max_num_unique_values=10, chunk_size=None, quantile_engine='exact', quantile_error=0.01, workers=None, unique_values_engine='exact', unique_values_error=0.01, heavy_hitters_capacity=1000, cache=None, stats=None):
+    # With stats, a StageStats, the stages of parsing and profiling are recorded.
+    # With chunk_size, chunks are summarized one after another in this process, so workers and stats cannot be given.
+    if chunk_size is not None and ((workers is not None and workers > 1) or stats is not None):
+        raise ValueError('Only files read as a whole can be profiled with workers or stats: chunk_size - {}, workers - {}, stats - {}'.format(chunk_size, workers, stats))
+    if cache is not None:
+        # workers and stats do not change the metadata, so they are not part of the cache key
+        options = {
+            'separator': separator
+            , 'num_buckets': num_buckets
+            , 'max_num_unique_values': max_num_unique_values
+            , 'chunk_size': chunk_size
+            , 'quantile_engine': quantile_engine
+            , 'quantile_error': quantile_error
+            , 'unique_values_engine': unique_values_engine
+            , 'unique_values_error': unique_values_error
+            , 'heavy_hitters_capacity': heavy_hitters_capacity
+        }
+        return cache.get_or_compute(file_path, options, lambda: get_metadata_from_file(
+            file_path, separator, num_buckets, max_num_unique_values, chunk_size, quantile_engine, quantile_error
+            , workers, unique_values_engine, unique_values_error, heavy_hitters_capacity, stats=stats
+        ))
+
+    if chunk_size is None:
+        return get_metadata_from_data_dict(
+            parse_file_to_data_dict(file_path, separator, workers=workers, stats=stats), num_buckets, max_num_unique_values
+            , quantile_engine=quantile_engine, quantile_error=quantile_error, workers=workers
+            , unique_values_engine=unique_values_engine, unique_values_error=unique_values_error
+            , heavy_hitters_capacity=heavy_hitters_capacity, stats=stats
+        )
+
+    return get_metadata_from_summaries(
+        get_summaries_from_file(
+            file_path, separator, chunk_size, quantile_engine, quantile_error
+            , unique_values_engine, unique_values_error, heavy_hitters_capacity
+        )
+        , num_buckets, max_num_unique_values
+    )
+
+PROCESS_OUTPUTS = ('values', 'codes')
+
+def process_data_dict_by_metadata(data_dict, metadata, output='values', workers=None, chunk_size=None, stats=None):
+    # With output='codes', returns {variable name: {'codes': ..., 'vocabulary': [...]}} as MetadataTransformer.encode_batch.
+    # With workers > 1, chunks of chunk_size rows are encoded in that many processes, which write codes to shared memory.
+    # With stats, a StageStats, the transform or encode stage of every variable is recorded, or of all of them with workers.
+    if output not in PROCESS_OUTPUTS:
+        raise ValueError('The given output is not supported: output - {}, supported outputs - {}'.format(output, PROCESS_OUTPUTS))
+    # Imported here because the transformer builds on the bucket helpers of this module
+    from .transformer import MetadataTransformer, _decode, _encode_in_row_chunks
+    if workers is not None and workers > 1:
+        stage = 'encode' if output == 'codes' else 'transform'
+        with (_NO_STATS if stats is None else stats).stage(stage, rows=len(next(iter(data_dict.values()), ()))):
+            encoded_data_dict = _encode_in_row_chunks(data_dict, metadata, workers, chunk_size)
+            if output == 'codes':
+                return encoded_data_dict
+            return {key: _decode(encoded['codes'], encoded['vocabulary']) for key, encoded in encoded_data_dict.items()}
+
+    transformer = MetadataTransformer(metadata)
+    if output == 'codes':
+        return transformer.encode_batch(data_dict, stats)
+    return transformer.transform_batch(data_dict, stats)
@@ -0,0 +1,93 @@
+import contextlib
+import itertools
+import multiprocessing
+import os
+import sys
+import threading
+
+# Objects shared with worker processes, keyed by a token per pool of worker processes.
+# Workers started with fork inherit them without pickling; otherwise they are pickled once per worker.
+_shared = dict()
+_shared_lock = threading.Lock()
+_tokens = itertools.count()
+
+def _forks_by_default():
+    # Fork is only used where it is the start method anyway: on Linux before Python 3.14 made it forkserver, or when
+    # it was set. Elsewhere, such as on macOS, forking a process with threads running can deadlock.
+    start_method = multiprocessing.get_start_method(allow_none=True)
+    if start_method is None:
+        return sys.platform.startswith('linux') and sys.version_info < (3, 14)
+    return start_method == 'fork'
+
+# Whether worker processes can read objects of the calling process without them being pickled
+SHARES_MEMORY_WITH_WORKERS = _forks_by_default()
+
+def _initialize_worker(token, function, shared_object):
+    _shared[token] = (function, shared_object)
+
+def _call_in_worker(token_and_item):
+    token, item = token_and_item
+    function, shared_object = _shared[token]
+    return function(shared_object, item)
+
+@contextlib.contextmanager
+def _start_executor(function, shared_object, workers, wait=True):
+    # Yields a ProcessPoolExecutor whose workers run function with shared_object, and the token to pass them.
+    # With wait=False, exiting cancels the calls not started yet and returns without waiting for the running ones.
+    # Imported here so that importing metamon stays fast for processes that never start workers.
+    from concurrent.futures import ProcessPoolExecutor
+    with _shared_lock:
+        token = next(_tokens)
+    if SHARES_MEMORY_WITH_WORKERS:
+        _shared[token] = (function, shared_object)
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork'))
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_initialize_worker, initargs=(token, function, shared_object))
+    try:
+        yield executor, token
+    finally:
+        executor.shutdown(wait=wait, cancel_futures=not wait)
+        _shared.pop(token, None)
+
+def map_in_processes(function, items, shared_object=None, workers=None, chunksize=1):
+    """
+    Returns [function(shared_object, item) for item in items], computed in a pool of worker processes.
+    function must be defined at module level so that it can be pickled.
+    """
+    items = list(items)
+    with _start_executor(function, shared_object, workers) as (executor, token):
+        return list(executor.map(_call_in_worker, [(token, item) for item in items], chunksize=chunksize))
+
+@contextlib.contextmanager
+def worker_pool(function, shared_object=None, workers=None, wait=True):
+    """
+    Starts a pool of worker processes and yields submit, where submit(item) returns a concurrent.futures.Future
+    of function(shared_object, item). function must be defined at module level so that it can be pickled.
+    On exit, the pool waits for the submitted calls to finish, or with wait=False cancels those not started yet
+    and returns right away while the running ones finish in the background.
+    """
+    with _start_executor(function, shared_object, workers, wait) as (executor, token):
+        yield lambda item: executor.submit(_call_in_worker, (token, item))
+
+def imap_unordered_in_processes(function, items, shared_object=None, workers=None, max_pending=None):
+    """
+    Yields (item, function(shared_object, item)) for items in the order they finish in a pool of worker processes.
+    At most max_pending items, twice the number of workers by default, are handed to the pool at a time.
+    """
+    from concurrent.futures import FIRST_COMPLETED, wait
+    items = iter(items)
+    max_pending = max_pending or 2 * (workers or os.cpu_count() or 1)
+    with worker_pool(function, shared_object, workers) as submit:
+        pending = {submit(item): item for item in itertools.islice(items, max_pending)}
+        try:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    item = pending.pop(future)
+                    for next_item in itertools.islice(items, 1):
+                        pending[submit(next_item)] = next_item
+                    yield item, future.result()
+        finally:
+            # Items not started yet are dropped when the caller stops early
+            for future in pending:
+                future.cancel()
@@ -0,0 +1,219 @@
+import itertools
+import locale
+import math
+import os
+import random
+from collections import Counter
+from .compression import get_compression, open_text_file
+from .functions import (
+    _DoubleQuoteWrappingBroken, _iter_data_dict_chunks, _iter_data_dict_chunks_from_lines
+    , _classify_value_counts, _get_metadata_from_value_counts, _get_non_numeric_metadata, _is_categorical
+    , get_summaries_from_data_dict, get_metadata_from_summaries, merge_summaries
+)
+
+SAMPLING_METHODS = ('reservoir', 'seek')
+# A column with more unique values than 10 * log10(2 ** 63) cannot be categorical, whatever the number of rows
+_MAX_KEPT_UNIQUE_VALUES = int(10 * math.log10(2 ** 63))
+# Confidence of the error reported for sampled metadata
+_ERROR_CONFIDENCE = 0.95
+
+def _check_sampling_method(method):
+    if method not in SAMPLING_METHODS:
+        raise ValueError('The given sampling method is not supported: method - {}, supported sampling methods - {}'.format(method, SAMPLING_METHODS))
+
+def _random_unit(rand):
+    # Uniform in (0, 1], so that its logarithm is defined
+    return 1.0 - rand.random()
+
+def _reservoir_sample(lines, sample_size, rand):
+    # Algorithm L: draws how many lines to skip until the next one that replaces a sampled line, instead of a random
+    # number per line. Returns the sampled lines in the order they were read and the number of lines read.
+    lines = iter(lines)
+    reservoir = list(enumerate(itertools.islice(lines, sample_size)))
+    number_of_lines = len(reservoir)
+    if number_of_lines < sample_size:
+        return [line for _, line in reservoir], number_of_lines
+    weight = math.exp(math.log(_random_unit(rand)) / sample_size)
+    while True:
+        skip = int(math.log(_random_unit(rand)) / math.log(1.0 - weight)) if weight < 1.0 else 0
+        number_of_lines += sum(1 for _ in itertools.islice(lines, skip))
+        line = next(lines, None)
+        if line is None:
+            break
+        reservoir[rand.randrange(sample_size)] = (number_of_lines, line)
+        number_of_lines += 1
+        weight *= math.exp(math.log(_random_unit(rand)) / sample_size)
+    return [line for _, line in sorted(reservoir)], number_of_lines
+
+def _seek_sample(file, sample_size, rand):
+    # Reads the line after each of sample_size random byte offsets, so that only those lines are read.
+    # Returns the sampled lines in the order of the file and the number of lines estimated from their mean length.
+    start = file.tell()
+    end = os.fstat(file.fileno()).st_size
+    if start >= end:
+        return [], 0
+    lines = list()
+    for offset in sorted(rand.randrange(start, end) for _ in range(sample_size)):
+        # Seeking one byte back reads the line that starts at offset when offset is the start of a line
+        file.seek(offset - 1)
+        file.readline()
+        line = file.readline()
+        if line:
+            lines.append(line)
+    if not lines:
+        return [], 0
+    mean_line_length = sum(map(len, lines)) / len(lines)
+    return lines, max(len(lines), int(round((end - start) / mean_line_length)))
+
+def sample_file_to_data_dict(file_path, sample_size=10000, separator=',', method='reservoir', seed=None):
+    """
+    Returns a data dict of at most sample_size rows of file_path, like parse_file_to_data_dict does for all rows,
+    and the number of rows of the file.
+
+    method is 'reservoir' to sample rows uniformly in one pass over the file, or 'seek' to read only the row after
+    each of sample_size random byte offsets, in which case longer rows are more likely to follow a sampled offset,
+    a row can be sampled more than once and the number of rows is estimated from the mean length of the sampled rows.
+    Compressed files cannot be read from random offsets, so they are always sampled with 'reservoir'.
+    """
+    _check_sampling_method(method)
+    if sample_size < 1:
+        raise ValueError('The given sample size is not supported: sample_size - {}, supported sample sizes - 1 or more'.format(sample_size))
+    rand = random.Random(seed)
+    try:
+        if method == 'reservoir' or get_compression(file_path) is not None:
+            with open_text_file(file_path) as file:
+                header = file.readline()
+                lines, number_of_rows = _reservoir_sample(file, sample_size, rand)
+        else:
+            encoding = locale.getpreferredencoding(False)
+            with open(file_path, 'rb') as file:
+                header = file.readline().decode(encoding)
+                lines, number_of_rows = _seek_sample(file, sample_size, rand)
+            lines = [line.decode(encoding, 'replace') for line in lines]
+    except FileNotFoundError:
+        raise ValueError('The given file path does not exist: file_path - {}'.format(file_path))
+    # All sampled rows make one chunk, so values are unwrapped from double quotes when all sampled values are wrapped
+    data_dict = next(_iter_data_dict_chunks_from_lines(itertools.chain([header], lines), separator, max(len(lines), 1)), dict())
+    return data_dict, number_of_rows
+
+def _get_sample_error(sample_size, number_of_rows):
+    # Dvoretzky-Kiefer-Wolfowitz bound: with _ERROR_CONFIDENCE, the share of sampled rows at or below any value is
+    # off from that of all rows by at most this much
+    if sample_size >= number_of_rows:
+        return 0.0
+    return math.sqrt(math.log(2.0 / (1.0 - _ERROR_CONFIDENCE)) / (2.0 * sample_size))
+
+class _TypeCheck(object):
+    # Whether all values of a column are booleans or numbers and whether they have few enough unique values to be
+    # categorical, keeping at most max_kept_unique_values of them
+    def __init__(self, max_kept_unique_values):
+        self.max_kept_unique_values = max_kept_unique_values
+        self.num_values = 0
+        self.unique_values = dict()
+        self.all_values_booleans = True
+        self.all_values_numbers = True
+        self.nullable = False
+
+    def update(self, values):
+        self.num_values += len(values)
+        value_counts = Counter(values)
+        self.nullable = self.nullable or '' in value_counts or None in value_counts
+        all_values_booleans, all_values_numbers, _ = _classify_value_counts(value_counts, self.all_values_booleans, self.all_values_numbers)
+        self.all_values_booleans = self.all_values_booleans and all_values_booleans
+        self.all_values_numbers = self.all_values_numbers and all_values_numbers
+        if self.unique_values is not None:
+            self.unique_values.update(dict.fromkeys(value_counts))
+            if len(self.unique_values) > self.max_kept_unique_values:
+                self.unique_values = None
+
+    def get_meaning_type(self):
+        # Decided in the same order as _get_metadata_from_value_counts
+        if not self.num_values:
+            return 'empty'
+        if self.all_values_booleans:
+            return 'binary'
+        if self.unique_values is not None and _is_categorical(len(self.unique_values), self.num_values):
+            return 'categorical'
+        if self.all_values_numbers:
+            return 'numeric'
+        return 'textual'
+
+def _check_types_in_file(file_path, separator, chunk_size, unwrap_double_quotes):
+    type_checks = dict()
+    for data_dict in _iter_data_dict_chunks(file_path, separator, chunk_size, unwrap_double_quotes):
+        for key, values in data_dict.items():
+            if key not in type_checks:
+                type_checks[key] = _TypeCheck(_MAX_KEPT_UNIQUE_VALUES)
+            type_checks[key].update(values)
+    return type_checks
+
+def _profile_columns_in_file(file_path, separator, chunk_size, unwrap_double_quotes, keys):
+    summaries = dict()
+    for data_dict in _iter_data_dict_chunks(file_path, separator, chunk_size, unwrap_double_quotes):
+        merge_summaries(summaries, get_summaries_from_data_dict({key: data_dict[key] for key in keys}))
+    return summaries
+
+def _confirm_metadata(metadata, file_path, separator, num_buckets, max_num_unique_values, chunk_size):
+    unwrap_double_quotes = True
+    try:
+        type_checks = _check_types_in_file(file_path, separator, chunk_size, unwrap_double_quotes)
+    except _DoubleQuoteWrappingBroken:
+        unwrap_double_quotes = False
+        type_checks = _check_types_in_file(file_path, separator, chunk_size, unwrap_double_quotes)
+
+    unconfirmed_keys = [
+        key for key, type_check in type_checks.items()
+        if key not in metadata or metadata[key]['meaning_type'] != type_check.get_meaning_type()
+    ]
+    if unconfirmed_keys:
+        summaries = _profile_columns_in_file(file_path, separator, chunk_size, unwrap_double_quotes, unconfirmed_keys)
+        unconfirmed_metadata = get_metadata_from_summaries(summaries, num_buckets, max_num_unique_values)
+
+    confirmed_metadata = dict()
+    for key, type_check in type_checks.items():
+        if key in unconfirmed_keys:
+            confirmed_metadata[key] = unconfirmed_metadata[key]
+            continue
+        column_metadata = metadata[key]
+        if column_metadata['meaning_type'] in ('binary', 'categorical', 'textual') and type_check.unique_values is not None:
+            # All unique values were kept, so they replace the sampled ones
+            column_metadata = dict(column_metadata, **_get_non_numeric_metadata(
+                column_metadata['meaning_type'], {str}, list(type_check.unique_values), len(type_check.unique_values)
+                , type_check.nullable, max_num_unique_values
+            ))
+        elif column_metadata['meaning_type'] != 'empty':
+            column_metadata = dict(column_metadata, nullable=type_check.nullable)
+        column_metadata['sample'] = dict(column_metadata['sample'], number_of_rows=type_check.num_values, confirmed=True)
+        confirmed_metadata[key] = column_metadata
+    return confirmed_metadata
+
+def get_metadata_from_sample(file_path, sample_size=10000, separator=',', num_buckets=10, max_num_unique_values=10, method='reservoir', seed=None, confirm=False, chunk_size=10000):
+    """
+    Returns metadata of file_path inferred from sample_size rows sampled by sample_file_to_data_dict, for a quick look
+    at a file too large to profile. Unique values are those of the sampled rows, while whether a variable is
+    categorical is decided from the number of rows of the file, like get_metadata_from_file would.
+
+    The metadata of every variable has a 'sample' key of {'size': number of sampled rows, 'number_of_rows': number of
+    rows of the file, 'error': error}, where with 95% confidence the buckets, min, median and max are off by at most
+    error * number_of_rows rows and the share of rows of every unique value by at most error.
+
+    With confirm=True, the file is read once more chunk_size rows at a time to check the meaning_type of every
+    variable over all rows. Confirmed variables get 'confirmed': True in 'sample' and nullable of all rows, as well as
+    all unique values when there are few of them. Variables whose meaning_type does not hold are profiled from all
+    rows in another pass and have no 'sample' key.
+    """
+    data_dict, number_of_rows = sample_file_to_data_dict(file_path, sample_size, separator, method, seed)
+    metadata = dict()
+    for key, values in data_dict.items():
+        column_metadata = _get_metadata_from_value_counts(
+            Counter(values), set(map(type, values)), number_of_rows, num_buckets, max_num_unique_values
+        )
+        column_metadata['sample'] = {
+            'size': len(values)
+            , 'number_of_rows': number_of_rows
+            , 'error': _get_sample_error(len(values), number_of_rows)
+        }
+        metadata[key] = column_metadata
+    if confirm:
+        return _confirm_metadata(metadata, file_path, separator, num_buckets, max_num_unique_values, chunk_size)
+    return metadata
@@ -0,0 +1,192 @@
+import bisect
+import hashlib
+import heapq
+import math
+import random
+
+class KLLSketch(object):
+    """
+    Mergeable quantile sketch (Karnin, Lang and Liberty, 2016).
+
+    Keeps a bounded number of values in compactors of increasing weight. Order statistics read from the sketch
+    are off by roughly error * number of values positions, while min and max are kept exactly.
+    """
+
+    def __init__(self, error=0.01, seed=0):
+        if not 0 < error < 1:
+            raise ValueError('The error of a sketch must be between 0 and 1: error - {}'.format(error))
+        self.error = error
+        self.k = max(8, int(math.ceil(2.0 / error)))
+        self.num_values = 0
+        self.min_value = None
+        self.max_value = None
+        self._random = random.Random(seed)
+        self._compactors = [list()]
+        self._size = 0
+        self._max_size = self._get_capacity(0)
+        self._sorted_values = None
+
+    def _get_capacity(self, level):
+        height = len(self._compactors) - level - 1
+        return int(math.ceil(self.k * (2.0 / 3.0) ** height)) + 1
+
+    def _compress(self):
+        for level in range(len(self._compactors)):
+            compactor = self._compactors[level]
+            if len(compactor) >= self._get_capacity(level):
+                if level + 1 == len(self._compactors):
+                    self._compactors.append(list())
+                compactor.sort()
+                # An odd value out stays at this level so the total weight is preserved
+                remainder = [compactor.pop()] if len(compactor) % 2 else []
+                self._compactors[level+1].extend(compactor[self._random.randint(0, 1)::2])
+                self._compactors[level] = remainder
+                self._size = sum(len(compactor) for compactor in self._compactors)
+                self._max_size = sum(self._get_capacity(level) for level in range(len(self._compactors)))
+                if self._size < self._max_size:
+                    break
+
+    def update(self, values):
+        values = list(values)
+        if not values:
+            return
+        self._sorted_values = None
+        self.num_values += len(values)
+        values_min, values_max = min(values), max(values)
+        if self.min_value is None or values_min < self.min_value:
+            self.min_value = values_min
+        if self.max_value is None or values_max > self.max_value:
+            self.max_value = values_max
+        self._compactors[0].extend(values)
+        self._size += len(values)
+        while self._size >= self._max_size:
+            self._compress()
+
+    def merge(self, other):
+        if not other.num_values:
+            return self
+        self._sorted_values = None
+        self.num_values += other.num_values
+        if self.min_value is None or other.min_value < self.min_value:
+            self.min_value = other.min_value
+        if self.max_value is None or other.max_value > self.max_value:
+            self.max_value = other.max_value
+        while len(self._compactors) < len(other._compactors):
+            self._compactors.append(list())
+        for level, compactor in enumerate(other._compactors):
+            self._compactors[level].extend(compactor)
+        self._size = sum(len(compactor) for compactor in self._compactors)
+        self._max_size = sum(self._get_capacity(level) for level in range(len(self._compactors)))
+        while self._size >= self._max_size:
+            self._compress()
+        return self
+
+    def _get_sorted_values_and_cumulative_weights(self):
+        if self._sorted_values is None:
+            weighted_values = sorted(
+                (value, 2 ** level) for level, compactor in enumerate(self._compactors) for value in compactor
+            )
+            self._sorted_values = [value for value, _ in weighted_values]
+            self._cumulative_weights = list()
+            cumulative_weight = 0
+            for _, weight in weighted_values:
+                cumulative_weight += weight
+                self._cumulative_weights.append(cumulative_weight)
+        return self._sorted_values, self._cumulative_weights
+
+    def get_order_statistic(self, index):
+        # Approximately the index-th smallest value (0-based)
+        if index <= 0:
+            return self.min_value
+        if index >= self.num_values - 1:
+            return self.max_value
+        sorted_values, cumulative_weights = self._get_sorted_values_and_cumulative_weights()
+        return sorted_values[min(bisect.bisect_right(cumulative_weights, index), len(sorted_values) - 1)]
+
+def _hash_value(value):
+    # 64-bit hash that is the same in every process, unlike hash() of strings.
+    # Equal numbers hash the same whatever their type, like they count as one unique value.
+    if isinstance(value, str):
+        key = b's' + value.encode('utf-8', 'surrogatepass')
+    elif value is None:
+        key = b'n'
+    else:
+        try:
+            key = b'i' + str(int(value)).encode() if value == int(value) else b'f' + repr(float(value)).encode()
+        except (TypeError, ValueError, OverflowError):
+            key = b'r' + repr(value).encode('utf-8', 'surrogatepass')
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'big')
+
+class HyperLogLog(object):
+    """
+    Mergeable estimator of the number of distinct values (Flajolet, Fusy, Gandouet and Meunier, 2007).
+
+    Uses 2 ** precision one-byte registers, with precision chosen so that the relative standard error is about error.
+    """
+
+    def __init__(self, error=0.01):
+        if not 0 < error < 1:
+            raise ValueError('The error of a sketch must be between 0 and 1: error - {}'.format(error))
+        self.error = error
+        self.precision = min(max(int(math.ceil(math.log2((1.04 / error) ** 2))), 4), 18)
+        self.registers = bytearray(1 << self.precision)
+
+    def update(self, values):
+        precision = self.precision
+        registers = self.registers
+        value_bits = 64 - precision
+        value_mask = (1 << value_bits) - 1
+        for value in values:
+            hashed_value = _hash_value(value)
+            register_index = hashed_value >> value_bits
+            rank = value_bits - (hashed_value & value_mask).bit_length() + 1
+            if rank > registers[register_index]:
+                registers[register_index] = rank
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError('Only sketches with the same precision can be merged: precision - {}, precision of the other sketch - {}'.format(self.precision, other.precision))
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def estimate(self):
+        num_registers = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / num_registers)
+        raw_estimate = alpha * num_registers ** 2 / sum(2.0 ** -register for register in self.registers)
+        num_zero_registers = self.registers.count(0)
+        if raw_estimate <= 2.5 * num_registers and num_zero_registers:
+            return num_registers * math.log(num_registers / num_zero_registers)
+        return raw_estimate
+
+class MisraGries(object):
+    """
+    Mergeable heavy hitters summary (Misra and Gries, 1982) keeping at most capacity values.
+
+    Every value that occurs more than 1 / (capacity + 1) of the time is kept and counts are underestimated by at most
+    that much. Values with equal counts keep the order in which they were first kept.
+    """
+
+    def __init__(self, capacity=1000):
+        if capacity < 1:
+            raise ValueError('The capacity of a heavy hitters summary must be positive: capacity - {}'.format(capacity))
+        self.capacity = capacity
+        self.counts = dict()
+
+    def _reduce(self):
+        if len(self.counts) > self.capacity:
+            # Subtracting the (capacity + 1)-th largest count leaves at most capacity values with positive counts
+            decrement = heapq.nlargest(self.capacity + 1, self.counts.values())[-1]
+            self.counts = {value: count - decrement for value, count in self.counts.items() if count > decrement}
+
+    def update(self, value_counts):
+        counts = self.counts
+        for value, count in value_counts.items():
+            counts[value] = counts.get(value, 0) + count
+        self._reduce()
+        return self
+
+    def merge(self, other):
+        return self.update(other.counts)
+
+    def most_common(self, n=None):
+        return sorted(self.counts.items(), key=lambda value_and_count: value_and_count[1], reverse=True)[:n]
@@ -0,0 +1,108 @@
+import time
+import tracemalloc
+
+class _Stage(object):
+    # Times one stage and records it in stats when it ends. rows can be set while the stage runs.
+    def __init__(self, stats, stage, name, rows):
+        self.stats = stats
+        self.stage = stage
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        if self.stats.trace_memory:
+            self.stats._start_tracing_memory(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        seconds = time.perf_counter() - self.start
+        peak_memory = self.stats._stop_tracing_memory(self) if self.stats.trace_memory else None
+        self.stats.add({'stage': self.stage, 'name': self.name, 'seconds': seconds, 'rows': self.rows, 'peak_memory': peak_memory})
+        return False
+
+class StageStats(object):
+    """
+    Records of the stages of parse_file_to_data_dict, get_metadata_from_data_dict and process_data_dict_by_metadata
+    called with stats. Each record is {'stage': ..., 'name': ..., 'seconds': ..., 'rows': ..., 'peak_memory': ...}
+    where name is the variable name, or the file path for 'parse', rows is the number of values the stage went
+    through and peak_memory is the most bytes allocated at once during the stage with trace_memory=True, which
+    makes everything slower while it runs, and None otherwise.
+
+    Stages are 'parse' per file, and per variable 'metadata', which contains 'unique_values', 'storage_types',
+    'booleans' and 'numbers' (going through unique values only), 'quantiles', 'array' for NumPy arrays and
+    'summary' for unique_values_engine='sketch', as well as 'transform' or 'encode'.
+    callback is called with every record as it is made, for example to send it to a metrics system.
+    """
+
+    def __init__(self, callback=None, trace_memory=False):
+        self.callback = callback
+        self.trace_memory = trace_memory
+        self.records = list()
+        self._memory_stack = list()
+        self._started_tracemalloc = False
+
+    def stage(self, stage, name=None, rows=0):
+        return _Stage(self, stage, name, rows)
+
+    def add(self, record):
+        self.records.append(record)
+        if self.callback is not None:
+            self.callback(record)
+
+    def totals(self):
+        # Returns {stage: {'seconds': ..., 'rows': ..., 'peak_memory': ..., 'count': ...}} summed over records,
+        # with the highest peak_memory
+        totals = dict()
+        for record in self.records:
+            total = totals.setdefault(record['stage'], {'seconds': 0.0, 'rows': 0, 'peak_memory': None, 'count': 0})
+            total['seconds'] += record['seconds']
+            total['rows'] += record['rows']
+            total['count'] += 1
+            if record['peak_memory'] is not None:
+                total['peak_memory'] = max(total['peak_memory'] or 0, record['peak_memory'])
+        return totals
+
+    def _start_tracing_memory(self, stage):
+        # The peak of tracemalloc is reset at the start of every stage, so the peak so far is first handed to the
+        # stage that contains it
+        if not self._memory_stack and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        current, peak = tracemalloc.get_traced_memory()
+        if self._memory_stack:
+            self._memory_stack[-1][1] = max(self._memory_stack[-1][1], peak)
+        tracemalloc.reset_peak()
+        self._memory_stack.append([current, current])
+
+    def _stop_tracing_memory(self, stage):
+        start, peak = self._memory_stack.pop()
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        if self._memory_stack:
+            self._memory_stack[-1][1] = max(self._memory_stack[-1][1], peak)
+        elif self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+        return peak - start
+
+class _NullStage(object):
+    # Stands in for _Stage when stats are not recorded
+    rows = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+class _NullStats(object):
+    trace_memory = False
+    _stage = _NullStage()
+
+    def stage(self, stage, name=None, rows=0):
+        return self._stage
+
+    def add(self, record):
+        pass
+
+_NO_STATS = _NullStats()
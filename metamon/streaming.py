@@ -0,0 +1,68 @@
+import os
+from .compression import open_text_file
+from .functions import (
+    _DoubleQuoteWrappingBroken, _all_values_wrapped_in_double_quotes
+    , _iter_data_dict_chunks, _iter_data_dict_chunks_from_lines
+)
+from .transformer import MetadataTransformer
+
+def _is_path(source):
+    return isinstance(source, (str, bytes, os.PathLike))
+
+def _all_lines_wrapped_in_double_quotes(file_path, separator):
+    try:
+        with open_text_file(file_path) as file:
+            for line in file:
+                if not _all_values_wrapped_in_double_quotes(line.strip().split(separator)):
+                    return False
+    except FileNotFoundError:
+        raise ValueError('The given file path does not exist: file_path - {}'.format(file_path))
+    return True
+
+def iter_data_dict_chunks(source, separator=',', chunk_size=10000):
+    """
+    Yields data dicts of at most chunk_size rows of source, which is a file path or an iterable of lines
+    such as an open file or sys.stdin, so that only one chunk is in memory at a time.
+
+    Values are unwrapped from double quotes when all of them are wrapped, like parse_file_to_data_dict does.
+    A file path is read once more beforehand to check it. Lines that can only be read once are unwrapped when all
+    values of the first chunk are wrapped, and ValueError is raised if a value of a later chunk is not.
+    """
+    if _is_path(source):
+        unwrap_double_quotes = _all_lines_wrapped_in_double_quotes(source, separator)
+        yield from _iter_data_dict_chunks(source, separator, chunk_size, unwrap_double_quotes)
+        return
+
+    try:
+        yield from _iter_data_dict_chunks_from_lines(source, separator, chunk_size)
+    except _DoubleQuoteWrappingBroken:
+        raise ValueError('Values of the first {} rows are wrapped in double quotes but some values of a later row are not'.format(chunk_size))
+
+def _format_value(value):
+    return '' if value is None else str(value)
+
+def _write_data_dict(file, data_dict, separator):
+    columns = [list(map(_format_value, values)) for values in data_dict.values()]
+    file.writelines(separator.join(row) + '\n' for row in zip(*columns))
+
+def process_file_by_metadata(source, metadata, destination, separator=',', chunk_size=10000, output_separator=None):
+    """
+    Reads source chunk by chunk as iter_data_dict_chunks does, processes every chunk by metadata
+    as process_data_dict_by_metadata does and writes the processed rows to destination, a file path or a writable
+    stream such as sys.stdout, before the next chunk is read. None is written as an empty value.
+    Returns the number of rows written.
+    """
+    output_separator = separator if output_separator is None else output_separator
+    transformer = MetadataTransformer(metadata)
+    file = open(destination, 'w') if _is_path(destination) else destination
+    try:
+        number_of_rows = 0
+        for chunk_number, data_dict in enumerate(iter_data_dict_chunks(source, separator, chunk_size)):
+            if chunk_number == 0:
+                file.write(output_separator.join(data_dict.keys()) + '\n')
+            _write_data_dict(file, transformer.transform_batch(data_dict), output_separator)
+            number_of_rows += len(next(iter(data_dict.values()), ()))
+        return number_of_rows
+    finally:
+        if file is not destination:
+            file.close()
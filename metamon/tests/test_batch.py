@@ -0,0 +1,110 @@
+# get_metadata_from_files(paths_or_glob, workers=None, max_pending=None, **options); yields (file path, metadata, error) as files finish
+# get_metadata_from_files_async(paths_or_glob, workers=None, max_pending=None, **options); asynchronous generator of the same
+
+import unittest
+from unittest.mock import patch
+import asyncio
+import os
+import shutil
+import subprocess
+import sys
+import time
+from tempfile import mkdtemp
+from metamon import get_metadata_from_files, get_metadata_from_files_async, get_metadata_from_file, MetadataCache
+
+class GetMetadataFromFilesTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = mkdtemp()
+        self.file_paths = list()
+        for file_number in range(5):
+            file_path = os.path.join(self.temp_dir, 'data{}.csv'.format(file_number))
+            with open(file_path, 'w') as f:
+                f.write('a,b\n' + ''.join('{},{}\n'.format(i % (file_number + 2), i * file_number) for i in range(100)))
+            self.file_paths.append(file_path)
+        self.broken_file_path = os.path.join(self.temp_dir, 'broken.csv')
+        with open(self.broken_file_path, 'w') as f:
+            f.write('a,b\n1,2\n3\n')
+        self.expected_metadata = {file_path: get_metadata_from_file(file_path, num_buckets=4) for file_path in self.file_paths}
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def check_results(self, results):
+        results = {file_path: (metadata, error) for file_path, metadata, error in results}
+        self.assertEqual(set(results), set(self.file_paths) | {self.broken_file_path})
+        for file_path in self.file_paths:
+            self.assertEqual(results[file_path], (self.expected_metadata[file_path], None))
+        metadata, error = results[self.broken_file_path]
+        self.assertIsNone(metadata)
+        self.assertIsInstance(error, ValueError)
+
+    def test_glob(self):
+        self.check_results(get_metadata_from_files(os.path.join(self.temp_dir, '*.csv'), workers=2, num_buckets=4))
+
+    def test_directory(self):
+        self.check_results(get_metadata_from_files(self.temp_dir, workers=2, max_pending=1, num_buckets=4))
+
+    def test_list_in_one_process(self):
+        file_paths = self.file_paths + [self.broken_file_path]
+        results = list(get_metadata_from_files(file_paths, workers=1, num_buckets=4))
+        self.assertEqual([file_path for file_path, _, _ in results], file_paths)
+        self.check_results(results)
+
+    def test_missing_file(self):
+        [(file_path, metadata, error)] = get_metadata_from_files(['non-existing-file.txt'], workers=2)
+        self.assertEqual((file_path, metadata), ('non-existing-file.txt', None))
+        self.assertIsInstance(error, ValueError)
+
+    def test_stop_early(self):
+        results = get_metadata_from_files(self.file_paths, workers=2, max_pending=2, num_buckets=4)
+        file_path, metadata, error = next(results)
+        results.close()
+        self.assertEqual(metadata, self.expected_metadata[file_path])
+
+    def test_cache_sent_to_workers(self):
+        cache = MetadataCache(os.path.join(self.temp_dir, 'cache'))
+        with patch('metamon.parallel.SHARES_MEMORY_WITH_WORKERS', False):
+            results = list(get_metadata_from_files(self.file_paths, workers=2, num_buckets=4, cache=cache))
+        self.assertEqual({file_path: metadata for file_path, metadata, _ in results}, self.expected_metadata)
+        self.assertEqual(len([name for name in os.listdir(cache.directory) if name.endswith('.pickle')]), 5)
+
+    def test_async(self):
+        async def collect():
+            return [result async for result in get_metadata_from_files_async(self.temp_dir, workers=2, max_pending=3, num_buckets=4)]
+        self.check_results(asyncio.run(collect()))
+
+    def test_async_stop_early_without_blocking(self):
+        large_file_paths = list()
+        for file_number in range(3):
+            file_path = os.path.join(self.temp_dir, 'large{}.csv'.format(file_number))
+            with open(file_path, 'w') as f:
+                f.write('a,b\n' + ''.join('{},{}\n'.format(i % 7, i) for i in range(300000)))
+            large_file_paths.append(file_path)
+
+        async def stop_early():
+            ticks = list()
+            async def tick():
+                while True:
+                    ticks.append(time.perf_counter())
+                    await asyncio.sleep(0.01)
+            ticker = asyncio.ensure_future(tick())
+            results = get_metadata_from_files_async([self.file_paths[0]] + large_file_paths, workers=2, max_pending=4)
+            async for _ in results:
+                break
+            start = time.perf_counter()
+            await results.aclose()
+            await asyncio.sleep(0.05)
+            ticker.cancel()
+            return max(later - earlier for earlier, later in zip(ticks, ticks[1:]) if later > start)
+
+        # Profiling a large file takes longer than this, so the event loop did not wait for the running ones
+        self.assertLess(asyncio.run(stop_early()), 0.25)
+
+class ImportTestCase(unittest.TestCase):
+    def test_asyncio_not_imported(self):
+        code = 'import sys\nimport metamon\nprint("asyncio" in sys.modules)\n'
+        output = subprocess.check_output([sys.executable, '-c', code], universal_newlines=True)
+        self.assertEqual(output.split(), ['False'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+# generate_data_dict(dataset, num_rows=None, num_columns=None, seed=0); returns data dict of strings
+# write_data_dict_to_file(data_dict, file_path, separator=',')
+# measure(function, num_rows, repeat=3); returns {'seconds', 'rows_per_second', 'peak_memory'}
+# run_benchmarks(datasets=None, scale=1.0, repeat=3, seed=0); returns {'<function>/<dataset>': measure}
+# compare_to_baseline(results, baseline, tolerance=0.2); returns list of regressions
+
+import unittest
+import shutil
+from tempfile import mkdtemp
+from metamon import parse_file_to_data_dict
+from metamon.benchmarks import (
+    DATASET_SHAPES, generate_data_dict, write_data_dict_to_file
+    , measure, run_benchmarks, save_baseline, load_baseline, compare_to_baseline
+)
+
+class GenerateDataDictTestCase(unittest.TestCase):
+    def test_reproducible(self):
+        for dataset in DATASET_SHAPES:
+            self.assertEqual(generate_data_dict(dataset, 50, seed=1), generate_data_dict(dataset, 50, seed=1))
+
+    def test_shape(self):
+        data_dict = generate_data_dict('wide', 7)
+        self.assertEqual(len(data_dict), DATASET_SHAPES['wide'][1])
+        self.assertTrue(all(len(values) == 7 for values in data_dict.values()))
+
+    def test_mostly_null(self):
+        values = generate_data_dict('mostly_null', 1000, 1)['var0']
+        self.assertGreater(values.count(''), 900)
+
+    def test_unsupported_dataset(self):
+        with self.assertRaises(ValueError):
+            generate_data_dict('huge')
+
+    def test_quoted_file_is_unwrapped(self):
+        temp_dir = mkdtemp()
+        file_path = '{}/quoted.csv'.format(temp_dir)
+        try:
+            write_data_dict_to_file(generate_data_dict('quoted', 20, 2), file_path)
+            data_dict = parse_file_to_data_dict(file_path)
+        finally:
+            shutil.rmtree(temp_dir)
+        self.assertEqual(data_dict, generate_data_dict('tall', 20, 2))
+
+class BenchmarksTestCase(unittest.TestCase):
+    def test_measure(self):
+        result = measure(lambda: [0] * 100000, 1000, repeat=1)
+        self.assertGreater(result['rows_per_second'], 0)
+        self.assertGreaterEqual(result['peak_memory'], 800000)
+
+    def test_run_benchmarks(self):
+        results = run_benchmarks(['tall'], scale=0.001, repeat=1)
+        self.assertEqual(set(results), {
+            'parse_file_to_data_dict/tall', 'get_metadata_from_data_dict/tall', 'get_metadata_from_file/tall'
+            , 'process_data_dict_by_metadata/tall', 'bucketize/tall'
+        })
+
+    def test_save_and_load_baseline(self):
+        temp_dir = mkdtemp()
+        try:
+            results = {'parse_file_to_data_dict/tall': {'seconds': 1.0, 'rows_per_second': 10.0, 'peak_memory': 100}}
+            save_baseline(results, '{}/baseline.json'.format(temp_dir))
+            self.assertEqual(load_baseline('{}/baseline.json'.format(temp_dir)), results)
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_compare_to_baseline(self):
+        baseline = {
+            'a/tall': {'rows_per_second': 100.0, 'peak_memory': 1000}
+            , 'b/tall': {'rows_per_second': 100.0, 'peak_memory': 1000}
+        }
+        results = {
+            'a/tall': {'rows_per_second': 90.0, 'peak_memory': 1100}
+            , 'b/tall': {'rows_per_second': 50.0, 'peak_memory': 2000}
+            , 'c/tall': {'rows_per_second': 1.0, 'peak_memory': 1}
+        }
+        self.assertEqual(compare_to_baseline(results, baseline), [
+            ('b/tall', 'rows_per_second', 100.0, 50.0), ('b/tall', 'peak_memory', 1000, 2000)
+        ])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+# MetadataCache(directory=None, max_size=100 * 2 ** 20, fingerprint='mtime', max_memo_entries=128)
+#   get_or_compute(file_path, options, compute_metadata); returns cached or computed metadata
+#   get(key); returns cached metadata or None
+#   put(key, metadata)
+#   clear()
+# get_metadata_from_file(file_path, ..., cache=None); returns metadata dict, cached in cache when given
+
+import unittest
+from unittest.mock import MagicMock, patch
+import os
+import shutil
+from tempfile import mkdtemp
+from metamon import MetadataCache, get_metadata_from_file
+
+class MetadataCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = mkdtemp()
+        self.cache_dir = os.path.join(self.temp_dir, 'cache')
+        self.file_path = os.path.join(self.temp_dir, 'data.csv')
+        self.write_file(['a'] + [str(i) for i in range(100)])
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def write_file(self, lines, mtime_ns=None):
+        with open(self.file_path, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        if mtime_ns is not None:
+            os.utime(self.file_path, ns=(mtime_ns, mtime_ns))
+
+    def test_unsupported_fingerprint(self):
+        with self.assertRaises(ValueError):
+            MetadataCache(self.cache_dir, fingerprint='name')
+
+    def test_same_as_without_cache(self):
+        cache = MetadataCache(self.cache_dir)
+        expected_metadata = get_metadata_from_file(self.file_path)
+        self.assertEqual(get_metadata_from_file(self.file_path, cache=cache), expected_metadata)
+        self.assertEqual(get_metadata_from_file(self.file_path, cache=cache), expected_metadata)
+
+    def test_hit_does_not_profile(self):
+        cache = MetadataCache(self.cache_dir)
+        metadata = get_metadata_from_file(self.file_path, cache=cache)
+        with patch('metamon.functions.parse_file_to_data_dict') as mock_parse_file_to_data_dict:
+            self.assertEqual(get_metadata_from_file(self.file_path, cache=cache), metadata)
+            # A new cache reads the entry from the cache directory
+            self.assertEqual(get_metadata_from_file(self.file_path, cache=MetadataCache(self.cache_dir)), metadata)
+        mock_parse_file_to_data_dict.assert_not_called()
+
+    def test_options_are_part_of_the_key(self):
+        cache = MetadataCache(self.cache_dir)
+        get_metadata_from_file(self.file_path, cache=cache)
+        metadata = get_metadata_from_file(self.file_path, num_buckets=4, cache=cache)
+        self.assertEqual(len(metadata['a']['buckets']), 5)
+
+    def test_changed_file_is_profiled_again(self):
+        for fingerprint in ['mtime', 'hash']:
+            cache = MetadataCache(os.path.join(self.cache_dir, fingerprint), fingerprint=fingerprint)
+            self.write_file(['a'] + [str(i) for i in range(100)], 10 ** 18)
+            self.assertEqual(get_metadata_from_file(self.file_path, cache=cache)['a']['max'], 99)
+            self.write_file(['a'] + [str(i) for i in range(1, 101)], 10 ** 18 + 10 ** 9)
+            self.assertEqual(get_metadata_from_file(self.file_path, cache=cache)['a']['max'], 100)
+
+    def test_missing_file(self):
+        for fingerprint in ['mtime', 'hash']:
+            cache = MetadataCache(self.cache_dir, fingerprint=fingerprint)
+            with self.assertRaisesRegex(ValueError, 'The given file path does not exist'):
+                get_metadata_from_file(os.path.join(self.temp_dir, 'non-existing-file.csv'), cache=cache)
+
+    def test_file_changed_while_profiled_is_not_cached(self):
+        cache = MetadataCache(self.cache_dir, fingerprint='hash')
+        def compute_metadata():
+            self.write_file(['a', '1'])
+            return {'a': {'meaning_type': 'empty'}}
+        cache.get_or_compute(self.file_path, {}, compute_metadata)
+        self.assertFalse(os.path.isdir(self.cache_dir))
+
+    def test_content_hashed_once(self):
+        cache = MetadataCache(self.cache_dir, fingerprint='hash')
+        with patch('metamon.cache._hash_file_content', return_value='hash') as mock_hash_file_content:
+            cache.get_or_compute(self.file_path, {}, MagicMock(return_value={'a': {'meaning_type': 'empty'}}))
+        self.assertEqual(mock_hash_file_content.call_count, 1)
+
+    def test_content_hash_ignores_mtime(self):
+        cache = MetadataCache(self.cache_dir, fingerprint='hash')
+        compute_metadata = MagicMock(return_value={'a': {'meaning_type': 'empty'}})
+        cache.get_or_compute(self.file_path, {}, compute_metadata)
+        os.utime(self.file_path, ns=(10 ** 18, 10 ** 18))
+        cache.get_or_compute(self.file_path, {}, compute_metadata)
+        self.assertEqual(compute_metadata.call_count, 1)
+
+    def test_returned_metadata_can_be_changed(self):
+        cache = MetadataCache(self.cache_dir)
+        get_metadata_from_file(self.file_path, cache=cache)['a']['max'] = 'changed'
+        get_metadata_from_file(self.file_path, cache=cache)['a']['max'] = 'changed'
+        self.assertEqual(get_metadata_from_file(self.file_path, cache=cache)['a']['max'], 99)
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = MetadataCache(self.cache_dir, max_size=1000, max_memo_entries=0)
+        for i in range(3):
+            cache.put('key{}'.format(i), {'a': 'x' * 400})
+            os.utime(os.path.join(self.cache_dir, 'key{}.pickle'.format(i)), ns=(i * 10 ** 9, i * 10 ** 9))
+        cache.put('key3', {'a': 'x' * 400})
+        self.assertIsNone(cache.get('key0'))
+        self.assertIsNone(cache.get('key1'))
+        self.assertEqual(cache.get('key3'), {'a': 'x' * 400})
+
+    def test_clear(self):
+        cache = MetadataCache(self.cache_dir)
+        cache.put('key', {'a': 1})
+        cache.clear()
+        self.assertIsNone(cache.get('key'))
+
+if __name__ == '__main__':
+    unittest.main()
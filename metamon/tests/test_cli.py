@@ -0,0 +1,79 @@
+# main(argv=None, input=None, output=None); returns exit code
+# metamon profile [FILE] [--separator] [--chunk-size] [--workers] [--buckets] [--max-unique-values] [--quantile-engine] [--unique-values-engine] [--sample-size] [--sampling-method] [--confirm]
+# metamon apply METADATA [FILE] [--separator] [--chunk-size] [--workers] [--output-separator]
+# metamon bench [--dataset] [--scale] [--repeat] [--baseline] [--save-baseline] [--tolerance]
+
+import unittest
+import io
+import json
+import shutil
+from tempfile import mkdtemp
+from metamon import get_metadata_from_file, process_file_by_metadata
+from metamon.cli import main
+
+class CliTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = mkdtemp()
+        self.file_path = '{}/data.csv'.format(self.temp_dir)
+        with open(self.file_path, 'w') as f:
+            f.write('b;c;x;t\n')
+            for i in range(200):
+                f.write('{};{};{};text{}\n'.format(['t', 'f'][i % 2], ['red', 'green', 'blue'][i % 3], i * 7 % 31 if i % 10 else '', i))
+        self.metadata_path = '{}/metadata.json'.format(self.temp_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def run_main(self, argv, input=''):
+        output = io.StringIO()
+        exit_code = main(argv, io.StringIO(input), output)
+        return exit_code, output.getvalue()
+
+    def test_profile_file(self):
+        exit_code, output = self.run_main(['profile', self.file_path, '--separator', ';', '--buckets', '4'])
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(json.loads(output), get_metadata_from_file(self.file_path, ';', 4))
+
+    def test_profile_stdin(self):
+        with open(self.file_path, 'r') as f:
+            content = f.read()
+        for argv in (['profile', '--separator', ';'], ['profile', '-', '--separator', ';', '--chunk-size', '7']):
+            exit_code, output = self.run_main(argv, content)
+            self.assertEqual(exit_code, 0)
+            self.assertEqual(json.loads(output), get_metadata_from_file(self.file_path, ';'))
+
+    def test_profile_sample(self):
+        exit_code, output = self.run_main(['profile', self.file_path, '--separator', ';', '--sample-size', '50', '--confirm'])
+        self.assertEqual(exit_code, 0)
+        metadata = json.loads(output)
+        self.assertEqual(metadata['c']['sample'], {'size': 50, 'number_of_rows': 200, 'error': metadata['c']['sample']['error'], 'confirmed': True})
+        self.assertEqual(metadata['c']['unique_values'], ['red', 'green', 'blue'])
+
+    def test_apply(self):
+        with open(self.metadata_path, 'w') as f:
+            json.dump(get_metadata_from_file(self.file_path, ';'), f)
+        expected_output = io.StringIO()
+        process_file_by_metadata(self.file_path, get_metadata_from_file(self.file_path, ';'), expected_output, ';', output_separator=',')
+        with open(self.file_path, 'r') as f:
+            content = f.read()
+        for argv, input in (
+            (['apply', self.metadata_path, self.file_path, '--separator', ';', '--output-separator', ','], '')
+            , (['apply', self.metadata_path, '--separator', ';', '--output-separator', ',', '--chunk-size', '3'], content)
+            , (['apply', self.metadata_path, self.file_path, '--separator', ';', '--output-separator', ',', '--workers', '2'], '')
+        ):
+            exit_code, output = self.run_main(argv, input)
+            self.assertEqual(exit_code, 0)
+            self.assertEqual(output, expected_output.getvalue())
+
+    def test_bench(self):
+        exit_code, output = self.run_main(['bench', '--dataset', 'tall', '--scale', '0.001', '--repeat', '1'])
+        self.assertEqual(exit_code, 0)
+        self.assertIn('parse_file_to_data_dict/tall', output)
+
+    def test_error(self):
+        with self.assertRaises(SystemExit) as context:
+            self.run_main(['profile', 'non-existing-file.txt'])
+        self.assertEqual(context.exception.code, 1)
+
+if __name__ == '__main__':
+    unittest.main()
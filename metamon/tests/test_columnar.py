@@ -0,0 +1,188 @@
+# save_columnar(data_dict, path)
+# load_columnar(path); returns data dict of StoredColumn
+# StoredColumn(kind, length, values=None, mask=None, codes=None, offsets=None, data=None); reads like a list of strings
+#   value_counts(); returns Counter of the values in order of first occurrence
+# parse_file_to_data_dict(file_path, compact=True); returns data dict of StoredColumn and lists of strings
+
+import unittest
+from unittest.mock import patch
+import os
+import shutil
+from collections import Counter
+from tempfile import mkdtemp
+import numpy as np
+from metamon import (
+    save_columnar, load_columnar, StoredColumn, parse_file_to_data_dict, get_metadata_from_data_dict
+    , process_data_dict_by_metadata, StageStats
+)
+
+class ColumnarTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = mkdtemp()
+        self.data_dict = {
+            'integer': ['3', '-1', '3', '1000000000000', '0']
+            , 'integer_nullable': ['', '7', '', '7', '8']
+            , 'float': ['1.5', '0.1', '-2.25', '1e+20', '1.5']
+            , 'not_finite': ['1.5', 'nan', 'inf', '-inf', '1.5']
+            , 'not_canonical_number': ['01', '1', '1.50', '-0.0', '0.0']
+            , 'string': ['a', 'b', '', 'a', 'ünïcode']
+            , 'empty': ['', '', '', '', '']
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def save_and_load(self, data_dict):
+        save_columnar(data_dict, self.temp_dir)
+        return load_columnar(self.temp_dir)
+
+    def test_round_trip(self):
+        loaded_data_dict = self.save_and_load(self.data_dict)
+        self.assertEqual(list(loaded_data_dict), list(self.data_dict))
+        for key, values in self.data_dict.items():
+            self.assertEqual(list(loaded_data_dict[key]), values)
+            self.assertEqual(len(loaded_data_dict[key]), len(values))
+            self.assertEqual(loaded_data_dict[key][1], values[1])
+            self.assertEqual(loaded_data_dict[key][-1], values[-1])
+            self.assertEqual(loaded_data_dict[key][1:4], values[1:4])
+            self.assertEqual(loaded_data_dict[key][::-2], values[::-2])
+
+    def test_kinds(self):
+        loaded_data_dict = self.save_and_load(self.data_dict)
+        self.assertEqual(
+            {key: column.kind for key, column in loaded_data_dict.items()}
+            , {'integer': 'integer', 'integer_nullable': 'integer', 'float': 'float', 'not_finite': 'string', 'not_canonical_number': 'string'
+              , 'string': 'string', 'empty': 'string'}
+        )
+        self.assertIsInstance(loaded_data_dict['integer'].values, np.memmap)
+        self.assertEqual(loaded_data_dict['integer'].values.dtype, np.int64)
+
+    def test_value_counts(self):
+        loaded_data_dict = self.save_and_load(self.data_dict)
+        for key, values in self.data_dict.items():
+            self.assertEqual(list(loaded_data_dict[key].value_counts().items()), list(Counter(values).items()))
+
+    def test_index_out_of_range(self):
+        with self.assertRaises(IndexError):
+            self.save_and_load(self.data_dict)['integer'][5]
+
+    def test_only_strings(self):
+        with self.assertRaises(ValueError):
+            save_columnar({'a': [1, 2]}, self.temp_dir)
+
+    def test_same_metadata_and_processing(self):
+        data_dict = {
+            'numeric': [str(i) for i in range(100)]
+            , 'float': [repr(i / 7) for i in range(100)]
+            , 'categorical': ['red', 'green', ''] * 33 + ['blue']
+            , 'not_finite': ['1.5', 'nan', 'inf', '-inf', '2.5'] * 20
+        }
+        loaded_data_dict = self.save_and_load(data_dict)
+        metadata = get_metadata_from_data_dict(data_dict)
+        self.assertEqual(get_metadata_from_data_dict(loaded_data_dict), metadata)
+        self.assertEqual(process_data_dict_by_metadata(loaded_data_dict, metadata), process_data_dict_by_metadata(data_dict, metadata))
+
+    def test_not_finite_floats_of_older_files(self):
+        values = ['1.5', 'nan', '2.5', 'inf'] * 10
+        column = StoredColumn('float', len(values), values=np.array([1.5, np.nan, 2.5, np.inf] * 10))
+        self.assertEqual(list(column), values)
+        metadata = get_metadata_from_data_dict({'a': column})
+        self.assertEqual(metadata, get_metadata_from_data_dict({'a': values}))
+        self.assertEqual((metadata['a']['storage_types'], metadata['a']['nullable']), (['string'], False))
+
+class CompactParseTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = mkdtemp()
+        self.file_path = os.path.join(self.temp_dir, 'data.csv')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def write(self, data_dict):
+        with open(self.file_path, 'w') as f:
+            f.write(','.join(data_dict) + '\n')
+            for row in zip(*data_dict.values()):
+                f.write(','.join(row) + '\n')
+
+    def parse(self):
+        data_dict = parse_file_to_data_dict(self.file_path)
+        compact_data_dict = parse_file_to_data_dict(self.file_path, compact=True)
+        self.assertEqual(list(compact_data_dict), list(data_dict))
+        for key, values in data_dict.items():
+            self.assertEqual(list(compact_data_dict[key]), values)
+        return data_dict, compact_data_dict
+
+    def test_kinds(self):
+        self.write({
+            'integer': [str(i % 50 - 25) for i in range(1000)]
+            , 'integer_nullable': ['' if i % 3 else str(i) for i in range(1000)]
+            , 'float': [repr(i / 8) for i in range(1000)]
+            , 'categorical': [['red', 'green', 'blue', ''][i % 4] for i in range(1000)]
+            , 'text': ['text {}'.format(i) for i in range(1000)]
+            , 'not_canonical_number': ['0{}'.format(i % 10) for i in range(1000)]
+            , 'not_finite': [['1.5', 'nan', '2.5', 'inf', ''][i % 5] for i in range(1000)]
+            , 'too_large_integer': [str(2 ** 63 + i % 10) for i in range(1000)]
+            , 'empty': [''] * 1000
+        })
+        data_dict, compact_data_dict = self.parse()
+        kinds = {key: getattr(values, 'kind', None) for key, values in compact_data_dict.items()}
+        self.assertEqual(kinds, {
+            'integer': 'integer', 'integer_nullable': 'integer', 'float': 'float', 'categorical': 'string', 'text': None
+            , 'not_canonical_number': 'string', 'not_finite': 'string', 'too_large_integer': 'string', 'empty': 'string'
+        })
+        self.assertIsInstance(compact_data_dict['text'], list)
+        self.assertIsNotNone(compact_data_dict['integer_nullable'].mask)
+
+        metadata = get_metadata_from_data_dict(data_dict)
+        self.assertEqual(get_metadata_from_data_dict(compact_data_dict), metadata)
+        self.assertEqual(process_data_dict_by_metadata(compact_data_dict, metadata), process_data_dict_by_metadata(data_dict, metadata))
+
+    def test_nan_is_a_string(self):
+        with open(self.file_path, 'w') as f:
+            f.write('x\n1.5\nnan\n2.5\n')
+        data_dict, compact_data_dict = self.parse()
+        metadata = get_metadata_from_data_dict(compact_data_dict)
+        self.assertEqual(metadata, get_metadata_from_data_dict(data_dict))
+        self.assertEqual((metadata['x']['unique_values'], metadata['x']['nullable']), (['1.5', 'nan', '2.5'], False))
+
+    def test_kind_changes_between_chunks(self):
+        self.write({
+            'integer_then_float': [str(i % 5) for i in range(49)] + ['1.5']
+            , 'empty_then_float': [''] * 30 + [repr(i % 5 / 2) for i in range(20)]
+            , 'categorical_then_text': ['a', 'b'] * 10 + ['text {}'.format(i) for i in range(30)]
+            , 'integer_then_text': [str(i % 3) for i in range(49)] + ['x']
+        })
+        with patch('metamon.functions._COMPACT_CHUNK_SIZE', 7):
+            _, compact_data_dict = self.parse()
+        self.assertEqual(compact_data_dict['integer_then_float'].kind, 'string')
+        self.assertEqual(compact_data_dict['empty_then_float'].kind, 'float')
+        self.assertIsInstance(compact_data_dict['categorical_then_text'], list)
+        self.assertEqual(compact_data_dict['integer_then_text'].kind, 'string')
+
+    def test_double_quotes(self):
+        self.write({'"a"': ['"{}"'.format(i % 3) for i in range(20)], '"b"': ['"x"'] * 20})
+        _, compact_data_dict = self.parse()
+        self.assertEqual(compact_data_dict['a'].kind, 'integer')
+
+        self.write({'"a"': ['"{}"'.format(i % 3) for i in range(20)] + ['1'], '"b"': ['"x"'] * 21})
+        with patch('metamon.functions._COMPACT_CHUNK_SIZE', 7):
+            _, compact_data_dict = self.parse()
+        self.assertEqual(compact_data_dict['"a"'].kind, 'string')
+
+    def test_empty_file(self):
+        with open(self.file_path, 'w') as f:
+            f.write('a,b\n')
+        _, compact_data_dict = self.parse()
+        self.assertEqual(len(compact_data_dict['a']), 0)
+        with open(self.file_path, 'w') as f:
+            f.write('')
+        self.assertEqual(parse_file_to_data_dict(self.file_path, compact=True), {})
+
+    def test_stats(self):
+        self.write({'a': [str(i) for i in range(10)]})
+        stats = StageStats()
+        parse_file_to_data_dict(self.file_path, stats=stats, compact=True)
+        self.assertEqual([(record['stage'], record['rows']) for record in stats.records], [('parse', 10)])
+
+if __name__ == '__main__':
+    unittest.main()
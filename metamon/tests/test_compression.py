@@ -0,0 +1,88 @@
+# get_compression(file_path); returns 'gzip', 'bz2', 'xz' or None
+# open_text_file(file_path); returns a text file, decompressed in a background thread when compressed
+# parse_file_to_data_dict, get_metadata_from_file, iter_data_dict_chunks and get_metadata_from_sample read compressed files
+
+import unittest
+import bz2
+import gzip
+import lzma
+import shutil
+import threading
+from tempfile import mkdtemp
+from metamon import (
+    parse_file_to_data_dict, get_metadata_from_file, iter_data_dict_chunks, get_metadata_from_sample
+)
+from metamon import compression
+from metamon.compression import get_compression, open_text_file
+
+class CompressionTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = mkdtemp()
+        self.content = 'a,b\n' + ''.join('{},"text {}"\n'.format(i % 7, i) for i in range(5000))
+        self.file_path = '{}/data.csv'.format(self.temp_dir)
+        with open(self.file_path, 'w') as f:
+            f.write(self.content)
+        self.compressed_file_paths = dict()
+        for name, open_compressed_file in (('gzip', gzip.open), ('bz2', bz2.open), ('xz', lzma.open)):
+            # Named without an extension, since compression is recognized from the content
+            self.compressed_file_paths[name] = '{}/data_{}'.format(self.temp_dir, name)
+            with open_compressed_file(self.compressed_file_paths[name], 'wt') as f:
+                f.write(self.content)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_get_compression(self):
+        self.assertIsNone(get_compression(self.file_path))
+        for name, file_path in self.compressed_file_paths.items():
+            self.assertEqual(get_compression(file_path), name)
+
+    def test_open_text_file(self):
+        for file_path in self.compressed_file_paths.values():
+            with open_text_file(file_path) as f:
+                self.assertEqual(f.read(), self.content)
+
+    def test_small_blocks(self):
+        block_size, max_buffered_blocks = compression._BLOCK_SIZE, compression._MAX_BUFFERED_BLOCKS
+        compression._BLOCK_SIZE, compression._MAX_BUFFERED_BLOCKS = 100, 2
+        try:
+            with open_text_file(self.compressed_file_paths['gzip']) as f:
+                self.assertEqual(list(f), self.content.splitlines(True))
+            # Closing before the end stops the background thread although the buffer is full
+            number_of_threads = threading.active_count()
+            with open_text_file(self.compressed_file_paths['xz']) as f:
+                self.assertEqual(f.readline(), 'a,b\n')
+            self.assertEqual(threading.active_count(), number_of_threads)
+        finally:
+            compression._BLOCK_SIZE, compression._MAX_BUFFERED_BLOCKS = block_size, max_buffered_blocks
+
+    def test_corrupt_file(self):
+        with open(self.compressed_file_paths['gzip'], 'rb') as f:
+            content = f.read()
+        with open(self.compressed_file_paths['gzip'], 'wb') as f:
+            f.write(content[:len(content) // 2])
+        with self.assertRaises(EOFError):
+            parse_file_to_data_dict(self.compressed_file_paths['gzip'])
+
+    def test_parse_file_to_data_dict(self):
+        data_dict = parse_file_to_data_dict(self.file_path)
+        for file_path in self.compressed_file_paths.values():
+            self.assertEqual(parse_file_to_data_dict(file_path), data_dict)
+            self.assertEqual(parse_file_to_data_dict(file_path, workers=2), data_dict)
+
+    def test_get_metadata_from_file(self):
+        metadata = get_metadata_from_file(self.file_path)
+        for file_path in self.compressed_file_paths.values():
+            self.assertEqual(get_metadata_from_file(file_path), metadata)
+            self.assertEqual(get_metadata_from_file(file_path, chunk_size=1000), metadata)
+
+    def test_iter_data_dict_chunks(self):
+        chunks = list(iter_data_dict_chunks(self.file_path, chunk_size=1000))
+        self.assertEqual(list(iter_data_dict_chunks(self.compressed_file_paths['bz2'], chunk_size=1000)), chunks)
+
+    def test_get_metadata_from_sample(self):
+        metadata = get_metadata_from_sample(self.compressed_file_paths['gzip'], 100, method='seek', seed=0)
+        self.assertEqual(metadata['a']['sample']['number_of_rows'], 5000)
+
+if __name__ == '__main__':
+    unittest.main()
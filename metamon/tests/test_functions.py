@@ -1,21 +1,33 @@
-# parse_file_to_data_dict(file_path, separator=','); returns data dict
-# bucketize(numbers, buckets); returns bucketized values
-# get_metadata_from_data_dict(data_dict, num_buckets=10); returns metadata dict
-# get_metadata_from_file(file_path, separator=',', num_buckets=10); returns metadata dict
-# process_data_dict_by_metadata(data_dict, metadata); returns data dict
+# parse_file_to_data_dict(file_path, separator=',', workers=None, stats=None, compact=False); returns data dict
+# bucketize(numbers, buckets, variable_name='x', return_indices=False); returns bucketized values
+# get_metadata_from_data_dict(data_dict, num_buckets=10, max_num_unique_values=10, quantile_engine='exact', quantile_error=0.01, workers=None, unique_values_engine='exact', unique_values_error=0.01, heavy_hitters_capacity=1000, stats=None); returns metadata dict
+# get_metadata_from_file(file_path, separator=',', num_buckets=10, max_num_unique_values=10, chunk_size=None, quantile_engine='exact', quantile_error=0.01, workers=None, unique_values_engine='exact', unique_values_error=0.01, heavy_hitters_capacity=1000, cache=None, stats=None); returns metadata dict
+# process_data_dict_by_metadata(data_dict, metadata, output='values', workers=None, chunk_size=None, stats=None); returns data dict, or codes and vocabularies with output='codes'
+# ColumnSummary(quantile_engine='exact', quantile_error=0.01, unique_values_engine='exact', unique_values_error=0.01, heavy_hitters_capacity=1000); update(values), merge(other) and finalize(num_buckets=10, max_num_unique_values=10)
+# get_summaries_from_data_dict(data_dict, quantile_engine='exact', quantile_error=0.01, unique_values_engine='exact', unique_values_error=0.01, heavy_hitters_capacity=1000); returns dict of ColumnSummary
+# get_summaries_from_file(file_path, separator=',', chunk_size=10000, quantile_engine='exact', quantile_error=0.01, unique_values_engine='exact', unique_values_error=0.01, heavy_hitters_capacity=1000); returns dict of ColumnSummary
+# merge_summaries(summaries, other_summaries); returns summaries merged with other_summaries
+# get_metadata_from_summaries(summaries, num_buckets=10, max_num_unique_values=10); returns metadata dict
 
 import unittest
 from unittest.mock import MagicMock, patch, call, ANY
 import shutil
 from tempfile import mkdtemp
 import math
+import numpy as np
 from decimal import Decimal
 from fractions import Fraction
+import pickle
+import subprocess
+import sys
 from metamon import (
     parse_file_to_data_dict, bucketize
     , get_metadata_from_data_dict, get_metadata_from_file
     , process_data_dict_by_metadata
+    , ColumnSummary, get_summaries_from_data_dict, get_summaries_from_file
+    , merge_summaries, get_metadata_from_summaries, StageStats
 )
+from metamon.functions import _convert_to_numbers
 
 class ParseFileToDataDictTestCase(unittest.TestCase):
     def setUp(self):
@@ -93,6 +105,12 @@ class ParseFileToDataDictTestCase(unittest.TestCase):
         data_dict = parse_file_to_data_dict(self.file_path, separator=';')
         self.assertEqual(data_dict, {'variable1': ['value1a', ''], 'variable2': ['', 'value2b']})
 
+    def test_file_with_double_quote_wrapped_partially(self):
+        with open(self.file_path, 'w') as f:
+            f.write('"variable1";"variable2"\n"value1a";""\n"";value2b')
+        data_dict = parse_file_to_data_dict(self.file_path, separator=';')
+        self.assertEqual(data_dict, {'"variable1"': ['"value1a"', '""'], '"variable2"': ['""', 'value2b']})
+
     def test_non_existing_file(self):
         try:
             data_dict = parse_file_to_data_dict('non-existing-file.txt')
@@ -115,6 +133,42 @@ class ParseFileToDataDictTestCase(unittest.TestCase):
         else:
             self.fail('Expected ValueError but no exception happened')
 
+    def test_workers(self):
+        with open(self.file_path, 'w') as f:
+            f.write('variable1,variable2\n')
+            for i in range(100):
+                f.write('value1{},value2{}\n'.format(i, i))
+        with patch('metamon.functions._MIN_BYTE_RANGE_SIZE', 64):
+            data_dict = parse_file_to_data_dict(self.file_path, workers=3)
+        self.assertEqual(data_dict, {'variable1': ['value1{}'.format(i) for i in range(100)], 'variable2': ['value2{}'.format(i) for i in range(100)]})
+
+        with open(self.file_path, 'w') as f:
+            f.write('"variable1";"variable2"\n"value1a";""\n"";"value2b"')
+        data_dict = parse_file_to_data_dict(self.file_path, separator=';', workers=2)
+        self.assertEqual(data_dict, {'variable1': ['value1a', ''], 'variable2': ['', 'value2b']})
+
+        with open(self.file_path, 'w') as f:
+            f.write('')
+        self.assertEqual(parse_file_to_data_dict(self.file_path, workers=2), dict())
+
+        with open(self.file_path, 'w') as f:
+            f.write('variable1,variable2')
+        self.assertEqual(parse_file_to_data_dict(self.file_path, workers=2), {'variable1': [], 'variable2': []})
+
+        with self.assertRaises(ValueError):
+            parse_file_to_data_dict('non-existing-file.txt', workers=2)
+
+    def test_workers_improperly_formatted_file(self):
+        with open(self.file_path, 'w') as f:
+            f.write('variable1,variable2\n')
+            for i in range(100):
+                f.write('value1{},value2{}\n'.format(i, i) if i != 77 else 'value\n')
+        with patch('metamon.functions._MIN_BYTE_RANGE_SIZE', 64):
+            with self.assertRaisesRegex(ValueError, 'line number - 78,'):
+                parse_file_to_data_dict(self.file_path, workers=3)
+        with self.assertRaisesRegex(ValueError, 'line number - 78,'):
+            parse_file_to_data_dict(self.file_path)
+
 class BucketizeTestCase(unittest.TestCase):
     def test_empty_numbers(self):
         bucketized_values = bucketize([], [])
@@ -147,6 +201,30 @@ class BucketizeTestCase(unittest.TestCase):
 
         bucketized_values = bucketize(range(0, 5), [-2, 0, 1, 3, 4, 8], variable_name='y')
         self.assertEqual(bucketized_values, ['0<=y<1', '1<=y<3', '1<=y<3', '3<=y<4', '4<=y<8'])
+
+    def test_unsorted_buckets_are_not_modified(self):
+        buckets = [3, 0, 1]
+        bucketized_values = bucketize([-1, 0.5, 2, 3], buckets)
+        self.assertEqual(bucketized_values, ['x<0', '0<=x<1', '1<=x<3', '3<=x'])
+        self.assertEqual(buckets, [3, 0, 1])
+
+    def test_duplicate_boundaries(self):
+        bucketized_values = bucketize([0, 1, 1.5, 2], [1, 1, 2])
+        self.assertEqual(bucketized_values, ['x<1', '1<=x<2', '1<=x<2', '2<=x'])
+
+    def test_numpy_array(self):
+        bucketized_values = bucketize(np.array([-1.0, 0.5, 2.0, 3.0]), [0, 1, 3])
+        self.assertEqual(bucketized_values, ['x<0', '0<=x<1', '1<=x<3', '3<=x'])
+
+    def test_return_indices(self):
+        bucket_indices = bucketize(np.array([-1, 0, 2, 3, 10]), [0, 1, 3], return_indices=True)
+        self.assertEqual(bucket_indices.tolist(), [0, 1, 2, 3, 3])
+
+        bucket_indices = bucketize([-1, 0, 1], [], return_indices=True)
+        self.assertEqual(bucket_indices.tolist(), [0, 0, 0])
+
+        bucket_indices = bucketize([], [0], return_indices=True)
+        self.assertEqual(bucket_indices.tolist(), [])
     
 class GetMetadataFromDataDictTestCase(unittest.TestCase):
     def test_very_small_data_dict(self):
@@ -299,6 +377,83 @@ class GetMetadataFromDataDictTestCase(unittest.TestCase):
         self.assertEqual(metadata['variable']['max'], 7)
         self.assertEqual(metadata['variable']['nullable'], True)
 
+    def test_unique_values_in_order_of_first_occurrence(self):
+        metadata = get_metadata_from_data_dict({'variable': ['c', 'a', 'c', 'b', 'a', 'd'] * 5}, max_num_unique_values=2)
+        self.assertEqual(metadata['variable']['unique_values'], ['c', 'a', 'TRUNCATED'])
+        self.assertEqual(metadata['variable']['number_of_unique_values'], 4)
+
+    def test_numeric_mixed_number_types(self):
+        metadata = get_metadata_from_data_dict({'variable': [Decimal(i) for i in range(20)] + [Fraction(41, 2), '21', 22.0, None]})
+        self.assertEqual(metadata['variable']['meaning_type'], 'numeric')
+        self.assertEqual(metadata['variable']['min'], 0)
+        self.assertEqual(metadata['variable']['median'], 11)
+        self.assertEqual(metadata['variable']['max'], 22)
+        self.assertEqual(metadata['variable']['nullable'], True)
+
+    def test_numeric_sketch_quantile_engine(self):
+        values = list(range(-5000, 5000))
+        metadata = get_metadata_from_data_dict({'variable': values}, quantile_engine='sketch', quantile_error=0.01)
+        self.assertEqual(metadata['variable']['meaning_type'], 'numeric')
+        self.assertEqual(metadata['variable']['min'], -5000)
+        self.assertEqual(metadata['variable']['max'], 4999)
+        self.assertLessEqual(abs(metadata['variable']['median']), 0.01 * len(values))
+        exact_metadata = get_metadata_from_data_dict({'variable': values})
+        self.assertEqual(len(metadata['variable']['buckets']), len(exact_metadata['variable']['buckets']))
+        for boundary, exact_boundary in zip(metadata['variable']['buckets'], exact_metadata['variable']['buckets']):
+            self.assertLessEqual(abs(boundary - exact_boundary), 0.01 * len(values))
+
+    def test_workers(self):
+        data_dict = {
+            'binary': [True, False] * 20
+            , 'categorical': ['a', 'b', 'c', 'd'] * 10
+            , 'numeric': list(range(-20, 20))
+            , 'textual': ['text{}'.format(i) for i in range(40)]
+            , 'empty': []
+        }
+        metadata = get_metadata_from_data_dict(data_dict, max_num_unique_values=50, workers=3)
+        self.assertEqual(list(metadata.keys()), list(data_dict.keys()))
+        self.assertEqual(metadata, get_metadata_from_data_dict(data_dict, max_num_unique_values=50))
+
+    def test_numpy_arrays(self):
+        data_dict = {
+            'binary': np.array([True, False, True])
+            , 'binary_numbers': np.array([0, 1, 1], dtype=np.uint8)
+            , 'categorical': np.array([2.5, np.nan, 1.0, 2.5])
+            , 'numeric': np.arange(40, dtype=np.int64)
+            , 'numeric_nullable': np.append(np.arange(40) / 4, np.nan)
+            , 'empty': np.array([], dtype=float)
+            , 'null': np.array([np.nan] * 3)
+        }
+        list_data_dict = {key: [None if value != value else value for value in values.tolist()] for key, values in data_dict.items()}
+        metadata = get_metadata_from_data_dict(data_dict)
+        self.assertEqual(metadata, get_metadata_from_data_dict(list_data_dict))
+        self.assertEqual(metadata['categorical'], {
+            'meaning_type': 'categorical', 'storage_types': ['null', 'number'], 'unique_values': [2.5, None, 1.0]
+            , 'number_of_unique_values': 3, 'nullable': True
+        })
+        self.assertEqual(metadata['numeric_nullable']['nullable'], True)
+        self.assertEqual(type(metadata['numeric']['min']), int)
+        self.assertEqual(metadata['null']['storage_types'], ['null'])
+        self.assertEqual(
+            get_metadata_from_data_dict(data_dict, quantile_engine='sketch', unique_values_engine='sketch')
+            , get_metadata_from_data_dict(list_data_dict, quantile_engine='sketch', unique_values_engine='sketch')
+        )
+
+    def test_sketch_unique_values_engine(self):
+        data_dict = {'textual': ['frequent'] * 100 + ['text{}'.format(i) for i in range(3000)]}
+        metadata = get_metadata_from_data_dict(data_dict, unique_values_engine='sketch', heavy_hitters_capacity=50)
+        self.assertEqual(metadata['textual']['meaning_type'], 'textual')
+        self.assertEqual(metadata['textual']['unique_values'][0], 'frequent')
+        self.assertLess(abs(metadata['textual']['number_of_unique_values'] - 3001) / 3001, 0.05)
+
+    def test_unsupported_unique_values_engine(self):
+        with self.assertRaises(ValueError):
+            get_metadata_from_data_dict({'a': ['1']}, unique_values_engine='approximate')
+
+    def test_unsupported_quantile_engine(self):
+        with self.assertRaises(ValueError):
+            get_metadata_from_data_dict({'variable': [1, 2, 3]}, quantile_engine='unknown')
+
 class GetMetadataFromFileTestCase(unittest.TestCase):
     def test_get_metadata_from_file_call_order(self):
         source_mock = MagicMock()
@@ -307,11 +462,87 @@ class GetMetadataFromFileTestCase(unittest.TestCase):
             source_mock.parse_file_to_data_dict.return_value = {'data': 'dict'}
             get_metadata_from_file('file_path.txt')
             expected_calls = [
-                call.parse_file_to_data_dict('file_path.txt', ',')
-                , call.get_metadata_from_data_dict({'data': 'dict'}, 10)
+                call.parse_file_to_data_dict('file_path.txt', ',', workers=None, stats=None)
+                , call.get_metadata_from_data_dict({'data': 'dict'}, 10, 10, quantile_engine='exact', quantile_error=0.01, workers=None, unique_values_engine='exact', unique_values_error=0.01, heavy_hitters_capacity=1000, stats=None)
             ]
             self.assertEqual(source_mock.mock_calls, expected_calls)
 
+    def test_chunked_same_as_whole_file(self):
+        temp_dir = mkdtemp()
+        file_path = '{}/data.csv'.format(temp_dir)
+        try:
+            with open(file_path, 'w') as f:
+                f.write('binary,categorical,numeric,textual\n')
+                for i in range(40):
+                    f.write('{},{},{},text{}\n'.format(['t', 'f'][i % 2], 'abc'[i % 3], i - 20, i % 13))
+            metadata = get_metadata_from_file(file_path, max_num_unique_values=20)
+            for chunk_size in [1, 7, 40, 100]:
+                chunked_metadata = get_metadata_from_file(file_path, max_num_unique_values=20, chunk_size=chunk_size)
+                self.assertEqual(chunked_metadata['numeric'], metadata['numeric'])
+                for key in ['binary', 'categorical', 'textual']:
+                    self.assertEqual(chunked_metadata[key]['meaning_type'], metadata[key]['meaning_type'])
+                    self.assertEqual(chunked_metadata[key]['number_of_unique_values'], metadata[key]['number_of_unique_values'])
+                    self.assertEqual(set(chunked_metadata[key]['unique_values']), set(metadata[key]['unique_values']))
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_chunked_with_workers_or_stats(self):
+        for options in [{'workers': 2}, {'stats': StageStats()}]:
+            with self.assertRaises(ValueError):
+                get_metadata_from_file('file_path.txt', chunk_size=1, **options)
+
+    def test_chunked_double_quote_wrapped(self):
+        temp_dir = mkdtemp()
+        file_path = '{}/data.csv'.format(temp_dir)
+        try:
+            with open(file_path, 'w') as f:
+                f.write('"variable"\n"a"\n"b"\n"a"')
+            metadata = get_metadata_from_file(file_path, chunk_size=1)
+            self.assertEqual(set(metadata['variable']['unique_values']), set(['a', 'b']))
+
+            with open(file_path, 'w') as f:
+                f.write('"variable"\n"a"\n"b"\na')
+            metadata = get_metadata_from_file(file_path, chunk_size=1)
+            self.assertEqual(set(metadata['"variable"']['unique_values']), set(['"a"', '"b"', 'a']))
+
+            with open(file_path, 'w') as f:
+                f.write('')
+            self.assertEqual(get_metadata_from_file(file_path, chunk_size=1), dict())
+
+            with open(file_path, 'w') as f:
+                f.write('variable')
+            self.assertEqual(get_metadata_from_file(file_path, chunk_size=1), {'variable': {'meaning_type': 'empty'}})
+        finally:
+            shutil.rmtree(temp_dir)
+
+class ConvertToNumbersTestCase(unittest.TestCase):
+    def test_int_and_float_like_one_by_one(self):
+        numbers, non_number_index = _convert_to_numbers(['1', '2.5', ' 3 ', '1_000', '1.0', '1e3', 'inf', '99999999999999999999'])
+        self.assertIsNone(non_number_index)
+        self.assertEqual(numbers, [1, 2.5, 3, 1000, 1.0, 1000.0, float('inf'), 99999999999999999999])
+        self.assertEqual([type(number) for number in numbers], [int, float, int, int, float, float, float, int])
+
+    def test_other_values(self):
+        numbers, non_number_index = _convert_to_numbers([None, True, Decimal('1.5'), '4', 2.5])
+        self.assertIsNone(non_number_index)
+        self.assertEqual(numbers, [None, 1, Decimal('1.5'), 4, 2.5])
+
+    def test_first_non_number(self):
+        self.assertEqual(_convert_to_numbers(['1', '2.5', 'a', 'b']), (None, 2))
+        self.assertEqual(_convert_to_numbers([1, 'x', '2', 'a']), (None, 1))
+
+class LazyImportTestCase(unittest.TestCase):
+    def test_numpy_and_scipy_not_imported_for_metadata(self):
+        code = (
+            'import sys\n'
+            'from metamon import get_metadata_from_data_dict, MetadataTransformer\n'
+            'metadata = get_metadata_from_data_dict({"a": [str(i) for i in range(100)], "b": ["x", "y"] * 50})\n'
+            'MetadataTransformer(metadata).transform_row({"a": "5", "b": "x"})\n'
+            'print("numpy" in sys.modules, "scipy" in sys.modules)\n'
+        )
+        output = subprocess.check_output([sys.executable, '-c', code], universal_newlines=True)
+        self.assertEqual(output.split(), ['False', 'False'])
+
 class ProcessDataDictByMetadataTestCase(unittest.TestCase):
     def test_binary(self):
         processed_data_dict = process_data_dict_by_metadata(
@@ -341,5 +572,165 @@ class ProcessDataDictByMetadataTestCase(unittest.TestCase):
         )
         self.assertEqual(processed_data_dict, {'x': ['1<=x<5', '1<=x<5', '1<=x<5', '1<=x<5', '5<=x<10', '5<=x<10', '5<=x<10', '5<=x<10', '5<=x<10', '10<=x']})
 
+        processed_data_dict = process_data_dict_by_metadata(
+            {'x': ['0.5', '', '7', None, 12.5]}
+            , {'x': {'meaning_type': 'numeric', 'buckets': [1, 5, 10]}}
+        )
+        self.assertEqual(processed_data_dict, {'x': ['x<1', '', '5<=x<10', None, '10<=x']})
+
+        with self.assertRaises(ValueError):
+            process_data_dict_by_metadata({'x': ['1', 'a']}, {'x': {'meaning_type': 'numeric', 'buckets': [1, 5, 10]}})
+
+    def test_codes_output(self):
+        data_dict = {'var': ['text1', 'text2', 'text1']}
+        processed_data_dict = process_data_dict_by_metadata(data_dict, {'var': {'meaning_type': 'textual'}}, output='codes')
+        self.assertEqual(processed_data_dict['var']['codes'].tolist(), [0, 1, 0])
+        self.assertEqual(processed_data_dict['var']['vocabulary'], ['"text1"', '"text2"'])
+
+    def test_workers(self):
+        data_dict = {
+            'b': ['t', 'f', 1, ''] * 25
+            , 'c': ['a', 'b', 1, True, None] * 20
+            , 'x': [str(i) for i in range(90)] + ['', None] * 5
+            , 'y': np.arange(100) / 10
+        }
+        metadata = {
+            'b': {'meaning_type': 'binary'}
+            , 'c': {'meaning_type': 'categorical', 'unique_values': ['b']}
+            , 'x': {'meaning_type': 'numeric', 'buckets': [10, 50]}
+            , 'y': {'meaning_type': 'numeric', 'buckets': [5.0]}
+        }
+        for chunk_size in [None, 7]:
+            self.assertEqual(
+                process_data_dict_by_metadata(data_dict, metadata, workers=3, chunk_size=chunk_size)
+                , process_data_dict_by_metadata(data_dict, metadata)
+            )
+            processed_data_dict = process_data_dict_by_metadata(data_dict, metadata, output='codes', workers=3, chunk_size=chunk_size)
+            expected_processed_data_dict = process_data_dict_by_metadata(data_dict, metadata, output='codes')
+            for key in data_dict:
+                self.assertEqual(processed_data_dict[key]['codes'].tolist(), expected_processed_data_dict[key]['codes'].tolist())
+                self.assertEqual(processed_data_dict[key]['vocabulary'], expected_processed_data_dict[key]['vocabulary'])
+
+    def test_workers_non_number(self):
+        with self.assertRaises(ValueError):
+            process_data_dict_by_metadata({'x': ['1'] * 10 + ['a']}, {'x': {'meaning_type': 'numeric', 'buckets': [1]}}, workers=2, chunk_size=3)
+
+    def test_unsupported_output(self):
+        with self.assertRaises(ValueError):
+            process_data_dict_by_metadata({'var': ['a']}, {'var': {'meaning_type': 'textual'}}, output='strings')
+
+    def test_multiple_variables(self):
+        processed_data_dict = process_data_dict_by_metadata(
+            {'x': [1, 7], 'y': ['t', 'f'], 'z': ['a', 'b']}
+            , {'x': {'meaning_type': 'numeric', 'buckets': [1, 5, 10]}, 'y': {'meaning_type': 'binary'}, 'z': {'meaning_type': 'categorical'}}
+        )
+        self.assertEqual(processed_data_dict, {'x': ['1<=x<5', '5<=x<10'], 'y': [True, False], 'z': ['"a"', '"b"']})
+
+class ColumnSummaryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.data_dict = {
+            'binary': ['t', 'f', 'true', 'false'] * 10
+            , 'categorical': ['a', 'b', 'c', 'd'] * 10
+            , 'numeric': [str(i) for i in range(-20, 20)]
+            , 'textual': ['text{}'.format(i) for i in range(39)] + ['']
+        }
+
+    def test_empty(self):
+        self.assertEqual(ColumnSummary().finalize(), {'meaning_type': 'empty'})
+
+    def test_same_as_get_metadata_from_data_dict(self):
+        summaries = get_summaries_from_data_dict(self.data_dict)
+        self.assertEqual(get_metadata_from_summaries(summaries, max_num_unique_values=50), get_metadata_from_data_dict(self.data_dict, max_num_unique_values=50))
+
+    def test_merge(self):
+        for quantile_engine in ['exact', 'sketch']:
+            summaries = dict()
+            for start in range(0, 40, 7):
+                shard = {key: values[start:start+7] for key, values in self.data_dict.items()}
+                merge_summaries(summaries, get_summaries_from_data_dict(shard, quantile_engine=quantile_engine))
+            metadata = get_metadata_from_summaries(summaries, max_num_unique_values=50)
+            expected_metadata = get_metadata_from_data_dict(self.data_dict, max_num_unique_values=50, quantile_engine=quantile_engine)
+            for key in ['binary', 'categorical', 'textual']:
+                self.assertEqual(metadata[key]['meaning_type'], expected_metadata[key]['meaning_type'])
+                self.assertEqual(metadata[key]['number_of_unique_values'], expected_metadata[key]['number_of_unique_values'])
+                self.assertEqual(set(metadata[key]['unique_values']), set(expected_metadata[key]['unique_values']))
+                self.assertEqual(metadata[key]['nullable'], expected_metadata[key]['nullable'])
+            self.assertEqual(metadata['numeric'], expected_metadata['numeric'])
+
+    def test_merge_number_with_text(self):
+        summary = ColumnSummary('sketch').update([str(i) for i in range(40)])
+        summary.merge(ColumnSummary('sketch').update(['a']))
+        self.assertEqual(summary.finalize()['meaning_type'], 'textual')
+
+    def test_merge_different_quantile_engines(self):
+        with self.assertRaises(ValueError):
+            ColumnSummary('exact').merge(ColumnSummary('sketch'))
+
+    def test_merge_different_unique_values_engines(self):
+        with self.assertRaises(ValueError):
+            ColumnSummary(unique_values_engine='exact').merge(ColumnSummary(unique_values_engine='sketch'))
+
+    def test_sketch_unique_values_engine_below_capacity(self):
+        metadata = get_metadata_from_summaries(
+            get_summaries_from_data_dict(self.data_dict, unique_values_engine='sketch'), max_num_unique_values=50
+        )
+        expected_metadata = get_metadata_from_data_dict(self.data_dict, max_num_unique_values=50)
+        for key in self.data_dict:
+            if 'unique_values' in expected_metadata[key]:
+                self.assertEqual(set(metadata[key].pop('unique_values')), set(expected_metadata[key].pop('unique_values')))
+        self.assertEqual(metadata, expected_metadata)
+
+    def test_sketch_unique_values_engine_above_capacity(self):
+        data_dict = {
+            'textual': ['frequent'] * 2000 + ['text{}'.format(i) for i in range(8000)] + ['']
+            , 'numeric': [str(i % 5000) for i in range(10001)]
+        }
+        expected_metadata = get_metadata_from_data_dict(data_dict)
+        for quantile_engine in ['exact', 'sketch']:
+            summaries = dict()
+            for start in range(0, 10001, 1000):
+                shard = {key: values[start:start+1000] for key, values in data_dict.items()}
+                merge_summaries(summaries, get_summaries_from_data_dict(shard, quantile_engine, unique_values_engine='sketch', heavy_hitters_capacity=100))
+            self.assertIsNone(summaries['textual'].value_counts)
+            self.assertLessEqual(len(summaries['textual'].heavy_hitters.counts), 100)
+            metadata = get_metadata_from_summaries(summaries, max_num_unique_values=3)
+            self.assertEqual(metadata['textual']['meaning_type'], 'textual')
+            self.assertEqual(metadata['textual']['unique_values'][0], 'frequent')
+            self.assertEqual(metadata['textual']['unique_values'][-1], 'TRUNCATED')
+            self.assertLess(abs(metadata['textual']['number_of_unique_values'] - 8002) / 8002, 0.05)
+            self.assertTrue(metadata['textual']['nullable'])
+            # Past the capacity, numbers go to a sketch whatever the quantile engine, which keeps min and max exactly
+            for key in ['meaning_type', 'min', 'max', 'nullable']:
+                self.assertEqual(metadata['numeric'][key], expected_metadata['numeric'][key])
+            self.assertLess(abs(metadata['numeric']['median'] - expected_metadata['numeric']['median']), 5000 * 0.05)
+
+    def test_sketch_unique_values_engine_keeps_few_numbers(self):
+        summary = ColumnSummary(unique_values_engine='sketch', heavy_hitters_capacity=100)
+        for start in range(0, 200000, 10000):
+            summary.update([str(i) for i in range(start, start + 10000)])
+        self.assertLessEqual(len(summary.heavy_hitters.counts), 100)
+        self.assertLess(sum(map(len, summary.sketched_numbers._compactors)), 10000)
+        metadata = summary.finalize()
+        self.assertEqual((metadata['meaning_type'], metadata['min'], metadata['max']), ('numeric', 0, 199999))
+
+    def test_pickle(self):
+        summaries = get_summaries_from_data_dict(self.data_dict, quantile_engine='sketch')
+        unpickled_summaries = pickle.loads(pickle.dumps(summaries))
+        merge_summaries(unpickled_summaries, get_summaries_from_data_dict(self.data_dict, quantile_engine='sketch'))
+        self.assertEqual(unpickled_summaries['numeric'].num_values, 80)
+
+    def test_get_summaries_from_file(self):
+        temp_dir = mkdtemp()
+        file_path = '{}/data.csv'.format(temp_dir)
+        try:
+            with open(file_path, 'w') as f:
+                f.write(','.join(self.data_dict.keys()) + '\n')
+                for row in zip(*self.data_dict.values()):
+                    f.write(','.join(row) + '\n')
+            summaries = get_summaries_from_file(file_path, chunk_size=3)
+            self.assertEqual(get_metadata_from_summaries(summaries, max_num_unique_values=50), get_metadata_from_data_dict(self.data_dict, max_num_unique_values=50))
+        finally:
+            shutil.rmtree(temp_dir)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,71 @@
+# map_in_processes(function, items, shared_object=None, workers=None, chunksize=1); returns list of results
+# worker_pool(function, shared_object=None, workers=None, wait=True); context manager yielding submit(item)
+# imap_unordered_in_processes(function, items, shared_object=None, workers=None, max_pending=None); yields (item, result) as they finish
+
+import unittest
+import time
+from concurrent.futures import CancelledError
+from unittest.mock import patch
+from metamon.parallel import map_in_processes, worker_pool, imap_unordered_in_processes, _forks_by_default
+
+def _add(shared_object, item):
+    return shared_object + item
+
+def _get_item_of(shared_object, key):
+    return shared_object[key]
+
+def _sleep(shared_object, seconds):
+    time.sleep(seconds)
+
+class MapInProcessesTestCase(unittest.TestCase):
+    def test_results_in_order(self):
+        self.assertEqual(map_in_processes(_add, range(10), 100, workers=3), list(range(100, 110)))
+        self.assertEqual(map_in_processes(_add, range(10), 100, workers=2, chunksize=4), list(range(100, 110)))
+
+    def test_empty_items(self):
+        self.assertEqual(map_in_processes(_add, [], 100, workers=2), [])
+
+    def test_shared_object_pickled_once_per_worker(self):
+        with patch('metamon.parallel.SHARES_MEMORY_WITH_WORKERS', False):
+            results = map_in_processes(_get_item_of, ['a', 'b', 'a'], {'a': 1, 'b': 2}, workers=2)
+        self.assertEqual(results, [1, 2, 1])
+
+class StartMethodTestCase(unittest.TestCase):
+    def test_fork_only_where_it_is_the_start_method(self):
+        with patch('multiprocessing.get_start_method', return_value=None):
+            with patch('sys.platform', 'darwin'):
+                self.assertFalse(_forks_by_default())
+            with patch('sys.platform', 'linux'), patch('sys.version_info', (3, 13)):
+                self.assertTrue(_forks_by_default())
+            with patch('sys.platform', 'linux'), patch('sys.version_info', (3, 14)):
+                self.assertFalse(_forks_by_default())
+        with patch('multiprocessing.get_start_method', return_value='spawn'):
+            self.assertFalse(_forks_by_default())
+        with patch('multiprocessing.get_start_method', return_value='fork'), patch('sys.platform', 'darwin'):
+            self.assertTrue(_forks_by_default())
+
+class WorkerPoolTestCase(unittest.TestCase):
+    def test_submit(self):
+        with worker_pool(_add, 100, workers=2) as submit:
+            futures = [submit(item) for item in range(5)]
+            self.assertEqual([future.result() for future in futures], list(range(100, 105)))
+
+    def test_exit_without_waiting(self):
+        with worker_pool(_sleep, None, workers=1, wait=False) as submit:
+            futures = [submit(1.0) for _ in range(5)]
+            start = time.perf_counter()
+        self.assertLess(time.perf_counter() - start, 0.5)
+        with self.assertRaises(CancelledError):
+            futures[-1].result(timeout=0.5)
+
+    def test_imap_unordered(self):
+        results = imap_unordered_in_processes(_add, range(10), 100, workers=2, max_pending=3)
+        self.assertEqual(sorted(results), [(item, item + 100) for item in range(10)])
+
+    def test_imap_unordered_shared_object_pickled(self):
+        with patch('metamon.parallel.SHARES_MEMORY_WITH_WORKERS', False):
+            results = dict(imap_unordered_in_processes(_get_item_of, ['a', 'b'], {'a': 1, 'b': 2}, workers=2))
+        self.assertEqual(results, {'a': 1, 'b': 2})
+
+if __name__ == '__main__':
+    unittest.main()
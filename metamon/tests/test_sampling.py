@@ -0,0 +1,80 @@
+# sample_file_to_data_dict(file_path, sample_size=10000, separator=',', method='reservoir', seed=None); returns data dict and number of rows
+# get_metadata_from_sample(file_path, sample_size=10000, separator=',', num_buckets=10, max_num_unique_values=10, method='reservoir', seed=None, confirm=False, chunk_size=10000)
+
+import unittest
+import random
+import shutil
+from tempfile import mkdtemp
+from metamon import sample_file_to_data_dict, get_metadata_from_sample, get_metadata_from_file
+
+class SamplingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = mkdtemp()
+        self.file_path = '{}/data.csv'.format(self.temp_dir)
+        rand = random.Random(0)
+        with open(self.file_path, 'w') as f:
+            f.write('row,b,c,n\n')
+            for i in range(5000):
+                f.write('{},{},{},{}\n'.format(i, rand.choice('tf'), rand.choice(['red', 'green', 'blue']), 'oops' if i == 4000 else rand.gauss(0, 10)))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_reservoir_sample(self):
+        data_dict, number_of_rows = sample_file_to_data_dict(self.file_path, 100, seed=1)
+        self.assertEqual(number_of_rows, 5000)
+        rows = list(map(int, data_dict['row']))
+        self.assertEqual(len(rows), 100)
+        self.assertEqual(rows, sorted(set(rows)))
+        self.assertEqual(sample_file_to_data_dict(self.file_path, 100, seed=1), (data_dict, number_of_rows))
+        self.assertGreater(rows[-1], 2500)
+
+    def test_seek_sample(self):
+        data_dict, number_of_rows = sample_file_to_data_dict(self.file_path, 100, method='seek', seed=1)
+        rows = list(map(int, data_dict['row']))
+        self.assertEqual(len(rows), 100)
+        self.assertEqual(rows, sorted(rows))
+        self.assertAlmostEqual(number_of_rows, 5000, delta=500)
+
+    def test_sample_larger_than_file(self):
+        data_dict, number_of_rows = sample_file_to_data_dict(self.file_path, 10000)
+        self.assertEqual(number_of_rows, 5000)
+        self.assertEqual(data_dict['row'], list(map(str, range(5000))))
+
+    def test_unsupported(self):
+        with self.assertRaises(ValueError):
+            sample_file_to_data_dict(self.file_path, method='random')
+        with self.assertRaises(ValueError):
+            sample_file_to_data_dict(self.file_path, 0)
+        with self.assertRaises(ValueError):
+            sample_file_to_data_dict('non-existing-file.txt')
+
+    def test_get_metadata_from_sample(self):
+        metadata = get_metadata_from_sample(self.file_path, 500, seed=0)
+        self.assertEqual(metadata['b']['meaning_type'], 'binary')
+        self.assertEqual(metadata['c']['meaning_type'], 'categorical')
+        self.assertEqual(metadata['n']['meaning_type'], 'numeric')
+        self.assertEqual(metadata['row']['meaning_type'], 'numeric')
+        self.assertEqual(metadata['n']['sample']['size'], 500)
+        self.assertEqual(metadata['n']['sample']['number_of_rows'], 5000)
+        self.assertAlmostEqual(metadata['n']['sample']['error'], 0.0607, places=4)
+        self.assertAlmostEqual(metadata['row']['median'], 2500, delta=5000 * metadata['row']['sample']['error'])
+
+    def test_whole_file_sampled(self):
+        metadata = get_metadata_from_sample(self.file_path, 5000)
+        for key, column_metadata in get_metadata_from_file(self.file_path).items():
+            self.assertEqual(metadata[key].pop('sample')['error'], 0.0)
+            self.assertEqual(metadata[key], column_metadata)
+
+    def test_confirm(self):
+        metadata = get_metadata_from_sample(self.file_path, 500, seed=0, confirm=True)
+        full_metadata = get_metadata_from_file(self.file_path)
+        self.assertTrue(metadata['c']['sample']['confirmed'])
+        self.assertEqual(metadata['c'].pop('sample')['number_of_rows'], 5000)
+        self.assertEqual(metadata['c'], full_metadata['c'])
+        self.assertNotIn('sample', metadata['n'])
+        self.assertEqual(metadata['n'], full_metadata['n'])
+        self.assertEqual(metadata['n']['meaning_type'], 'textual')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+# KLLSketch(error=0.01, seed=0); mergeable quantile sketch
+#   update(values)
+#   merge(other); returns the sketch itself
+#   get_order_statistic(index); returns approximately the index-th smallest value
+# HyperLogLog(error=0.01); mergeable estimator of the number of distinct values
+#   update(values)
+#   merge(other); returns the sketch itself
+#   estimate(); returns the estimated number of distinct values
+# MisraGries(capacity=1000); mergeable heavy hitters summary
+#   update(value_counts); returns the summary itself
+#   merge(other); returns the summary itself
+#   most_common(n=None); returns [(value, count), ...] with the largest counts first
+
+import unittest
+import bisect
+import random
+from collections import Counter
+from metamon.sketches import HyperLogLog, KLLSketch, MisraGries
+
+class KLLSketchTestCase(unittest.TestCase):
+    def assertRankErrorLessEqual(self, sketch, sorted_values, error):
+        num_values = len(sorted_values)
+        for index in range(0, num_values, max(num_values // 100, 1)):
+            value = sketch.get_order_statistic(index)
+            rank = bisect.bisect_left(sorted_values, value)
+            self.assertLessEqual(abs(rank - index), error * num_values)
+
+    def test_invalid_error(self):
+        with self.assertRaises(ValueError):
+            KLLSketch(0)
+        with self.assertRaises(ValueError):
+            KLLSketch(1)
+
+    def test_small_input_is_exact(self):
+        sketch = KLLSketch(0.01)
+        sketch.update([3, 1, 2])
+        self.assertEqual(sketch.num_values, 3)
+        self.assertEqual([sketch.get_order_statistic(index) for index in range(3)], [1, 2, 3])
+
+    def test_min_and_max_are_exact(self):
+        values = [random.Random(0).random() for _ in range(10000)] + [-1.0, 2.0]
+        sketch = KLLSketch(0.05)
+        sketch.update(values)
+        self.assertEqual(sketch.get_order_statistic(0), -1.0)
+        self.assertEqual(sketch.get_order_statistic(len(values) - 1), 2.0)
+
+    def test_error_bound(self):
+        rand = random.Random(0)
+        values = [rand.gauss(0, 1) for _ in range(50000)]
+        sketch = KLLSketch(0.01)
+        for index in range(0, len(values), 1000):
+            sketch.update(values[index:index+1000])
+        self.assertLess(sum(len(compactor) for compactor in sketch._compactors), len(values) / 10)
+        self.assertRankErrorLessEqual(sketch, sorted(values), 0.01)
+
+    def test_merge(self):
+        rand = random.Random(1)
+        values = [rand.random() for _ in range(30000)]
+        sketches = list()
+        for index in range(0, len(values), 7000):
+            sketch = KLLSketch(0.01)
+            sketch.update(values[index:index+7000])
+            sketches.append(sketch)
+        merged_sketch = KLLSketch(0.01)
+        for sketch in sketches:
+            merged_sketch.merge(sketch)
+        self.assertEqual(merged_sketch.num_values, len(values))
+        self.assertEqual(merged_sketch.get_order_statistic(0), min(values))
+        self.assertRankErrorLessEqual(merged_sketch, sorted(values), 0.01)
+
+class HyperLogLogTestCase(unittest.TestCase):
+    def test_invalid_error(self):
+        with self.assertRaises(ValueError):
+            HyperLogLog(0)
+
+    def test_small_cardinality(self):
+        sketch = HyperLogLog(0.01)
+        sketch.update(['a', 'b', 'c', 'a'])
+        self.assertEqual(round(sketch.estimate()), 3)
+
+    def test_equal_numbers_count_once(self):
+        sketch = HyperLogLog(0.01)
+        sketch.update([1, 1.0, 2])
+        self.assertEqual(round(sketch.estimate()), 2)
+
+    def test_error_bound(self):
+        sketch = HyperLogLog(0.01)
+        sketch.update(['value{}'.format(i) for i in range(200000)])
+        self.assertLess(abs(sketch.estimate() - 200000) / 200000, 0.03)
+
+    def test_merge(self):
+        sketch = HyperLogLog(0.02)
+        sketch.update(range(0, 60000))
+        other_sketch = HyperLogLog(0.02)
+        other_sketch.update(range(30000, 90000))
+        self.assertLess(abs(sketch.merge(other_sketch).estimate() - 90000) / 90000, 0.06)
+
+    def test_merge_different_precisions(self):
+        with self.assertRaises(ValueError):
+            HyperLogLog(0.01).merge(HyperLogLog(0.1))
+
+class MisraGriesTestCase(unittest.TestCase):
+    def test_invalid_capacity(self):
+        with self.assertRaises(ValueError):
+            MisraGries(0)
+
+    def test_exact_below_capacity(self):
+        summary = MisraGries(10).update(Counter('abracadabra'))
+        self.assertEqual(summary.most_common(2), [('a', 5), ('b', 2)])
+
+    def test_heavy_hitters_are_kept(self):
+        rand = random.Random(0)
+        values = ['frequent{}'.format(i % 3) for i in range(3000)] + ['rare{}'.format(rand.random()) for _ in range(3000)]
+        rand.shuffle(values)
+        summary = MisraGries(20)
+        for index in range(0, len(values), 500):
+            summary.update(Counter(values[index:index+500]))
+        self.assertLessEqual(len(summary.counts), 20)
+        self.assertEqual(set(value for value, _ in summary.most_common(3)), {'frequent0', 'frequent1', 'frequent2'})
+        for value, count in summary.most_common(3):
+            self.assertGreaterEqual(count, 1000 - len(values) / 21)
+
+    def test_merge(self):
+        summary = MisraGries(3).update(Counter('aaab'))
+        summary.merge(MisraGries(3).update(Counter('aacc')))
+        self.assertEqual(summary.most_common(), [('a', 5), ('c', 2), ('b', 1)])
+        # Over capacity, counts are underestimated but the most frequent value stays first
+        summary = MisraGries(2).update(Counter('aaab'))
+        summary.merge(MisraGries(2).update(Counter('aacc')))
+        self.assertEqual(summary.most_common(1), [('a', 4)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+# StageStats(callback=None, trace_memory=False); stage(stage, name=None, rows=0) context manager, add(record), totals() and records
+# stats=StageStats() of parse_file_to_data_dict, get_metadata_from_data_dict, get_metadata_from_file and process_data_dict_by_metadata
+
+import unittest
+import shutil
+from tempfile import mkdtemp
+import numpy as np
+from metamon import (
+    StageStats, parse_file_to_data_dict, get_metadata_from_data_dict, get_metadata_from_file
+    , process_data_dict_by_metadata
+)
+
+class StageStatsTestCase(unittest.TestCase):
+    def test_stage(self):
+        records = list()
+        stats = StageStats(callback=records.append)
+        with stats.stage('parse', 'file.csv') as stage:
+            stage.rows = 3
+        self.assertEqual(stats.records, records)
+        self.assertEqual(len(records), 1)
+        self.assertEqual((records[0]['stage'], records[0]['name'], records[0]['rows'], records[0]['peak_memory']), ('parse', 'file.csv', 3, None))
+        self.assertGreaterEqual(records[0]['seconds'], 0)
+
+    def test_trace_memory(self):
+        stats = StageStats(trace_memory=True)
+        with stats.stage('outer'):
+            with stats.stage('inner'):
+                values = [0] * 100000
+            del values
+            with stats.stage('small'):
+                values = [0] * 10
+        inner, small, outer = stats.records
+        self.assertGreaterEqual(inner['peak_memory'], 800000)
+        self.assertLess(small['peak_memory'], 10000)
+        self.assertGreaterEqual(outer['peak_memory'], inner['peak_memory'])
+
+    def test_totals(self):
+        stats = StageStats()
+        for name in ('a', 'b'):
+            with stats.stage('transform', name, 10):
+                pass
+        totals = stats.totals()
+        self.assertEqual(set(totals), {'transform'})
+        self.assertEqual((totals['transform']['rows'], totals['transform']['count']), (20, 2))
+
+class InstrumentedFunctionsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.data_dict = {
+            'b': ['t', 'f'] * 50
+            , 'n': [str(i) for i in range(100)]
+            , 'x': ['text{}'.format(i) for i in range(100)]
+        }
+
+    def test_get_metadata_from_data_dict(self):
+        stats = StageStats()
+        metadata = get_metadata_from_data_dict(self.data_dict, stats=stats)
+        self.assertEqual(metadata, get_metadata_from_data_dict(self.data_dict))
+        stages = [(record['stage'], record['name'], record['rows']) for record in stats.records]
+        self.assertEqual(stages, [
+            ('unique_values', 'b', 100), ('storage_types', 'b', 100), ('booleans', 'b', 2), ('metadata', 'b', 100)
+            , ('unique_values', 'n', 100), ('storage_types', 'n', 100), ('booleans', 'n', 100), ('numbers', 'n', 100)
+            , ('quantiles', 'n', 100), ('metadata', 'n', 100)
+            , ('unique_values', 'x', 100), ('storage_types', 'x', 100), ('booleans', 'x', 100), ('numbers', 'x', 100)
+            , ('metadata', 'x', 100)
+        ])
+
+    def test_get_metadata_from_data_dict_array_and_workers(self):
+        data_dict = {'a': np.arange(10.0), 'n': [str(i) for i in range(100)]}
+        stats = StageStats()
+        metadata = get_metadata_from_data_dict(data_dict, workers=2, stats=stats)
+        self.assertEqual(metadata, get_metadata_from_data_dict(data_dict))
+        self.assertEqual(
+            {(record['stage'], record['name']) for record in stats.records}
+            , {('array', 'a'), ('metadata', 'a'), ('unique_values', 'n'), ('storage_types', 'n'), ('booleans', 'n'), ('numbers', 'n'), ('quantiles', 'n'), ('metadata', 'n')}
+        )
+
+    def test_get_metadata_from_file(self):
+        temp_dir = mkdtemp()
+        file_path = '{}/data.csv'.format(temp_dir)
+        try:
+            with open(file_path, 'w') as f:
+                f.write('b,n\n' + ''.join('{},{}\n'.format(b, n) for b, n in zip(self.data_dict['b'], self.data_dict['n'])))
+            stats = StageStats()
+            parse_file_to_data_dict(file_path, stats=stats)
+            self.assertEqual([(record['stage'], record['name'], record['rows']) for record in stats.records], [('parse', file_path, 100)])
+            stats = StageStats()
+            get_metadata_from_file(file_path, stats=stats)
+            self.assertEqual(stats.records[0]['stage'], 'parse')
+            self.assertEqual(stats.records[-1]['stage'], 'metadata')
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_process_data_dict_by_metadata(self):
+        metadata = get_metadata_from_data_dict(self.data_dict)
+        for output, stage in (('values', 'transform'), ('codes', 'encode')):
+            stats = StageStats()
+            process_data_dict_by_metadata(self.data_dict, metadata, output, stats=stats)
+            self.assertEqual([(record['stage'], record['name'], record['rows']) for record in stats.records], [(stage, key, 100) for key in self.data_dict])
+        stats = StageStats()
+        processed_data_dict = process_data_dict_by_metadata(self.data_dict, metadata, workers=2, stats=stats)
+        self.assertEqual(processed_data_dict, process_data_dict_by_metadata(self.data_dict, metadata))
+        self.assertEqual([(record['stage'], record['name'], record['rows']) for record in stats.records], [('transform', None, 100)])
+
+if __name__ == '__main__':
+    unittest.main()
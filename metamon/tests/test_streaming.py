@@ -0,0 +1,93 @@
+# iter_data_dict_chunks(source, separator=',', chunk_size=10000); yields data dicts of at most chunk_size rows
+# process_file_by_metadata(source, metadata, destination, separator=',', chunk_size=10000, output_separator=None); returns number of rows written
+
+import unittest
+import io
+import shutil
+from tempfile import mkdtemp
+from metamon import (
+    iter_data_dict_chunks, process_file_by_metadata
+    , parse_file_to_data_dict, get_metadata_from_file, process_data_dict_by_metadata
+)
+
+class IterDataDictChunksTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = mkdtemp()
+        self.file_path = '{}/data.csv'.format(self.temp_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_file_path(self):
+        with open(self.file_path, 'w') as f:
+            f.write('a,b\n1,x\n2,y\n3,z\n')
+        self.assertEqual(list(iter_data_dict_chunks(self.file_path, chunk_size=2)), [
+            {'a': ['1', '2'], 'b': ['x', 'y']}, {'a': ['3'], 'b': ['z']}
+        ])
+
+    def test_file_path_wrapped_in_double_quotes(self):
+        with open(self.file_path, 'w') as f:
+            f.write('"a"\n"1"\n"2"\n3\n')
+        chunks = list(iter_data_dict_chunks(self.file_path, chunk_size=1))
+        self.assertEqual(chunks, [{'"a"': ['"1"']}, {'"a"': ['"2"']}, {'"a"': ['3']}])
+
+        with open(self.file_path, 'w') as f:
+            f.write('"a"\n"1"\n"2"\n')
+        chunks = list(iter_data_dict_chunks(self.file_path, chunk_size=1))
+        self.assertEqual(chunks, [{'a': ['1']}, {'a': ['2']}])
+
+    def test_lines(self):
+        chunks = list(iter_data_dict_chunks(io.StringIO('"a";"b"\n"1";"x"\n"2";"y"\n'), separator=';', chunk_size=1))
+        self.assertEqual(chunks, [{'a': ['1'], 'b': ['x']}, {'a': ['2'], 'b': ['y']}])
+        self.assertEqual(list(iter_data_dict_chunks(iter(['a', '1', '2']))), [{'a': ['1', '2']}])
+        self.assertEqual(list(iter_data_dict_chunks(iter([]))), [])
+
+    def test_lines_wrapping_broken_later(self):
+        with self.assertRaises(ValueError):
+            list(iter_data_dict_chunks(io.StringIO('"a"\n"1"\n2\n'), chunk_size=1))
+
+    def test_improperly_formatted(self):
+        with self.assertRaisesRegex(ValueError, 'line number - 2,'):
+            list(iter_data_dict_chunks(io.StringIO('a,b\n1,2\n3\n')))
+
+    def test_non_existing_file(self):
+        with self.assertRaises(ValueError):
+            list(iter_data_dict_chunks('non-existing-file.txt'))
+
+class ProcessFileByMetadataTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = mkdtemp()
+        self.file_path = '{}/data.csv'.format(self.temp_dir)
+        with open(self.file_path, 'w') as f:
+            f.write('b,c,x\n')
+            for i in range(100):
+                f.write('{},{},{}\n'.format(['t', 'f'][i % 2], ['red', 'green', 'blue'][i % 3], i if i % 10 else ''))
+        self.metadata = get_metadata_from_file(self.file_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_same_as_process_data_dict_by_metadata(self):
+        output = io.StringIO()
+        self.assertEqual(process_file_by_metadata(self.file_path, self.metadata, output, chunk_size=7), 100)
+        lines = output.getvalue().splitlines()
+        self.assertEqual(lines[0], 'b,c,x')
+        processed_data_dict = process_data_dict_by_metadata(parse_file_to_data_dict(self.file_path), self.metadata)
+        expected_lines = [','.join(map(str, row)) for row in zip(*processed_data_dict.values())]
+        self.assertEqual(lines[1:], expected_lines)
+
+    def test_file_to_file(self):
+        output_path = '{}/processed.csv'.format(self.temp_dir)
+        with open(self.file_path, 'r') as f:
+            process_file_by_metadata(f, self.metadata, output_path, output_separator='\t')
+        with open(output_path, 'r') as f:
+            self.assertEqual(f.readline(), 'b\tc\tx\n')
+            self.assertEqual(f.readline(), 'True\t"red"\t""\n')
+
+    def test_none_written_as_empty(self):
+        output = io.StringIO()
+        process_file_by_metadata(io.StringIO('x\n1\n'), {'x': {'meaning_type': 'empty'}}, output)
+        self.assertEqual(output.getvalue(), 'x\n1\n')
+
+if __name__ == '__main__':
+    unittest.main()
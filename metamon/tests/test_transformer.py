@@ -0,0 +1,107 @@
+# MetadataTransformer(metadata)
+#   transform_row(row); returns processed row dict
+#   transform_batch(data_dict); returns processed data dict
+#   encode_batch(data_dict); returns {variable name: {'codes': int32 array, 'vocabulary': list}}
+
+import unittest
+import numpy as np
+from metamon import MetadataTransformer, get_metadata_from_data_dict, process_data_dict_by_metadata
+
+class MetadataTransformerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.metadata = {
+            'b': {'meaning_type': 'binary'}
+            , 'c': {'meaning_type': 'categorical'}
+            , 't': {'meaning_type': 'textual'}
+            , 'x': {'meaning_type': 'numeric', 'buckets': [1, 5, 10]}
+            , 'y': {'meaning_type': 'numeric', 'buckets': []}
+        }
+        self.transformer = MetadataTransformer(self.metadata)
+
+    def test_transform_row(self):
+        row = self.transformer.transform_row({'b': 'FaLsE', 'c': 'a', 't': 1.2, 'x': '7', 'y': 3})
+        self.assertEqual(row, {'b': False, 'c': '"a"', 't': 1.2, 'x': '5<=x<10', 'y': '-inf<y<inf'})
+
+        row = self.transformer.transform_row({'b': 1, 'x': ''})
+        self.assertEqual(row, {'b': True, 'x': ''})
+
+        row = self.transformer.transform_row({'x': 0.5})
+        self.assertEqual(row, {'x': 'x<1'})
+
+        row = self.transformer.transform_row({'x': 10})
+        self.assertEqual(row, {'x': '10<=x'})
+
+    def test_transform_row_non_number(self):
+        with self.assertRaises(ValueError):
+            self.transformer.transform_row({'x': 'a'})
+
+    def test_transform_row_unknown_variable(self):
+        with self.assertRaises(KeyError):
+            self.transformer.transform_row({'z': 1})
+
+    def test_transform_batch(self):
+        data_dict = {
+            'b': ['t', 'f', '0', '1', True, 0.0]
+            , 'c': ['a', 'b', 1, 'a', None, 'c']
+            , 'x': ['0', '1', '', 5.5, None, '12']
+        }
+        processed_data_dict = self.transformer.transform_batch(data_dict)
+        self.assertEqual(processed_data_dict, {
+            'b': [True, False, False, True, True, False]
+            , 'c': ['"a"', '"b"', 1, '"a"', None, '"c"']
+            , 'x': ['x<1', '1<=x<5', '', '5<=x<10', None, '10<=x']
+        })
+        self.assertEqual(processed_data_dict, process_data_dict_by_metadata(data_dict, self.metadata))
+
+    def test_transform_row_same_as_transform_batch(self):
+        data_dict = {'var': ["1.2", -0.2, "3.4", 2.4, "2.1", 5.6, 1.2, 2.3, 10.2, 11.3, 24.1]}
+        transformer = MetadataTransformer(get_metadata_from_data_dict(data_dict))
+        processed_data_dict = transformer.transform_batch(data_dict)
+        self.assertEqual([transformer.transform_row({'var': value})['var'] for value in data_dict['var']], processed_data_dict['var'])
+
+    def test_transform_batch_numpy_arrays(self):
+        data_dict = {
+            'b': np.array([0, 3, 1])
+            , 'c': np.array([2.5, np.nan, 1.0])
+            , 'x': np.array([0.5, 7.0, np.nan, 0.0, 12.0])
+            , 'y': np.array([3, 0])
+        }
+        processed_data_dict = self.transformer.transform_batch(data_dict)
+        self.assertEqual(processed_data_dict['b'], [False, True, True])
+        self.assertEqual(processed_data_dict['c'][::2], [2.5, 1.0])
+        self.assertEqual(processed_data_dict['x'][:2] + processed_data_dict['x'][3:], ['x<1', '5<=x<10', 0.0, '10<=x'])
+        self.assertTrue(np.isnan(processed_data_dict['x'][2]))
+        self.assertEqual(processed_data_dict['y'], ['-inf<y<inf', 0])
+        self.assertEqual(processed_data_dict['b'], self.transformer.transform_batch({'b': [0, 3, 1]})['b'])
+        self.assertEqual(processed_data_dict['y'], self.transformer.transform_batch({'y': [3, 0]})['y'])
+
+    def test_encode_batch(self):
+        data_dict = {
+            'b': ['t', 'f', '0', True]
+            , 'c': ['b', 'a', 'b', None]
+            , 'x': ['0', '', '12', 5.5, None, '']
+            , 'y': np.array([3.0, np.nan])
+        }
+        encoded_data_dict = self.transformer.encode_batch(data_dict)
+        self.assertEqual({key: encoded['codes'].tolist() for key, encoded in encoded_data_dict.items()}, {
+            'b': [1, 0, 0, 1], 'c': [0, 1, 0, 2], 'x': [0, 4, 3, 2, 5, 4], 'y': [0, 1]
+        })
+        self.assertEqual(encoded_data_dict['b']['vocabulary'], [False, True])
+        self.assertEqual(encoded_data_dict['c']['vocabulary'], ['"b"', '"a"', None])
+        self.assertEqual(encoded_data_dict['x']['vocabulary'], ['x<1', '1<=x<5', '5<=x<10', '10<=x', '', None])
+        self.assertEqual(encoded_data_dict['x']['codes'].dtype, np.int32)
+        processed_data_dict = self.transformer.transform_batch(data_dict)
+        for key in ['b', 'c', 'x']:
+            encoded = encoded_data_dict[key]
+            self.assertEqual([encoded['vocabulary'][code] for code in encoded['codes']], processed_data_dict[key])
+
+    def test_encode_batch_known_values_first(self):
+        transformer = MetadataTransformer({
+            'c': {'meaning_type': 'categorical', 'unique_values': ['x', 'y', 'TRUNCATED'], 'number_of_unique_values': 4}
+        })
+        encoded = transformer.encode_batch({'c': ['z', 'y']})['c']
+        self.assertEqual(encoded['codes'].tolist(), [2, 1])
+        self.assertEqual(encoded['vocabulary'], ['"x"', '"y"', '"z"'])
+
+if __name__ == '__main__':
+    unittest.main()
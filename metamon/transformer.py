@@ -0,0 +1,279 @@
+import bisect
+from decimal import Decimal
+from fractions import Fraction
+from .functions import _convert_to_numbers, _get_bucket_indices, _get_bucket_labels, _get_numeric_array
+from .parallel import map_in_processes
+from .stats import _NO_STATS
+
+_FALSE_STRINGS = frozenset(['f', 'false', '0'])
+
+def _convert_to_number(key, value):
+    if type(value) in [int, float, Decimal, Fraction]:
+        return value
+    try:
+        return int(value)
+    except ValueError:
+        try:
+            return float(value)
+        except ValueError:
+            raise ValueError('Metadata says a variable is a number but some values of it are not numbers: variable name - {}, value - {}'.format(key, value))
+
+def _quote_string(value):
+    if isinstance(value, str):
+        return '"{}"'.format(value)
+    return value
+
+def _convert_to_boolean(value):
+    if isinstance(value, bool):
+        return value
+    elif type(value) in [int, float, Decimal, Fraction]:
+        return value != 0
+    try:
+        lowered_value = value.lower()
+    except AttributeError:
+        return bool(value)
+    return lowered_value not in _FALSE_STRINGS
+
+def _keep_value(value):
+    return value
+
+def _dictionary_encode(values, vocabulary):
+    # Appends the values that are not in vocabulary yet to it and returns the position of each value in vocabulary.
+    # Values are told apart by type too, so that 1, 1.0 and True keep their own codes.
+    positions = {(type(value), value): position for position, value in enumerate(vocabulary)}
+    codes = list()
+    for value in values:
+        typed_value = (type(value), value)
+        position = positions.get(typed_value)
+        if position is None:
+            position = positions[typed_value] = len(vocabulary)
+            vocabulary.append(value)
+        codes.append(position)
+    return codes
+
+def _get_codes_array(codes, vocabulary):
+    import numpy as np
+    return np.asarray(codes, dtype=np.int32 if len(vocabulary) <= np.iinfo(np.int32).max else np.int64)
+
+def _get_known_values(column_metadata):
+    # The unique values in metadata, without the mark of truncated unique values
+    unique_values = list(column_metadata.get('unique_values', []))
+    if unique_values and unique_values[-1] == 'TRUNCATED' and column_metadata.get('number_of_unique_values', 0) >= len(unique_values):
+        unique_values.pop()
+    return unique_values
+
+def _compile_numeric_column(key, buckets):
+    buckets = sorted(buckets)
+    bucket_labels = _get_bucket_labels(buckets, key)
+
+    def transform_value(value):
+        # Empty values are kept as they are
+        if not value:
+            return value
+        return bucket_labels[bisect.bisect_right(buckets, _convert_to_number(key, value))]
+
+    def get_bucket_indices(values):
+        # Returns values as a list or array and the bucket index of each value, or -1 for empty values,
+        # which are kept as they are. NaN counts as empty in arrays.
+        import numpy as np
+        numeric_array = _get_numeric_array(values)
+        if numeric_array is not None:
+            bucket_indices = _get_bucket_indices(numeric_array, buckets)
+            kept = (numeric_array == 0) | np.isnan(numeric_array) if numeric_array.dtype.kind == 'f' else numeric_array == 0
+            bucket_indices[kept] = -1
+            return numeric_array, bucket_indices
+        values = list(values)
+        # The rest are converted and bucketized all at once
+        number_positions = [position for position, value in enumerate(values) if value]
+        numbers, non_number_index = _convert_to_numbers([values[position] for position in number_positions])
+        if non_number_index is not None:
+            _convert_to_number(key, values[number_positions[non_number_index]])
+        bucket_indices = np.full(len(values), -1, dtype=np.intp)
+        if numbers:
+            bucket_indices[number_positions] = _get_bucket_indices(numbers, buckets)
+        return values, bucket_indices
+
+    def get_kept_values(values, kept_positions):
+        if isinstance(values, list):
+            return [values[position] for position in kept_positions.tolist()]
+        return values[kept_positions].tolist()
+
+    def transform_values(values):
+        import numpy as np
+        values, bucket_indices = get_bucket_indices(values)
+        transformed_values = np.array(bucket_labels + [None], dtype=object)[bucket_indices]
+        kept_positions = np.flatnonzero(bucket_indices < 0)
+        transformed_values[kept_positions] = get_kept_values(values, kept_positions)
+        return transformed_values.tolist()
+
+    def encode_values(values):
+        # Codes are bucket indices, and empty values kept as they are come after the bucket labels in the vocabulary
+        import numpy as np
+        values, bucket_indices = get_bucket_indices(values)
+        vocabulary = list(bucket_labels)
+        kept_positions = np.flatnonzero(bucket_indices < 0)
+        if len(kept_positions):
+            bucket_indices[kept_positions] = _dictionary_encode(get_kept_values(values, kept_positions), vocabulary)
+        return _get_codes_array(bucket_indices, vocabulary), vocabulary
+
+    return transform_value, transform_values, encode_values
+
+def _compile_column(key, column_metadata):
+    meaning_type = column_metadata['meaning_type']
+    if meaning_type == 'numeric':
+        return _compile_numeric_column(key, column_metadata['buckets'])
+    elif meaning_type in ['categorical', 'textual']:
+        transform_value = _quote_string
+    elif meaning_type == 'binary':
+        transform_value = _convert_to_boolean
+    else:
+        transform_value = _keep_value
+
+    def transform_values(values):
+        numeric_array = _get_numeric_array(values)
+        if numeric_array is not None:
+            # Numbers are neither quoted nor changed, except by binary metadata, to whether they are non-zero
+            return (numeric_array != 0).tolist() if transform_value is _convert_to_boolean else numeric_array.tolist()
+        return [transform_value(value) for value in values]
+
+    def encode_values(values):
+        if transform_value is _convert_to_boolean:
+            vocabulary = [False, True]
+            return _get_codes_array(transform_values(values), vocabulary), vocabulary
+        # Values are encoded before they are processed, so that each distinct value is processed only once.
+        # The unique values in metadata come first, so that they get the same codes in every batch.
+        numeric_array = _get_numeric_array(values)
+        raw_vocabulary = _get_known_values(column_metadata)
+        codes = _dictionary_encode(numeric_array.tolist() if numeric_array is not None else values, raw_vocabulary)
+        return _get_codes_array(codes, raw_vocabulary), [transform_value(value) for value in raw_vocabulary]
+
+    return transform_value, transform_values, encode_values
+
+class MetadataTransformer(object):
+    """
+    Processes data according to metadata like process_data_dict_by_metadata does, but reads the metadata only once
+    when it is created so that single rows can be processed quickly.
+    """
+
+    def __init__(self, metadata):
+        self.metadata = metadata
+        self._value_transformers = dict()
+        self._values_transformers = dict()
+        self._values_encoders = dict()
+        for key, column_metadata in metadata.items():
+            self._value_transformers[key], self._values_transformers[key], self._values_encoders[key] = _compile_column(key, column_metadata)
+
+    def transform_row(self, row):
+        value_transformers = self._value_transformers
+        return {key: value_transformers[key](value) for key, value in row.items()}
+
+    def transform_batch(self, data_dict, stats=None):
+        # With stats, a StageStats, the transform stage of every variable is recorded
+        if stats is None:
+            return {key: self._values_transformers[key](values) for key, values in data_dict.items()}
+        transformed_data_dict = dict()
+        for key, values in data_dict.items():
+            with stats.stage('transform', key, len(values)):
+                transformed_data_dict[key] = self._values_transformers[key](values)
+        return transformed_data_dict
+
+    def encode_batch(self, data_dict, stats=None):
+        """
+        Returns {variable name: {'codes': ..., 'vocabulary': [...]}} where vocabulary[code] is what transform_batch
+        returns for each value and codes is a NumPy int32 array. Vocabularies of numeric variables start with
+        the bucket labels of their buckets, those of binary variables are [False, True] and those of categorical and
+        textual variables start with the unique values in metadata. With stats, a StageStats, the encode stage of
+        every variable is recorded.
+        """
+        stats = _NO_STATS if stats is None else stats
+        encoded_data_dict = dict()
+        for key, values in data_dict.items():
+            with stats.stage('encode', key, len(values)):
+                codes, vocabulary = self._values_encoders[key](values)
+            encoded_data_dict[key] = {'codes': codes, 'vocabulary': vocabulary}
+        return encoded_data_dict
+
+def _slice_rows(values, start, stop):
+    # Positional slice of a list, array, StoredColumn or pandas Series
+    if hasattr(values, 'iloc'):
+        return values.iloc[start:stop]
+    return values[start:stop]
+
+def _decode(codes, vocabulary):
+    import numpy as np
+    vocabulary_array = np.empty(len(vocabulary), dtype=object)
+    for code, value in enumerate(vocabulary):
+        vocabulary_array[code] = value
+    return vocabulary_array[codes].tolist()
+
+class _RowChunkJob(object):
+    # What workers need to encode chunks of rows into the shared memory blocks named in shared_memory_names.
+    # The transformer is compiled once per process: workers that are forked inherit it and others compile it.
+    def __init__(self, data_dict, metadata, shared_memory_names, num_rows):
+        self.data_dict = data_dict
+        self.metadata = metadata
+        self.shared_memory_names = shared_memory_names
+        self.num_rows = num_rows
+        self.transformer = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['transformer'] = None
+        return state
+
+    def get_transformer(self):
+        if self.transformer is None:
+            self.transformer = MetadataTransformer(self.metadata)
+        return self.transformer
+
+def _encode_row_chunk(job, row_range):
+    # Writes the codes of rows [start, stop) to shared memory and returns the vocabulary of the chunk of each variable
+    import numpy as np
+    from multiprocessing.shared_memory import SharedMemory
+    start, stop = row_range
+    values_encoders = job.get_transformer()._values_encoders
+    vocabularies = dict()
+    for key, shared_memory_name in job.shared_memory_names.items():
+        codes, vocabularies[key] = values_encoders[key](_slice_rows(job.data_dict[key], start, stop))
+        shared_memory = SharedMemory(name=shared_memory_name)
+        try:
+            np.ndarray(job.num_rows, dtype=np.int32, buffer=shared_memory.buf)[start:stop] = codes
+        finally:
+            shared_memory.close()
+    return vocabularies
+
+def _encode_in_row_chunks(data_dict, metadata, workers, chunk_size=None):
+    """
+    Same as MetadataTransformer(metadata).encode_batch(data_dict), with chunks of chunk_size rows encoded in that many
+    worker processes. Codes are written to shared memory instead of being sent back, and only the vocabularies of
+    the chunks are, which are merged in order of the chunks so that the vocabularies are the same as without workers.
+    """
+    import numpy as np
+    from multiprocessing.shared_memory import SharedMemory
+    keys = list(data_dict.keys())
+    num_rows = len(data_dict[keys[0]]) if keys else 0
+    if chunk_size is None:
+        chunk_size = max(1, -(-num_rows // (workers * 4)))
+    row_ranges = [(start, min(start + chunk_size, num_rows)) for start in range(0, num_rows, chunk_size)]
+    shared_memories = dict()
+    try:
+        for key in keys:
+            shared_memories[key] = SharedMemory(create=True, size=max(1, num_rows * np.dtype(np.int32).itemsize))
+        job = _RowChunkJob(data_dict, metadata, {key: shared_memory.name for key, shared_memory in shared_memories.items()}, num_rows)
+        job.get_transformer()
+        chunk_vocabularies = map_in_processes(_encode_row_chunk, row_ranges, job, workers=workers)
+
+        encoded_data_dict = dict()
+        for key, shared_memory in shared_memories.items():
+            codes = np.ndarray(num_rows, dtype=np.int32, buffer=shared_memory.buf).copy()
+            vocabulary = list()
+            for (start, stop), vocabularies in zip(row_ranges, chunk_vocabularies):
+                chunk_codes = _dictionary_encode(vocabularies[key], vocabulary)
+                if chunk_codes != list(range(len(chunk_codes))):
+                    codes[start:stop] = np.asarray(chunk_codes, dtype=np.int32)[codes[start:stop]]
+            encoded_data_dict[key] = {'codes': codes, 'vocabulary': vocabulary}
+        return encoded_data_dict
+    finally:
+        for shared_memory in shared_memories.values():
+            shared_memory.close()
+            shared_memory.unlink()
@@ -7,7 +7,8 @@ setup(name='metamon',
     classifiers=[
         'Development Status :: 5 - Production/Stable',
         'License :: OSI Approved :: MIT License',
-        'Programming Language :: Python :: 3.6',
+        'Programming Language :: Python :: 3',
+        'Programming Language :: Python :: 3.9',
         'Topic :: Scientific/Engineering :: Information Analysis'
     ],
     keywords='metadata, descriptive analytics',
@@ -15,13 +16,16 @@ setup(name='metamon',
     author_email='spark@example.com',
     license='MIT',
     packages=['metamon'],
+    python_requires='>=3.9',
     install_requires=[
         'coverage==4.4.2',
         'nose2==0.7.3',
-        'numpy==1.14.0',
-        'scipy==1.0.0',
+        'numpy>=1.19.3',
         'six==1.11.0'
     ],
+    entry_points={
+        'console_scripts': ['metamon=metamon.cli:main']
+    },
     include_package_data=True,
     zip_safe=False,
     tests_require=['nose2']